@@ -7,6 +7,8 @@ env = environ.Env(
     DEBUG=(bool, True),
     JWT_ACCESS_TTL_SECONDS=(int, 15 * 60),
     JWT_REFRESH_TTL_SECONDS=(int, 7 * 24 * 60 * 60),
+    JWT_USER_CACHE_TTL_SECONDS=(int, 30),
+    JWT_USER_CACHE_MAX_ENTRIES=(int, 10000),
 )
 environ.Env.read_env(BASE_DIR / ".env")
 
@@ -35,6 +37,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Answers the gateway's /api/auth/verify/ subrequest before sessions/CSRF/messages run.
+    "core.middleware.VerifyFastPathMiddleware",
+
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
@@ -52,6 +57,9 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = "app404.urls"
 
+# Import each team's urls.py on the first request to /<team>/ rather than at startup.
+LAZY_TEAM_URLS = env.bool("LAZY_TEAM_URLS", default=True)
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
@@ -80,8 +88,22 @@ for t in TEAM_APPS:
     default_url = f"sqlite:///{BASE_DIR / t / (t + '.sqlite3')}"
     DATABASES[t] = env.db(key, default=default_url)
 
+# Persistent connections: each worker thread keeps one connection per alias and
+# reuses it across requests instead of reconnecting. Override per alias with
+# <ALIAS>_DB_CONN_MAX_AGE / <ALIAS>_DB_CONN_HEALTH_CHECKS (e.g. TEAM3_DB_CONN_MAX_AGE=0),
+# or with ?conn_max_age= on the database URL itself.
+DB_CONN_MAX_AGE = env.int("DB_CONN_MAX_AGE", default=60)
+DB_CONN_HEALTH_CHECKS = env.bool("DB_CONN_HEALTH_CHECKS", default=True)
+
+for alias, db in DATABASES.items():
+    db.setdefault("CONN_MAX_AGE", env.int(f"{alias.upper()}_DB_CONN_MAX_AGE", default=DB_CONN_MAX_AGE))
+    db.setdefault("CONN_HEALTH_CHECKS", env.bool(f"{alias.upper()}_DB_CONN_HEALTH_CHECKS", default=DB_CONN_HEALTH_CHECKS))
+
 DATABASE_ROUTERS = ["core.db_router.TeamPerAppRouter"]
 
+# Per-process memory by default; point CACHE_URL at redis to share it between workers.
+CACHES = {"default": env.cache("CACHE_URL", default="locmemcache://")}
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
@@ -109,9 +131,18 @@ JWT_ALGORITHM = "HS256"
 JWT_ACCESS_TTL_SECONDS = env("JWT_ACCESS_TTL_SECONDS")
 JWT_REFRESH_TTL_SECONDS = env("JWT_REFRESH_TTL_SECONDS")
 
+# Per-worker cache of verified (sub, tv) -> user; 0 disables it.
+# Other workers only see a logout once their entry expires, so keep this short.
+JWT_USER_CACHE_TTL_SECONDS = env("JWT_USER_CACHE_TTL_SECONDS")
+JWT_USER_CACHE_MAX_ENTRIES = env("JWT_USER_CACHE_MAX_ENTRIES")
+JWT_VERIFY_FAST_PATH = env.bool("JWT_VERIFY_FAST_PATH", default=True)
+
 JWT_COOKIE_SECURE = env.bool("JWT_COOKIE_SECURE", default=False)
 JWT_COOKIE_SAMESITE = env("JWT_COOKIE_SAMESITE", default="Lax")
 
+# Shared secret for scraping /api/metrics/ without a staff login (X-Metrics-Token); empty = staff only.
+METRICS_TOKEN = env("METRICS_TOKEN", default="")
+
 CORS_ALLOW_CREDENTIALS = True
 
 if DEBUG:
@@ -131,6 +162,20 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 
+# team3: seconds a user's ranked recommendations stay cached (0 = off).
+TEAM3_RECOMMENDATION_CACHE_SECONDS = env.int("TEAM3_RECOMMENDATION_CACHE_SECONDS", default=300)
+# team3: >0 buffers single /api/interactions/ writes in-process and inserts them in batches.
+TEAM3_INTERACTION_BUFFER_SIZE = env.int("TEAM3_INTERACTION_BUFFER_SIZE", default=0)
+TEAM3_INTERACTION_FLUSH_SECONDS = env.float("TEAM3_INTERACTION_FLUSH_SECONDS", default=2.0)
+
 GEMINI_API_KEY = env("GEMINI_API_KEY", default=None)
 ELASTICSEARCH_URL = env("ELASTICSEARCH_URL", default="http://localhost:9200")
+# team2: articles per bulk request and bulk requests in flight during a full reindex.
+TEAM2_REINDEX_BATCH_SIZE = env.int("TEAM2_REINDEX_BATCH_SIZE", default=500)
+TEAM2_REINDEX_PARALLELISM = env.int("TEAM2_REINDEX_PARALLELISM", default=2)
+# team2: search falls back to an in-process index when ES fails or takes longer than the timeout,
+# and skips ES for TEAM2_SEARCH_RETRY_SECONDS after a failure.
+TEAM2_SEARCH_TIMEOUT_SECONDS = env.float("TEAM2_SEARCH_TIMEOUT_SECONDS", default=2.0)
+TEAM2_SEARCH_RETRY_SECONDS = env.int("TEAM2_SEARCH_RETRY_SECONDS", default=30)
+TEAM2_LOCAL_SEARCH_REBUILD_SECONDS = env.int("TEAM2_LOCAL_SEARCH_REBUILD_SECONDS", default=600)
 TEAM2_FRONT_URL = env("TEAM2_FRONT_URL")
@@ -19,6 +19,7 @@ from django.urls import path, include
 from django.conf import settings
 from core.web_views import home
 from core.web_auth_views import login_page, signup_page, logout_page
+from core.lazy_urls import lazy_include
 
 urlpatterns = [
     path("", home, name="home"),
@@ -32,7 +33,12 @@ urlpatterns = [
 ]
 
 
+# With LAZY_TEAM_URLS a team's urls/views (and whatever they import) load on the
+# first request under its prefix instead of in every worker at startup.
 for app in settings.TEAM_APPS:
-    urlpatterns.append(path(f"{app}/", include(f"{app}.urls")))
+    if settings.LAZY_TEAM_URLS:
+        urlpatterns.append(lazy_include(f"{app}/", f"{app}.urls"))
+    else:
+        urlpatterns.append(path(f"{app}/", include(f"{app}.urls")))
 
 
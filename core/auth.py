@@ -1,4 +1,6 @@
+import hmac
 from functools import wraps
+from django.conf import settings
 from django.http import JsonResponse
 
 def api_login_required(view_func):
@@ -8,3 +10,25 @@ def api_login_required(view_func):
             return JsonResponse({"detail": "Authentication required"}, status=401)
         return view_func(request, *args, **kwargs)
     return _wrapped
+
+
+def _has_metrics_token(request):
+    expected = settings.METRICS_TOKEN
+    given = request.headers.get("X-Metrics-Token", "")
+    return bool(expected) and hmac.compare_digest(given.encode(), expected.encode())
+
+
+def staff_or_metrics_token_required(view_func):
+    """
+    Operational endpoints: staff users, or scrapers sending X-Metrics-Token == METRICS_TOKEN.
+    """
+    @wraps(view_func)
+    def _wrapped(request, *args, **kwargs):
+        if _has_metrics_token(request):
+            return view_func(request, *args, **kwargs)
+        if not request.user.is_authenticated:
+            return JsonResponse({"detail": "Authentication required"}, status=401)
+        if not request.user.is_staff:
+            return JsonResponse({"detail": "Forbidden"}, status=403)
+        return view_func(request, *args, **kwargs)
+    return _wrapped
@@ -0,0 +1,115 @@
+import threading
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections, router
+from django.db.backends.signals import connection_created
+
+_lock = threading.Lock()
+_stats = {}
+_installed = False
+_EMPTY = {"opened": 0, "closed": 0, "timed": 0, "connect_ms_total": 0.0, "connect_ms_max": 0.0}
+
+
+def _alias_stats(alias):
+    stats = _stats.get(alias)
+    if stats is None:
+        stats = _stats[alias] = dict(_EMPTY)
+    return stats
+
+
+def _instrument(connection):
+    """
+    Wrap get_new_connection() and close() on this one DatabaseWrapper instance (not the class).
+    """
+    if getattr(connection, "_db_metrics", False):
+        return
+    connection._db_metrics = True
+    get_new_connection = connection.get_new_connection
+    close = connection.close
+
+    def timed_get_new_connection(conn_params):
+        started = time.perf_counter()
+        new_connection = get_new_connection(conn_params)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with _lock:
+            stats = _alias_stats(connection.alias)
+            stats["timed"] += 1
+            stats["connect_ms_total"] += elapsed_ms
+            stats["connect_ms_max"] = max(stats["connect_ms_max"], elapsed_ms)
+        return new_connection
+
+    def counted_close():
+        was_open = connection.connection is not None
+        try:
+            return close()
+        finally:
+            if was_open and connection.connection is None:
+                with _lock:
+                    _alias_stats(connection.alias)["closed"] += 1
+
+    connection.get_new_connection = timed_get_new_connection
+    connection.close = counted_close
+
+
+def _count_opened(sender, connection, **kwargs):
+    with _lock:
+        _alias_stats(connection.alias)["opened"] += 1
+    _instrument(connection)
+
+
+def _instrument_thread_connections(sender, **kwargs):
+    # Wrappers are per thread; instrument this thread's before its first connect so it is timed too.
+    for connection in connections.all(initialized_only=False):
+        _instrument(connection)
+
+
+def install():
+    """
+    Count every physical connect/close on all backends. Persistent connections
+    (CONN_MAX_AGE) are only worth it if "opened" stays flat while traffic grows.
+
+    Opens come from the connection_created signal. Connect time and closes come from
+    wrappers on each thread's DatabaseWrapper instances; a connection opened before
+    its wrapper was instrumented is counted but not timed.
+    """
+    global _installed
+    if _installed:
+        return
+    _installed = True
+
+    connection_created.connect(_count_opened, dispatch_uid="core.db_metrics.opened")
+    request_started.connect(_instrument_thread_connections, dispatch_uid="core.db_metrics.instrument")
+
+
+def _routed_apps():
+    """Alias -> app labels, as the configured DATABASE_ROUTERS send each app's first model."""
+    routed = {alias: [] for alias in settings.DATABASES}
+    for label in ["core", *settings.TEAM_APPS]:
+        models = list(apps.get_app_config(label).get_models())
+        if models:
+            routed.setdefault(router.db_for_read(models[0]), []).append(label)
+    return routed
+
+
+def snapshot():
+    routed = _routed_apps()
+    with _lock:
+        stats = {alias: dict(values) for alias, values in _stats.items()}
+
+    result = {}
+    for alias in connections:
+        values = stats.get(alias, _EMPTY)
+        opened = values["opened"]
+        result[alias] = {
+            "vendor": connections[alias].vendor,
+            "apps": routed.get(alias, []),
+            "opened": opened,
+            "closed": values["closed"],
+            "open": opened - values["closed"],
+            "connect_ms_avg": round(values["connect_ms_total"] / values["timed"], 3) if values["timed"] else 0.0,
+            "connect_ms_max": round(values["connect_ms_max"], 3),
+        }
+    return result
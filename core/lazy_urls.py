@@ -0,0 +1,56 @@
+from importlib import import_module
+
+from django.urls import clear_url_caches
+from django.urls.resolvers import RoutePattern, URLResolver
+from django.utils.datastructures import MultiValueDict
+from django.utils.functional import cached_property
+from django.utils.translation import get_language
+
+
+class LazyURLResolver(URLResolver):
+    """
+    URLResolver for include()-style prefixes that imports its urlconf on first use.
+
+    Resolving a path under the prefix (or reversing into its namespace) imports the
+    module, and with it the team's views and their dependencies. Until then the
+    resolver contributes nothing to reverse(), so names of a team that has not
+    served a request in this process are not reversible from other apps.
+    """
+
+    @property
+    def loaded(self):
+        return "urlconf_module" in self.__dict__
+
+    @cached_property
+    def urlconf_module(self):
+        module = import_module(self.urlconf_name)
+
+        # Mirror include(): pick up the module's app_name as the namespace.
+        app_name = getattr(module, "app_name", None)
+        if app_name and not self.app_name:
+            self.app_name = app_name
+            self.namespace = self.namespace or app_name
+
+        # Forget the empty reverse data recorded while unloaded, here and in the root resolver.
+        self._reverse_dict = {}
+        self._namespace_dict = {}
+        self._app_dict = {}
+        self._populated = False
+        clear_url_caches()
+        return module
+
+    def _populate(self):
+        if self.loaded:
+            return super()._populate()
+
+        language_code = get_language()
+        self._reverse_dict[language_code] = MultiValueDict()
+        self._namespace_dict[language_code] = {}
+        self._app_dict[language_code] = {}
+
+
+def lazy_include(route, urlconf_name, namespace=None):
+    """
+    Equivalent of path(route, include(urlconf_name)) that defers the import.
+    """
+    return LazyURLResolver(RoutePattern(route, is_endpoint=False), urlconf_name, namespace=namespace)
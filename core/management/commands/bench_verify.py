@@ -0,0 +1,68 @@
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, override_settings
+
+from core.jwt_utils import create_access_token
+from core.token_cache import user_token_cache
+
+User = get_user_model()
+
+FAST_PATH = "core.middleware.VerifyFastPathMiddleware"
+
+
+class Command(BaseCommand):
+    help = "Measure /api/auth/verify/ requests/sec through the full middleware stack and through the fast path."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--warmup", type=int, default=50)
+
+    def handle(self, *args, **options):
+        total = options["requests"]
+        warmup = options["warmup"]
+        full_stack = [m for m in settings.MIDDLEWARE if m != FAST_PATH]
+        cache_ttl = user_token_cache.ttl_seconds or 30
+
+        runs = [
+            ("before: full stack, no token cache", full_stack, 0),
+            ("full stack + token cache", full_stack, cache_ttl),
+            ("after: fast path + token cache", [FAST_PATH, *full_stack], cache_ttl),
+        ]
+
+        original_ttl = user_token_cache.ttl_seconds
+        try:
+            # The throwaway user is rolled back together with everything the runs touched.
+            with transaction.atomic():
+                user = User.objects.create_user(email=f"bench-{uuid.uuid4().hex}@bench.local", password=None)
+                headers = {"HTTP_AUTHORIZATION": f"Bearer {create_access_token(user)}"}
+
+                baseline = None
+                for label, middleware, ttl in runs:
+                    user_token_cache.ttl_seconds = ttl
+                    user_token_cache.clear()
+                    with override_settings(MIDDLEWARE=middleware, ALLOWED_HOSTS=["*"], JWT_VERIFY_FAST_PATH=True):
+                        rps = self._run(Client(), headers, total, warmup)
+
+                    baseline = baseline or rps
+                    self.stdout.write(f"{label:<40} {rps:>10.0f} req/s  x{rps / baseline:.2f}")
+
+                transaction.set_rollback(True)
+        finally:
+            user_token_cache.ttl_seconds = original_ttl
+            user_token_cache.clear()
+
+    def _run(self, client, headers, total, warmup):
+        for _ in range(warmup):
+            client.get("/api/auth/verify/", **headers)
+
+        started = time.perf_counter()
+        for _ in range(total):
+            res = client.get("/api/auth/verify/", **headers)
+            if res.status_code != 200:
+                raise RuntimeError(f"verify returned {res.status_code}")
+        return total / (time.perf_counter() - started)
@@ -0,0 +1,91 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Report, per team, the import time and RSS growth of loading its urls module "
+        "(views and their dependencies). Each team is measured in a fresh interpreter."
+    )
+
+    # System checks walk every urlconf, which would defeat the measurement.
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("teams", nargs="*", help="Teams to profile (default: TEAM_APPS).")
+        parser.add_argument("--child", help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options["child"]:
+            self.stdout.write(json.dumps(self._measure(options["child"])))
+            return
+
+        teams = options["teams"] or settings.TEAM_APPS
+        manage_py = str(settings.BASE_DIR / "manage.py")
+
+        self.stdout.write(f"{'team':<10} {'import ms':>10} {'base RSS MB':>12} {'+RSS MB':>9}  status")
+        rows = []
+        for team in teams:
+            proc = subprocess.run(
+                [sys.executable, manage_py, "profile_startup", "--child", team],
+                capture_output=True,
+                text=True,
+            )
+            try:
+                row = json.loads(proc.stdout.strip().splitlines()[-1])
+            except (IndexError, ValueError):
+                row = {"team": team, "error": (proc.stderr.strip().splitlines() or ["no output"])[-1]}
+            rows.append(row)
+            self.stdout.write(self._format(row))
+
+        measured = [r for r in rows if "error" not in r]
+        if measured:
+            total_ms = sum(r["import_ms"] for r in measured)
+            total_mb = sum(r["rss_delta_mb"] or 0 for r in measured)
+            self.stdout.write(f"{'total':<10} {total_ms:>10.1f} {'':>12} {total_mb:>9.1f}")
+
+    def _measure(self, team):
+        rss_before = _rss_mb()
+        started = time.perf_counter()
+        try:
+            import_module(f"{team}.urls")
+        except Exception as e:
+            return {"team": team, "error": f"{type(e).__name__}: {e}"}
+        import_ms = (time.perf_counter() - started) * 1000
+        rss_after = _rss_mb()
+
+        return {
+            "team": team,
+            "import_ms": round(import_ms, 1),
+            "rss_before_mb": round(rss_before, 1) if rss_before is not None else None,
+            "rss_delta_mb": round(rss_after - rss_before, 1) if rss_before is not None else None,
+        }
+
+    def _format(self, row):
+        if "error" in row:
+            return f"{row['team']:<10} {'-':>10} {'-':>12} {'-':>9}  {row['error']}"
+        base = "-" if row["rss_before_mb"] is None else f"{row['rss_before_mb']:.1f}"
+        delta = "-" if row["rss_delta_mb"] is None else f"{row['rss_delta_mb']:.1f}"
+        return f"{row['team']:<10} {row['import_ms']:>10.1f} {base:>12} {delta:>9}  ok"
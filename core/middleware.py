@@ -1,11 +1,53 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.http import HttpResponse
 from django.utils.deprecation import MiddlewareMixin
 from jwt import ExpiredSignatureError, InvalidTokenError
 
 from core.jwt_utils import decode_token
+from core.token_cache import user_token_cache
 
 User = get_user_model()
 
+VERIFY_PATH = "/api/auth/verify/"
+
+
+def _get_token(request):
+    token = request.COOKIES.get("access_token")
+    if not token:
+        auth = request.headers.get("Authorization", "")
+        if auth.startswith("Bearer "):
+            token = auth.split(" ", 1)[1].strip()
+    return token
+
+
+def _authenticate_token(token):
+    """
+    Return (user, payload) for a valid, current access token, otherwise (None, None).
+    """
+    try:
+        payload = decode_token(token)
+    except (ExpiredSignatureError, InvalidTokenError):
+        return None, None
+
+    if payload.get("type") != "access":
+        return None, None
+
+    user_id = payload.get("sub")
+    tv = payload.get("tv")
+    user = user_token_cache.get(user_id, tv)
+    if user is None:
+        user = User.objects.filter(id=user_id, is_active=True).first()
+        if not user:
+            return None, None
+
+        if user.token_version != tv:
+            return None, None
+
+        user_token_cache.set(user)
+
+    return user, payload
+
 
 class JWTAuthenticationMiddleware(MiddlewareMixin):
     """
@@ -16,30 +58,48 @@ class JWTAuthenticationMiddleware(MiddlewareMixin):
         if hasattr(request, "user") and getattr(request.user, "is_authenticated", False):
             return
 
-        token = request.COOKIES.get("access_token")
+        token = _get_token(request)
         if not token:
-            auth = request.headers.get("Authorization", "")
-            if auth.startswith("Bearer "):
-                token = auth.split(" ", 1)[1].strip()
+            return
 
-        if not token:
+        user, payload = _authenticate_token(token)
+        if user is None:
             return
 
-        try:
-            payload = decode_token(token)
-            if payload.get("type") != "access":
-                return
+        request.user = user
+        request.jwt_payload = payload
+
 
-            user_id = payload.get("sub")
-            tv = payload.get("tv")
-            user = User.objects.filter(id=user_id, is_active=True).first()
-            if not user:
-                return
+class VerifyFastPathMiddleware(MiddlewareMixin):
+    """
+    Answers the gateway auth subrequest (/api/auth/verify/) before the rest of the stack runs.
 
-            if user.token_version != tv:
-                return
+    Must be first in MIDDLEWARE so sessions, CSRF, messages and the JWT middleware are skipped.
+    Only JWT-authenticated requests are answered here; anything carrying a session cookie
+    falls through to core.views.verify unchanged, where the session user wins over the JWT.
+    """
 
-            request.user = user
-            request.jwt_payload = payload
-        except (ExpiredSignatureError, InvalidTokenError):
-            return
+    ok_body = b'{"ok": true}'
+    denied_body = b'{"detail": "Authentication required"}'
+
+    def process_request(self, request):
+        if request.path_info != VERIFY_PATH or not getattr(settings, "JWT_VERIFY_FAST_PATH", True):
+            return None
+        if settings.SESSION_COOKIE_NAME in request.COOKIES:
+            return None
+
+        token = _get_token(request)
+        user = None
+        if token:
+            user, _ = _authenticate_token(token)
+
+        if user is None:
+            return HttpResponse(self.denied_body, status=401, content_type="application/json")
+
+        resp = HttpResponse(self.ok_body, content_type="application/json")
+        resp["X-User-Id"] = str(user.id)
+        resp["X-User-Email"] = user.email
+        resp["X-User-First-Name"] = user.first_name or ""
+        resp["X-User-Last-Name"] = user.last_name or ""
+        resp["X-User-Age"] = str(user.age or "")
+        return resp
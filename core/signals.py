@@ -0,0 +1,19 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.token_cache import user_token_cache
+
+User = get_user_model()
+
+
+# Any write to the user row (logout bumping token_version, admin deactivation,
+# profile edits) drops the cached copy so the next request re-reads it.
+@receiver(post_save, sender=User)
+def invalidate_cached_user_on_save(sender, instance, **kwargs):
+    user_token_cache.invalidate(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def invalidate_cached_user_on_delete(sender, instance, **kwargs):
+    user_token_cache.invalidate(instance.pk)
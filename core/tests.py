@@ -22,3 +22,165 @@ class AuthFlowTests(TestCase):
         # logout
         res3 = self.client.post("/api/auth/logout/", data="{}", content_type="application/json")
         self.assertEqual(res3.status_code, 200)
+
+
+class TokenCacheTests(TestCase):
+    def setUp(self):
+        from core.token_cache import user_token_cache
+
+        self.cache = user_token_cache
+        self.cache.clear()
+        self.user = User.objects.create_user(email="c@test.com", password="x-Strong-pass-99")
+
+    def _auth(self, user):
+        from core.jwt_utils import create_access_token
+
+        return {"HTTP_AUTHORIZATION": f"Bearer {create_access_token(user)}"}
+
+    def test_second_request_is_served_from_cache(self):
+        headers = self._auth(self.user)
+        self.assertEqual(self.client.get("/api/auth/me/", **headers).status_code, 200)
+
+        with self.assertNumQueries(0):
+            res = self.client.get("/api/auth/me/", **headers)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+    def test_logout_invalidates_cached_token(self):
+        headers = self._auth(self.user)
+        self.client.get("/api/auth/me/", **headers)
+
+        self.client.post("/api/auth/logout/", data="{}", content_type="application/json", **headers)
+        self.assertEqual(self.client.get("/api/auth/me/", **headers).status_code, 401)
+
+    def test_deactivation_invalidates_cached_token(self):
+        headers = self._auth(self.user)
+        self.client.get("/api/auth/me/", **headers)
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get("/api/auth/me/", **headers).status_code, 401)
+
+
+class VerifyFastPathTests(TestCase):
+    def setUp(self):
+        from core.token_cache import user_token_cache
+
+        user_token_cache.clear()
+        self.user = User.objects.create_user(email="v@test.com", password="x-Strong-pass-99", first_name="V", age=30)
+
+    def test_valid_token_returns_user_headers_without_queries(self):
+        from core.jwt_utils import create_access_token
+
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {create_access_token(self.user)}"}
+        self.client.get("/api/auth/verify/", **headers)
+
+        with self.assertNumQueries(0):
+            res = self.client.get("/api/auth/verify/", **headers)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json(), {"ok": True})
+        self.assertEqual(res["X-User-Id"], str(self.user.id))
+        self.assertEqual(res["X-User-Email"], "v@test.com")
+        self.assertEqual(res["X-User-First-Name"], "V")
+        self.assertEqual(res["X-User-Age"], "30")
+
+    def test_session_user_wins_over_jwt(self):
+        from core.jwt_utils import create_access_token
+
+        session_user = User.objects.create_user(email="s@test.com", password="x-Strong-pass-99", first_name="S")
+        self.client.force_login(session_user)
+        res = self.client.get("/api/auth/verify/", HTTP_AUTHORIZATION=f"Bearer {create_access_token(self.user)}")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res["X-User-Id"], str(session_user.id))
+        self.assertEqual(res["X-User-Email"], "s@test.com")
+
+    def test_missing_or_invalid_token_is_rejected(self):
+        self.assertEqual(self.client.get("/api/auth/verify/").status_code, 401)
+        res = self.client.get("/api/auth/verify/", HTTP_AUTHORIZATION="Bearer not-a-jwt")
+        self.assertEqual(res.status_code, 401)
+
+
+class MetricsEndpointTests(TestCase):
+    def _auth(self, **extra):
+        from core.jwt_utils import create_access_token
+
+        user = User.objects.create_user(email="m@test.com", password="x-Strong-pass-99", **extra)
+        return {"HTTP_AUTHORIZATION": f"Bearer {create_access_token(user)}"}
+
+    def test_requires_staff_or_metrics_token(self):
+        self.assertEqual(self.client.get("/api/metrics/").status_code, 401)
+        self.assertEqual(self.client.get("/api/metrics/", **self._auth()).status_code, 403)
+
+        with self.settings(METRICS_TOKEN="scrape-secret"):
+            res = self.client.get("/api/metrics/", HTTP_X_METRICS_TOKEN="wrong")
+            self.assertEqual(res.status_code, 401)
+            res = self.client.get("/api/metrics/", HTTP_X_METRICS_TOKEN="scrape-secret")
+            self.assertEqual(res.status_code, 200)
+
+        # an empty METRICS_TOKEN never matches
+        self.assertEqual(self.client.get("/api/metrics/", HTTP_X_METRICS_TOKEN="").status_code, 401)
+
+    def test_reports_token_cache_and_per_alias_connections(self):
+        from django.conf import settings
+
+        data = self.client.get("/api/metrics/", **self._auth(is_staff=True)).json()
+        self.assertIn("hits", data["token_cache"])
+        self.assertEqual(data["databases"]["default"]["apps"][0], "core")
+        for app in settings.TEAM_APPS:
+            self.assertEqual(data["databases"][app]["apps"], [app])
+            self.assertNotIn("conn_max_age", data["databases"][app])
+
+    def test_counts_opens_and_closes_without_patching_the_backend_class(self):
+        import os
+        import tempfile
+        from django.db import connections
+        from django.db.backends.base.base import BaseDatabaseWrapper
+        from core import db_metrics
+
+        self.assertEqual(BaseDatabaseWrapper.connect.__qualname__, "BaseDatabaseWrapper.connect")
+
+        wrapper = connections.create_connection("default")
+        # the in-memory test database ignores close(); use a throwaway file instead
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        wrapper.settings_dict = {**wrapper.settings_dict, "NAME": os.path.join(tmpdir.name, "metrics.sqlite3")}
+        before = db_metrics.snapshot()["default"]
+        wrapper.connect()
+        wrapper.close()
+        after = db_metrics.snapshot()["default"]
+        self.assertEqual((after["opened"], after["closed"]), (before["opened"] + 1, before["closed"] + 1))
+
+    def test_apps_follow_the_router(self):
+        from unittest import mock
+        from core import db_metrics
+
+        with mock.patch("core.db_metrics.router.db_for_read", return_value="default"):
+            routed = db_metrics._routed_apps()
+        self.assertEqual(routed["default"][0], "core")
+        self.assertTrue(all(apps == [] for alias, apps in routed.items() if alias != "default"))
+
+    def test_failed_connect_is_not_counted_as_opened(self):
+        from unittest import mock
+        from django.db import connections
+        from core import db_metrics
+
+        wrapper = connections.create_connection("default")
+        before = db_metrics.snapshot()["default"]["opened"]
+        with mock.patch.object(wrapper, "get_new_connection", side_effect=OSError("refused")):
+            with self.assertRaises(OSError):
+                wrapper.connect()
+        self.assertEqual(db_metrics.snapshot()["default"]["opened"], before)
+
+
+class LazyIncludeTests(TestCase):
+    def test_urlconf_is_imported_on_first_resolve(self):
+        from core.lazy_urls import lazy_include
+
+        resolver = lazy_include("core-lazy/", "core.urls")
+        self.assertFalse(resolver.loaded)
+        self.assertEqual(len(resolver.reverse_dict), 0)
+
+        match = resolver.resolve("core-lazy/health/")
+        self.assertTrue(resolver.loaded)
+        self.assertEqual(match.func.__name__, "health")
+        self.assertIn(match.func, resolver.reverse_dict)
@@ -0,0 +1,90 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+class UserTokenCache:
+    """
+    Process-local LRU of active users keyed by the JWT (sub, tv) pair.
+
+    Only one token_version is kept per user: a lookup with any other tv is a miss
+    and falls back to the database. Entries expire after ttl_seconds so that a
+    logout handled by another worker is honoured within that window.
+    """
+
+    def __init__(self, max_entries, ttl_seconds):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # sub -> (tv, expires_at, user)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, sub, tv):
+        if not self.enabled:
+            return None
+
+        sub = str(sub)
+        with self._lock:
+            entry = self._entries.get(sub)
+            if entry is None or entry[0] != tv or entry[1] < time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(sub)
+            self.hits += 1
+            user = entry[2]
+
+        # Hand out a copy so a view mutating request.user never touches the cached row.
+        return copy.copy(user)
+
+    def set(self, user):
+        if not self.enabled:
+            return
+
+        sub = str(user.id)
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._entries[sub] = (user.token_version, expires_at, copy.copy(user))
+            self._entries.move_to_end(sub)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, sub):
+        with self._lock:
+            if self._entries.pop(str(sub), None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.invalidations = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+user_token_cache = UserTokenCache(
+    max_entries=getattr(settings, "JWT_USER_CACHE_MAX_ENTRIES", 10000),
+    ttl_seconds=getattr(settings, "JWT_USER_CACHE_TTL_SECONDS", 30),
+)
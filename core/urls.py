@@ -9,4 +9,5 @@ urlpatterns = [
     path("auth/me/", views.me),
     path("auth/verify/", views.verify),
     path("health/", views.health),
+    path("metrics/", views.metrics),
 ]
\ No newline at end of file
@@ -8,7 +8,9 @@ from django.core.exceptions import ValidationError
 from django.contrib.auth.password_validation import validate_password
 
 from core.jwt_utils import create_access_token, create_refresh_token, decode_token
-from core.auth import api_login_required
+from core import db_metrics
+from core.auth import api_login_required, staff_or_metrics_token_required
+from core.token_cache import user_token_cache
 
 User = get_user_model()
 
@@ -43,6 +45,11 @@ def health(request):
     return JsonResponse({"status": "ok"})
 
 
+@staff_or_metrics_token_required
+def metrics(request):
+    return JsonResponse({"token_cache": user_token_cache.stats(), "databases": db_metrics.snapshot()})
+
+
 @csrf_exempt
 @require_POST
 def signup_api(request):
@@ -1,5 +1,6 @@
 import os
 from celery import Celery
+from celery.signals import worker_ready
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app404.settings')
 
@@ -10,3 +11,10 @@ app.conf.include = [
     'team2.tasks.tasks',
     'team2.tasks.indexing',
 ]
+
+
+@worker_ready.connect
+def index_articles_on_startup(sender, **kwargs):
+    # Once per worker start, not in every web/management process that loads the app registry.
+    from team2.tasks.indexing import index_all_articles
+    index_all_articles.apply_async(countdown=15, ignore_result=True)
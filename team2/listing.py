@@ -0,0 +1,110 @@
+"""
+Projection queries and cursor pagination for the lightweight listing endpoints.
+
+Rows come straight from QuerySet.values() over the requested fields, so listings
+never load version content or run per-row tag queries.
+"""
+import base64
+import binascii
+import json
+
+from django.utils.dateparse import parse_datetime
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Public field name -> ORM lookup.
+ARTICLE_FIELDS = {
+    "name": "name",
+    "creator_id": "creator_id",
+    "score": "score",
+    "created_at": "created_at",
+    "updated_at": "updated_at",
+    "current_version": "current_version_id",
+    "summary": "current_version__summary",
+}
+DEFAULT_ARTICLE_FIELDS = ["name", "current_version", "summary", "score", "updated_at"]
+
+VERSION_FIELDS = {
+    "name": "name",
+    "summary": "summary",
+    "editor_id": "editor_id",
+    "created_at": "created_at",
+    "updated_at": "updated_at",
+}
+DEFAULT_VERSION_FIELDS = list(VERSION_FIELDS)
+
+
+class ListingError(ValueError):
+    pass
+
+
+def is_listing_request(request):
+    return any(param in request.GET for param in ("fields", "cursor", "limit"))
+
+
+def parse_fields(request, allowed, default):
+    raw = request.GET.get("fields", "").strip()
+    if not raw:
+        return list(default)
+    fields = [field.strip() for field in raw.split(",") if field.strip()]
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ListingError(f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(allowed)}.")
+    return fields
+
+
+def parse_limit(request):
+    try:
+        limit = int(request.GET.get("limit", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ListingError("limit must be an integer.")
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values, default=str).encode()).decode().rstrip("=")
+
+
+def decode_cursor(request, keys):
+    """
+    The cursor from the request as a dict with exactly `keys`, all string values, or None.
+    """
+    token = request.GET.get("cursor")
+    if not token:
+        return None
+    try:
+        cursor = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ListingError("Invalid cursor.")
+    if not isinstance(cursor, dict) or set(cursor) != set(keys):
+        raise ListingError("Invalid cursor.")
+    if not all(isinstance(value, str) for value in cursor.values()):
+        raise ListingError("Invalid cursor.")
+    return cursor
+
+
+def project(queryset, fields, field_map, limit, key):
+    """
+    Evaluate one page of `queryset` (already ordered and keyset-filtered) as dicts of `fields`.
+
+    `key` lists the ORM lookups the next cursor is built from. Returns the response body.
+    """
+    lookups = {field_map[field] for field in fields} | set(key)
+    rows = list(queryset.values(*lookups)[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "results": [{field: row[field_map[field]] for field in fields} for row in rows],
+        "next_cursor": encode_cursor({lookup: rows[-1][lookup] for lookup in key}) if has_more else None,
+    }
+
+
+def cursor_datetime(cursor, name):
+    try:
+        value = parse_datetime(cursor[name])
+    except ValueError:
+        value = None
+    if value is None:
+        raise ListingError("Invalid cursor.")
+    return value
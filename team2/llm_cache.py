@@ -0,0 +1,79 @@
+"""
+Content-hash cache for the Gemini tagging and summarization tasks.
+"""
+import hashlib
+
+from django.db import IntegrityError
+from django.db.models import Count
+
+from .local_search import normalize
+from .models import LLMResult, Tag
+
+MODEL_NAME = "gemini-2.5-flash"
+
+# Most tags the tagging prompt lists; see tag_shortlist().
+TAG_SHORTLIST_SIZE = 40
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def get(kind, text):
+    row = LLMResult.objects.filter(content_hash=content_hash(text), kind=kind, model_name=MODEL_NAME).first()
+    return None if row is None else row.result
+
+
+def put(kind, text, result):
+    try:
+        LLMResult.objects.update_or_create(
+            content_hash=content_hash(text), kind=kind, model_name=MODEL_NAME, defaults={"result": result}
+        )
+    except IntegrityError:
+        # A concurrent task stored the same content first; either result will do.
+        pass
+
+
+def apply_tags(version, tag_names):
+    tags = [Tag.objects.get_or_create(name=name)[0] for name in tag_names]
+    version.tags.add(*tags)
+
+
+def apply_cached(version):
+    """
+    Copy cached tags and summary onto a version being published.
+
+    Returns the kinds that were applied, so the caller only runs the tasks still needed.
+    """
+    text = version.content
+    rows = LLMResult.objects.filter(content_hash=content_hash(text), model_name=MODEL_NAME)
+    applied = set()
+    for row in rows:
+        if row.kind == LLMResult.KIND_TAGS:
+            apply_tags(version, row.result)
+        elif row.kind == LLMResult.KIND_SUMMARY:
+            version.summary = row.result
+            version.save(update_fields=["summary"])
+        applied.add(row.kind)
+    return applied
+
+
+def tag_shortlist(text, size=TAG_SHORTLIST_SIZE):
+    """
+    Existing tags worth offering the model for this text, instead of the whole Tag table.
+
+    Tags whose name occurs in the text come first, then the most used tags fill the
+    remaining slots.
+    """
+    haystack = normalize(text)
+    names = list(
+        Tag.objects.annotate(uses=Count("versions")).order_by("-uses", "name").values_list("name", flat=True)
+    )
+    mentioned = [name for name in names if normalize(name) in haystack]
+    shortlist = mentioned[:size]
+    for name in names:
+        if len(shortlist) >= size:
+            break
+        if name not in shortlist:
+            shortlist.append(name)
+    return shortlist
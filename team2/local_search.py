@@ -0,0 +1,213 @@
+"""
+In-process fallback for article search while Elasticsearch is down or slow.
+
+LocalSearchIndex is an inverted index over the same documents the indexer sends to
+Elasticsearch (current version content, summary and tags of each article). It scores
+with BM25 per field and combines fields like the ES multi_match query does
+(best_fields: the highest boosted field score wins). Fuzzy matching is not emulated.
+"""
+import logging
+import math
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Article
+from .tasks import indexing
+
+logger = logging.getLogger(__name__)
+
+# Same boosts as search_articles_semantic's multi_match.
+FIELD_BOOSTS = {"content": 1.0, "summary": 2.0, "tags": 3.0}
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_PERSIAN_CHARS = str.maketrans({
+    "\u064a": "\u06cc",  # Arabic yeh -> Persian yeh
+    "\u0649": "\u06cc",  # alef maksura
+    "\u0643": "\u06a9",  # Arabic kaf -> Persian kaf
+    "\u0629": "\u0647",  # teh marbuta
+    "\u06c0": "\u0647",  # heh with yeh above
+    "\u0623": "\u0627",  # alef with hamza above
+    "\u0625": "\u0627",  # alef with hamza below
+    "\u0671": "\u0627",  # alef wasla
+    "\u0624": "\u0648",  # waw with hamza
+    "\u200c": "",  # ZWNJ: half-spaced and joined spellings are the same word
+    "\u200d": "",  # ZWJ
+    "\u0640": "",  # tatweel
+    **{chr(0x06F0 + d): str(d) for d in range(10)},  # Persian digits
+    **{chr(0x0660 + d): str(d) for d in range(10)},  # Arabic-Indic digits
+})
+_DIACRITICS = re.compile("[\u064b-\u065f\u0670]")
+_TOKEN = re.compile(r"\w+")
+
+
+def normalize(text):
+    return _DIACRITICS.sub("", text.translate(_PERSIAN_CHARS)).lower()
+
+
+def tokenize(text):
+    return _TOKEN.findall(normalize(text))
+
+
+class LocalSearchIndex:
+    """
+    Thread-safe BM25 index keyed by article name.
+
+    upsert()/remove() keep it current one article at a time; sync() pulls articles changed
+    in the database since the last sync and rebuilds fully every rebuild_seconds. A full
+    rebuild fills a separate index and swaps it in, so searches never see a half-built one.
+
+    Changes are found by Article/Version updated_at; team2.signals bumps Version.updated_at
+    on tag changes and removes deleted articles from this process's index. Articles deleted
+    by another process stay searchable here until the next full rebuild.
+    """
+
+    def __init__(self, rebuild_seconds=600):
+        self.rebuild_seconds = rebuild_seconds
+        self._lock = threading.Lock()
+        # One sync at a time; a second caller waits and then only picks up what is newer.
+        self._sync_lock = threading.Lock()
+        self._clear()
+        self._built_at = None
+        self._synced_at = None
+
+    def _clear(self):
+        self._docs = {}
+        self._postings = {field: defaultdict(dict) for field in FIELD_BOOSTS}
+        self._lengths = {field: {} for field in FIELD_BOOSTS}
+        self._terms = {field: {} for field in FIELD_BOOSTS}
+        self._total_length = dict.fromkeys(FIELD_BOOSTS, 0)
+
+    def __len__(self):
+        return len(self._docs)
+
+    def _remove(self, article_name):
+        if self._docs.pop(article_name, None) is None:
+            return
+        for field, postings in self._postings.items():
+            self._total_length[field] -= self._lengths[field].pop(article_name)
+            for term in self._terms[field].pop(article_name):
+                del postings[term][article_name]
+                if not postings[term]:
+                    del postings[term]
+
+    def upsert(self, document):
+        name = document["article_name"]
+        fields = {
+            "content": tokenize(document["content"]),
+            "summary": tokenize(document["summary"]),
+            "tags": tokenize(" ".join(document["tags"])),
+        }
+        with self._lock:
+            self._remove(name)
+            self._docs[name] = {
+                "version_name": document["version_name"],
+                "summary": document["summary"],
+                "tags": list(document["tags"]),
+            }
+            for field, tokens in fields.items():
+                counts = Counter(tokens)
+                self._lengths[field][name] = len(tokens)
+                self._total_length[field] += len(tokens)
+                self._terms[field][name] = list(counts)
+                for term, tf in counts.items():
+                    self._postings[field][term][name] = tf
+
+    def remove(self, article_name):
+        with self._lock:
+            self._remove(article_name)
+
+    def sync(self):
+        """
+        Bring the index up to date with the database, fully or incrementally.
+        """
+        with self._sync_lock:
+            started = timezone.now()
+            if self._built_at is None or (started - self._built_at).total_seconds() >= self.rebuild_seconds:
+                fresh = LocalSearchIndex(self.rebuild_seconds)
+                for batch in indexing.iter_document_batches(500):
+                    for action in batch:
+                        fresh.upsert(action["_source"])
+                with self._lock:
+                    self._docs, self._postings = fresh._docs, fresh._postings
+                    self._lengths, self._terms = fresh._lengths, fresh._terms
+                    self._total_length = fresh._total_length
+                self._built_at = self._synced_at = started
+                return
+
+            changed = Article.objects.filter(
+                Q(updated_at__gte=self._synced_at) | Q(current_version__updated_at__gte=self._synced_at)
+            )
+            for batch in indexing.iter_document_batches(500, articles=changed):
+                for action in batch:
+                    self.upsert(action["_source"])
+            for name in changed.filter(current_version__isnull=True).values_list("name", flat=True):
+                self.remove(name)
+            self._synced_at = started
+
+    def search(self, query, size=10):
+        terms = tokenize(query)
+        with self._lock:
+            doc_count = len(self._docs)
+            if not terms or not doc_count:
+                return []
+
+            best = {}
+            for field, boost in FIELD_BOOSTS.items():
+                postings = self._postings[field]
+                lengths = self._lengths[field]
+                avg_length = self._total_length[field] / doc_count or 1.0
+                field_scores = defaultdict(float)
+                for term in terms:
+                    docs = postings.get(term)
+                    if not docs:
+                        continue
+                    idf = math.log(1 + (doc_count - len(docs) + 0.5) / (len(docs) + 0.5))
+                    for name, tf in docs.items():
+                        norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[name] / avg_length)
+                        field_scores[name] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+                for name, score in field_scores.items():
+                    best[name] = max(best.get(name, 0.0), boost * score)
+
+            ranked = sorted(best.items(), key=lambda item: (-item[1], item[0]))[:size]
+            return [
+                {
+                    "article_name": name,
+                    "version_name": self._docs[name]["version_name"],
+                    "score": round(score, 4),
+                    "summary": self._docs[name]["summary"],
+                    "tags": self._docs[name]["tags"],
+                }
+                for name, score in ranked
+            ]
+
+
+local_index = LocalSearchIndex(getattr(settings, "TEAM2_LOCAL_SEARCH_REBUILD_SECONDS", 600))
+
+_es_down_until = 0.0
+
+
+def search(query, size=10):
+    """
+    Search Elasticsearch, or the local index while it is failing.
+
+    Returns (results, backend). After a failure or timeout ES is skipped for
+    TEAM2_SEARCH_RETRY_SECONDS so requests don't each wait out the timeout.
+    """
+    global _es_down_until
+    if time.monotonic() >= _es_down_until:
+        try:
+            return indexing.search_articles_semantic(query, size=size), "elasticsearch"
+        except Exception as exc:
+            _es_down_until = time.monotonic() + getattr(settings, "TEAM2_SEARCH_RETRY_SECONDS", 30)
+            logger.warning("Elasticsearch search failed, serving from the local index: %s", exc)
+
+    local_index.sync()
+    return local_index.search(query, size=size), "local"
@@ -0,0 +1,76 @@
+import threading
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connections, router, transaction
+from django.db.utils import OperationalError
+
+from team2 import votes
+from team2.models import Article, Vote
+
+
+def _read_modify_save_vote(article_name, user_id, value):
+    """
+    The previous vote implementation, kept here as the baseline.
+    """
+    article = Article.objects.get(name=article_name)
+    with transaction.atomic(using=router.db_for_write(Vote)):
+        Vote.objects.create(user_id=user_id, article=article, value=value)
+        article.score += value
+        article.save()
+
+
+def _atomic_vote(article_name, user_id, value):
+    votes.cast_vote(Article.objects.get(name=article_name), user_id, value)
+
+
+class Command(BaseCommand):
+    help = "Cast votes on one article from parallel threads and check the final score against the Vote rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--voters", type=int, default=400)
+        parser.add_argument("--threads", type=int, default=8)
+
+    def handle(self, *args, **options):
+        runs = [
+            ("before: read-modify-save", _read_modify_save_vote),
+            ("after: atomic F() update", _atomic_vote),
+        ]
+        for label, cast in runs:
+            article = Article.objects.create(name=f"bench-votes-{uuid.uuid4().hex[:8]}", creator_id=uuid.uuid4())
+            try:
+                elapsed, errors = self._run(cast, article.name, options["voters"], options["threads"])
+                article.refresh_from_db()
+                expected = sum(Vote.objects.filter(article=article).values_list("value", flat=True))
+                status = "ok" if article.score == expected else f"LOST {expected - article.score} updates"
+                self.stdout.write(
+                    f"{label:<28} {options['voters'] / elapsed:>8.0f} votes/s  "
+                    f"score={article.score} votes={expected} errors={errors}  {status}"
+                )
+            finally:
+                article.delete()
+
+    def _run(self, cast, article_name, voters, threads):
+        errors = [0]
+        lock = threading.Lock()
+        per_thread = [voters // threads + (i < voters % threads) for i in range(threads)]
+
+        def worker(count):
+            try:
+                for _ in range(count):
+                    try:
+                        cast(article_name, uuid.uuid4(), 1)
+                    except OperationalError:
+                        with lock:
+                            errors[0] += 1
+            finally:
+                connections.close_all()
+
+        workers = [threading.Thread(target=worker, args=(count,)) for count in per_thread]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        return time.perf_counter() - started, errors[0]
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from team2.tasks.indexing import INDEX_NAME, ReindexInProgress, bulk_reindex
+
+
+class Command(BaseCommand):
+    help = "Rebuild the article search index into a fresh index and swap the alias to it."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, help="Articles per bulk request (TEAM2_REINDEX_BATCH_SIZE).")
+        parser.add_argument("--parallelism", type=int, help="Bulk requests in flight (TEAM2_REINDEX_PARALLELISM).")
+        parser.add_argument("--alias", default=INDEX_NAME)
+
+    def handle(self, *args, **options):
+        try:
+            stats = bulk_reindex(
+                batch_size=options["batch_size"],
+                parallelism=options["parallelism"],
+                alias=options["alias"],
+            )
+        except ReindexInProgress:
+            raise CommandError(f"A reindex of {options['alias']} is already running.")
+        self.stdout.write(
+            f"{stats['indexed']} articles indexed into {stats['index']} in {stats['seconds']:.2f}s "
+            f"({stats['docs_per_sec']:.1f} docs/sec), {stats['replayed']} re-indexed after changes, "
+            f"{stats['failed']} failed; "
+            f"alias {options['alias']} -> {stats['index']}"
+        )
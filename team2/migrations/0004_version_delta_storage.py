@@ -0,0 +1,37 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team2', '0003_publishrequest'),
+    ]
+
+    operations = [
+        # The text column keeps its name; only the model field is renamed.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RenameField(
+                    model_name='version',
+                    old_name='content',
+                    new_name='stored_content',
+                ),
+                migrations.AlterField(
+                    model_name='version',
+                    name='stored_content',
+                    field=models.TextField(blank=True, db_column='content', default=''),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='version',
+            name='delta_base',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.RESTRICT, related_name='delta_children', to='team2.version'),
+        ),
+        migrations.AddField(
+            model_name='version',
+            name='delta_depth',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
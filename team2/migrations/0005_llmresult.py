@@ -0,0 +1,28 @@
+# Generated by Django 4.2.27 on 2026-10-18 04:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team2', '0004_version_delta_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LLMResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64)),
+                ('kind', models.CharField(choices=[('tags', 'Tags'), ('summary', 'Summary')], max_length=10)),
+                ('model_name', models.CharField(max_length=64)),
+                ('result', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('content_hash', 'kind', 'model_name')},
+            },
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
 
+from . import versioning
+
 
 class Tag(models.Model):
     name = models.CharField(max_length=255, primary_key=True)
@@ -27,7 +29,10 @@ class Article(models.Model):
 class Version(models.Model):
     name = models.CharField(max_length=255, primary_key=True)
     article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='versions')
-    content = models.TextField(blank=True, default='')
+    # Full text for snapshots, a line delta against delta_base otherwise; read it through `content`.
+    stored_content = models.TextField(blank=True, default='', db_column='content')
+    delta_base = models.ForeignKey('self', on_delete=models.RESTRICT, null=True, blank=True, related_name='delta_children')
+    delta_depth = models.PositiveSmallIntegerField(default=0)
     summary = models.TextField(blank=True, default='')
     editor_id = models.UUIDField()
     tags = models.ManyToManyField(Tag, blank=True, related_name='versions')
@@ -35,9 +40,38 @@ class Version(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     deleted_at = models.DateTimeField(null=True, blank=True)
 
+    _content = None
+    _content_changed = False
+
     def __str__(self):
         return self.name
 
+    @property
+    def content(self):
+        if self._content is None:
+            self._content = versioning.read_content(self)
+        return self._content
+
+    @content.setter
+    def content(self, value):
+        self._content = value
+        self._content_changed = True
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._content = None
+        self._content_changed = False
+
+    def save(self, *args, **kwargs):
+        if not self._content_changed:
+            return super().save(*args, **kwargs)
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'stored_content', 'delta_base', 'delta_depth'}
+        versioning.save_with_content(self, lambda: super(Version, self).save(*args, **kwargs), self._content)
+        self._content_changed = False
+
 
 class PublishRequest(models.Model):
     STATUS_CHOICES = [
@@ -74,3 +108,31 @@ class Vote(models.Model):
 
     def __str__(self):
         return f"{self.user_id} -> {self.article_id}: {self.value}"
+
+
+class LLMResult(models.Model):
+    """
+    Gemini output for a piece of content, keyed by a hash of the text.
+
+    Publishing a version whose content was already tagged or summarized reuses the
+    stored result instead of calling the model again.
+    """
+    KIND_TAGS = 'tags'
+    KIND_SUMMARY = 'summary'
+    KIND_CHOICES = [
+        (KIND_TAGS, 'Tags'),
+        (KIND_SUMMARY, 'Summary'),
+    ]
+
+    content_hash = models.CharField(max_length=64)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    model_name = models.CharField(max_length=64)
+    result = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('content_hash', 'kind', 'model_name')
+
+    def __str__(self):
+        return f"{self.kind}:{self.content_hash[:12]}"
@@ -9,6 +9,7 @@ class TagSerializer(serializers.ModelSerializer):
 
 
 class VersionSerializer(serializers.ModelSerializer):
+    content = serializers.CharField(required=False, allow_blank=True)
     tags = TagSerializer(many=True, read_only=True)
 
     class Meta:
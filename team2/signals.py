@@ -0,0 +1,24 @@
+from django.db.models.signals import m2m_changed, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import local_search
+from .models import Article, Version
+
+
+@receiver(m2m_changed, sender=Version.tags.through)
+def touch_version_on_tag_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Tag edits don't save the version row; bump updated_at so incremental syncs in every
+    process see them.
+    """
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    versions = pk_set if reverse else [instance.pk]
+    if versions:
+        Version.objects.filter(pk__in=versions).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Article)
+def drop_deleted_article(sender, instance, **kwargs):
+    local_search.local_index.remove(instance.name)
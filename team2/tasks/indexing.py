@@ -1,7 +1,14 @@
 import logging
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 from celery import shared_task
 from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+from team2 import versioning
 from team2.models import Article, Version
 
 logger = logging.getLogger(__name__)
@@ -35,31 +42,188 @@ def index_article_version(self, results, version_name):
         raise self.retry(exc=exc)
 
 
+def _document(article):
+    version = article.current_version
+    return {
+        "article_name": article.name,
+        "version_name": version.name,
+        "content": version.content,
+        "summary": version.summary,
+        "tags": [tag.name for tag in version.tags.all()],
+    }
+
+
+def iter_document_batches(batch_size, articles=None):
+    """
+    Yield lists of bulk actions for every published article (or those in the `articles`
+    queryset), batch_size articles at a time.
+
+    Articles are paged by primary key, so memory stays flat however many there are; each
+    page costs one query for the articles, one for their tags and one per delta level
+    to rebuild version content.
+    """
+    published = (Article.objects if articles is None else articles).filter(
+        current_version__isnull=False
+    ).order_by("name")
+    last_name = None
+    while True:
+        page = published if last_name is None else published.filter(name__gt=last_name)
+        articles = list(
+            page.select_related("current_version").prefetch_related("current_version__tags")[:batch_size]
+        )
+        if not articles:
+            return
+        versioning.prefetch_content([article.current_version for article in articles])
+        yield [{"_id": article.name, "_source": _document(article)} for article in articles]
+        last_name = articles[-1].name
+
+
+class ReindexInProgress(Exception):
+    """Another bulk_reindex holds the lock for this alias."""
+
+
+def _acquire_lock(alias):
+    """
+    Take the per-alias reindex lock in the Django cache; returns its token, or None if held.
+
+    Only serializes across processes when CACHE_URL points at a shared cache (e.g. redis).
+    """
+    token = uuid.uuid4().hex
+    timeout = getattr(settings, "TEAM2_REINDEX_LOCK_SECONDS", 60 * 60)
+    return token if cache.add(f"team2:reindex-lock:{alias}", token, timeout) else None
+
+
+def _release_lock(alias, token):
+    key = f"team2:reindex-lock:{alias}"
+    if cache.get(key) == token:
+        cache.delete(key)
+
+
+def _index_changed_since(es, index, since, batch_size):
+    """
+    Bulk-index published articles whose article or current version row changed at or after `since`.
+    """
+    from elasticsearch import helpers
+
+    changed = Article.objects.filter(Q(updated_at__gte=since) | Q(current_version__updated_at__gte=since))
+    indexed = failed = 0
+    for actions in iter_document_batches(batch_size, articles=changed):
+        ok, errors = helpers.bulk(
+            es, actions, index=index, chunk_size=batch_size, raise_on_error=False, stats_only=True
+        )
+        indexed, failed = indexed + ok, failed + errors
+    return indexed, failed
+
+
+def _swap_alias(es, alias, new_index):
+    """
+    Point `alias` at new_index in one atomic call and drop the indices it pointed to before.
+
+    A concrete index that still carries the alias name (created before aliases were used)
+    is removed in the same call, so searches never see a missing index.
+    """
+    actions = [{"add": {"index": new_index, "alias": alias}}]
+    if es.indices.exists_alias(name=alias):
+        old_indices = [name for name in es.indices.get_alias(name=alias) if name != new_index]
+        actions += [{"remove": {"index": name, "alias": alias}} for name in old_indices]
+    else:
+        old_indices = []
+        if es.indices.exists(index=alias):
+            actions.append({"remove_index": {"index": alias}})
+
+    es.indices.update_aliases(actions=actions)
+    for name in old_indices:
+        es.indices.delete(index=name, ignore_unavailable=True)
+
+
+def bulk_reindex(es=None, batch_size=None, parallelism=None, alias=INDEX_NAME):
+    """
+    Rebuild the search index from the database into a fresh index, then swap `alias` over to it.
+
+    Documents go through the bulk API, batch_size per request with up to `parallelism`
+    requests in flight. The database is read on the calling thread only; worker threads
+    just talk to Elasticsearch. Articles published while the copy ran are indexed again
+    before and after the swap, so writes that went to the old index are not lost.
+
+    Only one reindex per alias runs at a time (ReindexInProgress otherwise); a failed
+    run deletes its half-built index. Returns counts and throughput.
+    """
+    from elasticsearch import helpers
+
+    es = es or _get_es()
+    batch_size = batch_size or getattr(settings, "TEAM2_REINDEX_BATCH_SIZE", 500)
+    parallelism = max(1, parallelism or getattr(settings, "TEAM2_REINDEX_PARALLELISM", 2))
+
+    token = _acquire_lock(alias)
+    if token is None:
+        raise ReindexInProgress(alias)
+
+    new_index = f"{alias}-{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:6]}"
+    try:
+        es.indices.create(index=new_index)
+
+        copy_started_at = timezone.now()
+        started = time.perf_counter()
+        indexed = failed = 0
+        with ThreadPoolExecutor(max_workers=parallelism) as pool:
+            in_flight = set()
+            for actions in iter_document_batches(batch_size):
+                if len(in_flight) >= parallelism:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        ok, errors = future.result()
+                        indexed, failed = indexed + ok, failed + errors
+                in_flight.add(pool.submit(
+                    helpers.bulk, es, actions, index=new_index, chunk_size=batch_size,
+                    raise_on_error=False, stats_only=True,
+                ))
+            for future in in_flight:
+                ok, errors = future.result()
+                indexed, failed = indexed + ok, failed + errors
+
+        # index_article_version writes through the alias, i.e. into the old index, until the swap.
+        replay_started_at = timezone.now()
+        replayed, replay_failed = _index_changed_since(es, new_index, copy_started_at, batch_size)
+        es.indices.refresh(index=new_index)
+        _swap_alias(es, alias, new_index)
+    except Exception:
+        es.indices.delete(index=new_index, ignore_unavailable=True)
+        _release_lock(alias, token)
+        raise
+
+    try:
+        more, more_failed = _index_changed_since(es, alias, replay_started_at, batch_size)
+    finally:
+        _release_lock(alias, token)
+
+    seconds = time.perf_counter() - started
+    return {
+        "index": new_index,
+        "indexed": indexed,
+        "failed": failed + replay_failed + more_failed,
+        "replayed": replayed + more,
+        "seconds": round(seconds, 3),
+        "docs_per_sec": round(indexed / seconds, 1) if seconds else 0.0,
+    }
+
+
 @shared_task(bind=True, max_retries=1, default_retry_delay=30)
 def index_all_articles(self):
-    es = _get_es()
-    articles = Article.objects.filter(
-        current_version__isnull=False
-    ).select_related('current_version')
-
-    indexed = 0
-    for article in articles:
-        version = article.current_version
-        body = {
-            "article_name": article.name,
-            "version_name": version.name,
-            "content": version.content,
-            "summary": version.summary,
-            "tags": [tag.name for tag in version.tags.all()],
-        }
-        try:
-            es.index(index=INDEX_NAME, id=article.name, document=body)
-            indexed += 1
-        except Exception:
-            logger.exception("Failed to index article %s", article.name)
-
-    logger.info("Startup indexing complete: %d articles indexed.", indexed)
-    return indexed
+    try:
+        stats = bulk_reindex()
+    except ReindexInProgress:
+        logger.info("Skipping startup indexing: another reindex of %s is running.", INDEX_NAME)
+        return 0
+    except Exception as exc:
+        raise self.retry(exc=exc)
+
+    if stats["failed"]:
+        logger.warning("%d articles failed to index into %s.", stats["failed"], stats["index"])
+    logger.info(
+        "Startup indexing complete: %d articles indexed into %s (%.1f docs/sec).",
+        stats["indexed"], stats["index"], stats["docs_per_sec"],
+    )
+    return stats["indexed"]
 
 
 def search_articles_semantic(query, size=10):
@@ -74,7 +238,8 @@ def search_articles_semantic(query, size=10):
         "size": size
     }
 
-    resp = _get_es().search(index=INDEX_NAME, body=search_body)
+    timeout = getattr(settings, "TEAM2_SEARCH_TIMEOUT_SECONDS", 2.0)
+    resp = _get_es().options(request_timeout=timeout, max_retries=0).search(index=INDEX_NAME, body=search_body)
     results = []
 
     for hit in resp["hits"]["hits"]:
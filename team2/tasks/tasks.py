@@ -6,10 +6,10 @@ import sys
 
 from celery import shared_task
 from django.conf import settings
-from team2.models import Article, Tag, Version
-from team2.models import Article, Version
+from team2 import llm_cache
+from team2.models import Article, LLMResult, Tag
 
-MODEL_NAME = "gemini-2.5-flash"
+MODEL_NAME = llm_cache.MODEL_NAME
 _CLIENT = None
 
 
@@ -23,15 +23,19 @@ def _get_client():
 
 @shared_task(bind=True, max_retries=2, default_retry_delay=10)
 def tag_article(self, article_name):
-    article = Article.objects.get(name=article_name)
-    version_name = article.current_version
-    if version_name is None:
+    article = Article.objects.select_related("current_version").get(name=article_name)
+    version = article.current_version
+    if version is None:
         return None
 
-    version = Version.objects.get(name=version_name)
     content = version.content
 
-    existing_tags = list(Tag.objects.values_list("name", flat=True))
+    cached = llm_cache.get(LLMResult.KIND_TAGS, content)
+    if cached is not None:
+        llm_cache.apply_tags(version, cached)
+        return {"selected_existing_tags": cached, "new_tags": []}
+
+    existing_tags = llm_cache.tag_shortlist(content)
 
     prompt = f"""You are a content classification assistant. Your ONLY output must be a single valid JSON object with no extra text, no markdown fences, no explanation.
 
@@ -62,16 +66,21 @@ ARTICLE:
     except Exception as exc:
         raise self.retry(exc=exc)
 
+    applied = []
     for tag_name in selected_existing:
         try:
             tag = Tag.objects.get(name=tag_name)
             version.tags.add(tag)
+            applied.append(tag.name)
         except Tag.DoesNotExist:
             continue
 
     for tag_name in new_tags:
         tag, _ = Tag.objects.get_or_create(name=tag_name.lower())
         version.tags.add(tag)
+        applied.append(tag.name)
+
+    llm_cache.put(LLMResult.KIND_TAGS, content, applied)
 
     return {
         "selected_existing_tags": selected_existing,
@@ -81,15 +90,20 @@ ARTICLE:
 
 @shared_task(bind=True, max_retries=2, default_retry_delay=10)
 def summarize_article(self, article_name):
-    article = Article.objects.get(name=article_name)
-    version_name = article.current_version
+    article = Article.objects.select_related("current_version").get(name=article_name)
+    version = article.current_version
 
-    if version_name is None:
+    if version is None:
         return
 
-    version = Version.objects.get(name=version_name)
     content = version.content
 
+    cached = llm_cache.get(LLMResult.KIND_SUMMARY, content)
+    if cached is not None:
+        version.summary = cached
+        version.save(update_fields=["summary"])
+        return cached
+
     prompt = f"""
 You are an assistant that writes concise, neutral summaries.
 
@@ -109,6 +123,7 @@ ARTICLE:
         raise self.retry(exc=exc)
 
     summary = response.text.strip()
+    llm_cache.put(LLMResult.KIND_SUMMARY, content, summary)
 
     version.summary = summary
     version.save(update_fields=["summary"])
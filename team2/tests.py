@@ -1,6 +1,580 @@
+import base64
+import io
+import json
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import urlsplit
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
 
+from core.jwt_utils import create_access_token
+
+from . import listing, llm_cache, local_search, versioning
+from .models import Article, LLMResult, Tag, Version
+from .tasks.tasks import summarize_article, tag_article
+from .tasks import indexing
+
+
 class TeamPingTests(TestCase):
     def test_ping_requires_auth(self):
         res = self.client.get("/team2/ping/")
         self.assertEqual(res.status_code, 401)
+
+
+def _article_text(paragraphs):
+    return "".join(f"## Section {i}\n{text}\n\n" for i, text in enumerate(paragraphs))
+
+
+class VersionDeltaStorageTests(TestCase):
+    databases = {"default", "team2"}
+
+    def setUp(self):
+        self.editor = uuid.uuid4()
+        self.article = Article.objects.create(name="tehran", creator_id=self.editor)
+        self.base_text = _article_text(f"paragraph {i} " * 20 for i in range(30))
+
+    def _copy(self, source, name, text):
+        return Version.objects.create(
+            name=name, article=self.article, content=text, delta_base=source, editor_id=self.editor
+        )
+
+    def test_delta_round_trip(self):
+        edited = self.base_text.replace("paragraph 7 ", "edited 7 ", 3) + "new tail"
+        delta = versioning.make_delta(self.base_text, edited)
+        self.assertLess(len(delta), len(edited) // 4)
+        self.assertEqual(versioning.apply_delta(self.base_text, delta), edited)
+
+    def test_copies_store_deltas_and_chains_are_bounded(self):
+        previous = Version.objects.create(
+            name="v0", article=self.article, content=self.base_text, editor_id=self.editor
+        )
+        texts = {"v0": self.base_text}
+        for i in range(1, 2 * versioning.MAX_DELTA_CHAIN + 3):
+            text = texts[previous.name] + f"edit {i}\n"
+            previous = self._copy(previous, f"v{i}", text)
+            texts[previous.name] = text
+
+        versions = {v.name: v for v in Version.objects.filter(article=self.article)}
+        for name, text in texts.items():
+            self.assertEqual(versions[name].content, text)
+            self.assertLessEqual(versions[name].delta_depth, versioning.MAX_DELTA_CHAIN)
+
+        self.assertIsNone(versions[f"v{versioning.MAX_DELTA_CHAIN + 1}"].delta_base_id)
+        with self.assertNumQueries(1 + versioning.MAX_DELTA_CHAIN, using="team2"):
+            Version.objects.get(name=f"v{versioning.MAX_DELTA_CHAIN}").content
+
+    def test_editing_a_base_keeps_dependents_intact(self):
+        base = Version.objects.create(name="v0", article=self.article, content=self.base_text, editor_id=self.editor)
+        child_text = self.base_text + "child line\n"
+        child = self._copy(base, "v1", child_text)
+        self.assertEqual(child.delta_base_id, "v0")
+
+        base = Version.objects.get(name="v0")
+        base.content = "rewritten\n" + self.base_text[:200]
+        base.save()
+
+        self.assertEqual(Version.objects.get(name="v1").content, child_text)
+        self.assertEqual(Version.objects.get(name="v0").content, "rewritten\n" + self.base_text[:200])
+
+    def test_unrelated_copy_stays_a_snapshot(self):
+        base = Version.objects.create(name="v0", article=self.article, content=self.base_text, editor_id=self.editor)
+        other = self._copy(base, "v1", "completely different text\n")
+        self.assertIsNone(other.delta_base_id)
+        self.assertEqual(other.stored_content, "completely different text\n")
+
+    def test_compact_versions_command_rewrites_legacy_rows(self):
+        texts = []
+        for i in range(5):
+            texts.append(self.base_text + "".join(f"revision {j}\n" for j in range(i)))
+            Version.objects.create(name=f"v{i}", article=self.article, content=texts[-1], editor_id=self.editor)
+
+        call_command("compact_versions", stdout=io.StringIO())
+
+        report = versioning.storage_report(self.article)
+        self.assertEqual(report["snapshots"], 1)
+        self.assertGreater(report["savings"], 0.5)
+        for i, text in enumerate(texts):
+            self.assertEqual(Version.objects.get(name=f"v{i}").content, text)
+
+
+class TopArticlesByTagTests(TestCase):
+    databases = {"default", "team2"}
+
+    def setUp(self):
+        creator = uuid.uuid4()
+        self.tags = [Tag.objects.create(name=f"tag{i}") for i in range(6)]
+        Tag.objects.create(name="unused")
+        for i in range(8):
+            article = Article.objects.create(name=f"a{i}", creator_id=creator, score=i)
+            version = Version.objects.create(
+                name=f"a{i}-v1", article=article, summary=f"summary {i}", editor_id=creator
+            )
+            version.tags.set(self.tags[: i % 6 + 1])
+            article.current_version = version
+            article.save()
+        Article.objects.create(name="draft", creator_id=creator, score=100)
+
+    def test_top_three_per_tag_in_one_query(self):
+        with self.assertNumQueries(1, using="team2"):
+            res = self.client.get("/team2/api/articles/top-by-tag/")
+        self.assertEqual(res.status_code, 200)
+        data = res.json()
+
+        self.assertEqual([group["tag"] for group in data], [tag.name for tag in self.tags])
+        self.assertEqual(
+            data[0]["articles"],
+            [
+                {"name": "a7", "summary": "summary 7", "score": 7},
+                {"name": "a6", "summary": "summary 6", "score": 6},
+                {"name": "a5", "summary": "summary 5", "score": 5},
+            ],
+        )
+        self.assertEqual([a["name"] for a in data[5]["articles"]], ["a5"])
+
+
+class FakeSearchServer:
+    """
+    In-process stand-in for the parts of the Elasticsearch REST API the indexer uses.
+    """
+
+    def __init__(self):
+        self.indices = {}
+        self.aliases = {}
+        self.bulk_requests = 0
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, body=None):
+                payload = b"" if body is None else json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("X-Elastic-Product", "Elasticsearch")
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(payload)
+
+            def _handle(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                parts = [p for p in urlsplit(self.path).path.split("/") if p]
+                with server.lock:
+                    status, body = server.handle(self.command, parts, raw)
+                self._reply(status, body)
+
+            do_GET = do_PUT = do_POST = do_DELETE = do_HEAD = _handle
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def resolve(self, name):
+        return sorted(self.aliases.get(name) or ([name] if name in self.indices else []))
+
+    def handle(self, method, parts, raw):
+        if parts[0] == "_alias":
+            targets = self.aliases.get(parts[1])
+            if not targets:
+                return 404, {"error": "alias missing", "status": 404}
+            return 200, {index: {"aliases": {parts[1]: {}}} for index in targets}
+        if parts == ["_aliases"]:
+            for action in json.loads(raw)["actions"]:
+                (kind, spec), = action.items()
+                if kind == "add":
+                    self.aliases.setdefault(spec["alias"], set()).add(spec["index"])
+                elif kind == "remove":
+                    self.aliases[spec["alias"]].discard(spec["index"])
+                elif kind == "remove_index":
+                    del self.indices[spec["index"]]
+            return 200, {"acknowledged": True}
+        if len(parts) == 2 and parts[1] == "_bulk":
+            self.bulk_requests += 1
+            lines = raw.decode().splitlines()
+            items = []
+            for meta_line, source_line in zip(lines[::2], lines[1::2]):
+                meta = json.loads(meta_line)["index"]
+                self.indices[meta.get("_index", parts[0])][meta["_id"]] = json.loads(source_line)
+                items.append({"index": {"_id": meta["_id"], "status": 201}})
+            return 200, {"took": 1, "errors": False, "items": items}
+        if len(parts) == 2 and parts[1] == "_refresh":
+            return 200, {"_shards": {"total": 1, "successful": 1, "failed": 0}}
+        if method == "HEAD":
+            return (200 if parts[0] in self.indices else 404), None
+        if method == "PUT":
+            self.indices[parts[0]] = {}
+            return 200, {"acknowledged": True, "index": parts[0]}
+        if method == "DELETE":
+            self.indices.pop(parts[0], None)
+            return 200, {"acknowledged": True}
+        return 400, {"error": f"unsupported {method} /{'/'.join(parts)}", "status": 400}
+
+
+class BulkReindexTests(TestCase):
+    databases = {"default", "team2"}
+
+    def setUp(self):
+        from elasticsearch import Elasticsearch
+
+        self.server = FakeSearchServer()
+        self.addCleanup(self.server.stop)
+        self.es = Elasticsearch(hosts=[self.server.url])
+
+        creator = uuid.uuid4()
+        tag = Tag.objects.create(name="history")
+        base = None
+        for i in range(25):
+            article = Article.objects.create(name=f"article-{i:02d}", creator_id=creator)
+            version = Version.objects.create(
+                name=f"article-{i:02d}-v1", article=article, content=self._text(i),
+                delta_base=base, summary=f"summary {i}", editor_id=creator,
+            )
+            version.tags.add(tag)
+            article.current_version = version
+            article.save()
+            base = version
+        Article.objects.create(name="unpublished", creator_id=creator)
+
+    def _text(self, i):
+        return "shared paragraph\n" * 40 + f"text {i}\n"
+
+    def test_streams_batches_with_constant_queries(self):
+        self.assertTrue(Version.objects.filter(delta_base__isnull=False).exists())
+        # Articles and tags; delta bases inside the page need no further queries.
+        batches = indexing.iter_document_batches(batch_size=10)
+        with self.assertNumQueries(2, using="team2"):
+            first = next(batches)
+        self.assertEqual(len(first), 10)
+        self.assertEqual(first[3]["_source"]["tags"], ["history"])
+
+        rest = list(batches)
+        self.assertEqual([len(batch) for batch in rest], [10, 5])
+        for i, action in enumerate(first + rest[0] + rest[1]):
+            self.assertEqual(action["_source"]["content"], self._text(i))
+
+    def test_reindex_swaps_alias_to_fresh_index(self):
+        self.server.indices["articles"] = {"stale": {}}
+
+        stats = indexing.bulk_reindex(es=self.es, batch_size=10, parallelism=3)
+        self.assertEqual((stats["indexed"], stats["failed"]), (25, 0))
+        self.assertEqual(self.server.bulk_requests, 3)
+        self.assertNotIn("articles", self.server.indices)
+        self.assertEqual(self.server.resolve("articles"), [stats["index"]])
+        self.assertEqual(len(self.server.indices[stats["index"]]), 25)
+
+        second = indexing.bulk_reindex(es=self.es, batch_size=50, parallelism=1)
+        self.assertEqual(self.server.resolve("articles"), [second["index"]])
+        self.assertEqual(list(self.server.indices), [second["index"]])
+
+    def test_failed_reindex_drops_its_index_and_releases_the_lock(self):
+        first = indexing.bulk_reindex(es=self.es, batch_size=50)
+        with mock.patch("elasticsearch.helpers.bulk", side_effect=ConnectionError("es down")):
+            with self.assertRaises(ConnectionError):
+                indexing.bulk_reindex(es=self.es, batch_size=50)
+        self.assertEqual(list(self.server.indices), [first["index"]])
+        self.assertEqual(self.server.resolve("articles"), [first["index"]])
+
+        second = indexing.bulk_reindex(es=self.es, batch_size=50)
+        self.assertEqual(self.server.resolve("articles"), [second["index"]])
+
+    def test_concurrent_reindex_is_refused(self):
+        token = indexing._acquire_lock("articles")
+        self.addCleanup(indexing._release_lock, "articles", token)
+        with self.assertRaises(indexing.ReindexInProgress):
+            indexing.bulk_reindex(es=self.es)
+        self.assertEqual(self.server.indices, {})
+
+    def test_articles_published_during_the_copy_are_replayed(self):
+        original = indexing.iter_document_batches
+
+        def publish_after_copy(batch_size, articles=None):
+            yield from original(batch_size, articles)
+            if articles is None:
+                article = Article.objects.create(name="late", creator_id=uuid.uuid4())
+                article.current_version = Version.objects.create(
+                    name="late-v1", article=article, content="late", editor_id=article.creator_id
+                )
+                article.save()
+
+        with mock.patch.object(indexing, "iter_document_batches", side_effect=publish_after_copy):
+            stats = indexing.bulk_reindex(es=self.es, batch_size=10)
+        self.assertEqual((stats["indexed"], stats["replayed"]), (25, 1))
+        self.assertEqual(self.server.indices[stats["index"]]["late"]["content"], "late")
+
+
+class LocalSearchFallbackTests(TestCase):
+    databases = {"default", "team2"}
+
+    def setUp(self):
+        creator = uuid.uuid4()
+        docs = [
+            ("persepolis", "\u062a\u062e\u062a \u062c\u0645\u0634\u06cc\u062f \u062f\u0631 \u0634\u06cc\u0631\u0627\u0632", "ancient capital", ["history"]),
+            ("bazaar", "the old bazaar sells history books and spices", "market", ["shopping"]),
+            ("museum", "collections of coins", "national museum", ["history", "museum"]),
+        ]
+        for name, content, summary, tags in docs:
+            article = Article.objects.create(name=name, creator_id=creator)
+            version = Version.objects.create(
+                name=f"{name}-v1", article=article, content=content, summary=summary, editor_id=creator
+            )
+            version.tags.set([Tag.objects.get_or_create(name=tag)[0] for tag in tags])
+            article.current_version = version
+            article.save()
+
+        patcher = mock.patch.object(local_search, "local_index", local_search.LocalSearchIndex())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        local_search._es_down_until = 0.0
+        self.addCleanup(setattr, local_search, "_es_down_until", 0.0)
+
+    def test_persian_normalization(self):
+        self.assertEqual(
+            local_search.tokenize("\u0645\u064a\u200c\u0631\u0648\u0645 \u0643\u062a\u0627\u0628 \u06f1\u06f4\u06f0\u06f4"),
+            local_search.tokenize("\u0645\u06cc\u0631\u0648\u0645 \u06a9\u062a\u0627\u0628 1404"),
+        )
+
+    def test_tag_matches_outrank_content_matches(self):
+        local_search.local_index.sync()
+        results = local_search.local_index.search("history")
+        self.assertEqual([r["article_name"] for r in results][-1], "bazaar")
+        self.assertEqual(len(results), 3)
+
+        # Arabic yeh in the query still finds the Persian spelling.
+        results = local_search.local_index.search("\u062c\u0645\u0634\u064a\u062f")
+        self.assertEqual([r["article_name"] for r in results], ["persepolis"])
+
+    def test_endpoints_fall_back_when_elasticsearch_is_down(self):
+        with mock.patch(
+            "team2.tasks.indexing.search_articles_semantic", side_effect=ConnectionError("es down")
+        ) as es_search:
+            res = self.client.get("/team2/api/articles/search/", {"q": "museum"})
+            self.assertEqual(res.status_code, 200)
+            self.assertEqual(res["X-Search-Backend"], "local")
+            self.assertEqual(res.json()["results"][0]["article_name"], "museum")
+
+            res = self.client.get("/team2/api/wiki/", {"content": "coins"})
+            self.assertEqual(res.status_code, 200)
+            self.assertEqual(res.json()["summary"], "national museum")
+            # Inside the retry window ES is not asked again.
+            self.assertEqual(es_search.call_count, 1)
+
+    def test_incremental_sync_picks_up_publishes(self):
+        local_search.local_index.sync()
+        article = Article.objects.get(name="bazaar")
+        version = Version.objects.create(
+            name="bazaar-v2", article=article, content="carpets", summary="market", editor_id=article.creator_id
+        )
+        article.current_version = version
+        article.save()
+
+        local_search.local_index.sync()
+        self.assertEqual([r["article_name"] for r in local_search.local_index.search("carpets")], ["bazaar"])
+        self.assertEqual(local_search.local_index.search("spices"), [])
+
+    def test_incremental_sync_picks_up_tag_changes_and_deletes(self):
+        local_search.local_index.sync()
+        Version.objects.get(name="bazaar-v1").tags.add(Tag.objects.create(name="carpets"))
+        Article.objects.get(name="museum").delete()
+
+        local_search.local_index.sync()
+        self.assertEqual([r["article_name"] for r in local_search.local_index.search("carpets")], ["bazaar"])
+        self.assertEqual(local_search.local_index.search("coins"), [])
+
+    def test_rebuild_is_swapped_in_whole(self):
+        index = local_search.local_index
+        index.sync()
+        seen_during_rebuild = []
+        original = indexing.iter_document_batches
+
+        def searching_batches(batch_size, articles=None):
+            for batch in original(batch_size, articles):
+                seen_during_rebuild.append(len(index.search("history")))
+                yield batch
+
+        index._built_at = None
+        with mock.patch.object(indexing, "iter_document_batches", side_effect=searching_batches):
+            index.sync()
+        self.assertEqual(seen_during_rebuild, [3])
+        self.assertEqual(len(index.search("history")), 3)
+
+
+class LLMResultCacheTests(TestCase):
+    databases = {"default", "team2"}
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email="editor@test.com", password="x-Strong-pass-99")
+        self.text = "## Golestan Palace\nA UNESCO site in Tehran.\n"
+        Tag.objects.create(name="history")
+        for i in range(60):
+            Tag.objects.create(name=f"filler-{i:02d}")
+        self.articles = []
+        for name in ("palace", "palace-copy"):
+            article = Article.objects.create(name=name, creator_id=self.user.id)
+            version = Version.objects.create(
+                name=f"{name}-v1", article=article, content=self.text, editor_id=self.user.id
+            )
+            article.current_version = version
+            article.save()
+            self.articles.append(article)
+
+        client = mock.Mock()
+        client.models.generate_content.side_effect = lambda model, contents: mock.Mock(
+            text='{"selected_existing_tags": ["history"], "new_tags": ["Palace"]}'
+            if "EXISTING TAGS" in contents else "summary"
+        )
+        patcher = mock.patch("team2.tasks.tasks._get_client", return_value=client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.gemini = client.models.generate_content
+
+    def test_shortlist_is_bounded_and_prefers_mentioned_tags(self):
+        Tag.objects.create(name="tehran")
+        shortlist = llm_cache.tag_shortlist(self.text, size=10)
+        self.assertEqual(len(shortlist), 10)
+        self.assertEqual(shortlist[0], "tehran")
+
+    def test_identical_content_calls_gemini_once(self):
+        tag_article("palace")
+        summarize_article("palace")
+        self.assertEqual(self.gemini.call_count, 2)
+        prompt = self.gemini.call_args_list[0].kwargs["contents"]
+        self.assertNotIn("filler-59", prompt)
+
+        tag_article("palace-copy")
+        summarize_article("palace-copy")
+        self.assertEqual(self.gemini.call_count, 2)
+        copy = Version.objects.get(name="palace-copy-v1")
+        self.assertEqual(copy.summary, "summary")
+        self.assertEqual(sorted(copy.tags.values_list("name", flat=True)), ["history", "palace"])
+
+    def test_publish_reuses_cached_results_without_a_chord(self):
+        llm_cache.put(LLMResult.KIND_TAGS, self.text, ["history"])
+        llm_cache.put(LLMResult.KIND_SUMMARY, self.text, "cached summary")
+
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {create_access_token(self.user)}"}
+        with mock.patch("team2.views.chord") as chord, mock.patch("team2.views.index_article_version") as index:
+            res = self.client.post("/team2/api/versions/palace-v1/publish/", **headers)
+
+        self.assertEqual(res.status_code, 200)
+        chord.assert_not_called()
+        index.delay.assert_called_once_with(None, "palace-v1")
+        version = Version.objects.get(name="palace-v1")
+        self.assertEqual(version.summary, "cached summary")
+        self.assertEqual(list(version.tags.values_list("name", flat=True)), ["history"])
+        self.assertEqual(self.gemini.call_count, 0)
+
+
+class VoteTests(TestCase):
+    databases = {"default", "team2"}
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email="voter@test.com", password="x-Strong-pass-99")
+        self.headers = {"HTTP_AUTHORIZATION": f"Bearer {create_access_token(self.user)}"}
+        Article.objects.create(name="tehran", creator_id=uuid.uuid4(), score=10)
+
+    def _vote(self, value):
+        return self.client.post(
+            "/team2/api/vote/", {"article_name": "tehran", "value": value},
+            content_type="application/json", **self.headers,
+        )
+
+    def test_vote_flip_and_repeat(self):
+        res = self._vote(1)
+        self.assertEqual(res.json(), {"article": "tehran", "score": 11, "your_vote": 1})
+
+        res = self._vote(1)
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(res.json()["detail"], "You have already voted this way.")
+
+        res = self._vote(-1)
+        self.assertEqual(res.json(), {"article": "tehran", "score": 9, "your_vote": -1})
+        self.assertEqual(Article.objects.get(name="tehran").score, 9)
+
+    def test_score_is_incremented_in_the_database(self):
+        # A stale in-memory copy must not overwrite concurrent votes.
+        Article.objects.filter(name="tehran").update(score=50)
+        self.assertEqual(self._vote(1).json()["score"], 51)
+
+
+class ArticleListingTests(TestCase):
+    databases = {"default", "team2"}
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email="author@test.com", password="x-Strong-pass-99")
+        self.headers = {"HTTP_AUTHORIZATION": f"Bearer {create_access_token(self.user)}"}
+        for i in range(5):
+            article = Article.objects.create(name=f"article-{i}", creator_id=self.user.id, score=i)
+            for j in range(3):
+                version = Version.objects.create(
+                    name=f"article-{i}-v{j}", article=article, content="long text\n" * 500,
+                    summary=f"summary {i}.{j}", editor_id=self.user.id,
+                )
+            article.current_version = version
+            article.save()
+        Article.objects.create(name="someone-else", creator_id=uuid.uuid4())
+
+    def test_my_articles_default_shape_is_unchanged(self):
+        res = self.client.get("/team2/api/articles/mine/", **self.headers)
+        self.assertEqual(len(res.json()), 5)
+        self.assertIn("content", res.json()[0]["current_version"])
+
+    def test_my_articles_projection_pages_with_a_cursor(self):
+        names = []
+        url, params = "/team2/api/articles/mine/", {"fields": "name,summary", "limit": 2}
+        while True:
+            with self.assertNumQueries(1, using="team2"):
+                res = self.client.get(url, params, **self.headers)
+            body = res.json()
+            for row in body["results"]:
+                self.assertEqual(set(row), {"name", "summary"})
+            names += [row["name"] for row in body["results"]]
+            if not body["next_cursor"]:
+                break
+            params["cursor"] = body["next_cursor"]
+
+        self.assertEqual(names, [f"article-{i}" for i in range(5)])
+        self.assertEqual(body["results"][-1]["summary"], "summary 4.2")
+
+    def test_unknown_field_and_bad_cursor_are_rejected(self):
+        res = self.client.get("/team2/api/articles/mine/", {"fields": "name,content"}, **self.headers)
+        self.assertEqual(res.status_code, 400)
+        encoded = [
+            base64.urlsafe_b64encode(payload).decode()
+            for payload in (b"\xff\xfe", b"[1, 2]", b'"name"', b'{"name": 5}', b'{"other": "x"}')
+        ]
+        for cursor in ["@@@", "a", *encoded]:
+            res = self.client.get("/team2/api/articles/mine/", {"cursor": cursor}, **self.headers)
+            self.assertEqual(res.status_code, 400, cursor)
+
+        versions = "/team2/api/articles/article-0/versions/"
+        for value in ({"created_at": "yesterday", "name": "x"}, {"created_at": "2025-13-45T00:00:00", "name": "x"}):
+            res = self.client.get(versions, {"cursor": listing.encode_cursor(value)})
+            self.assertEqual(res.status_code, 400, value)
+
+    def test_get_article_with_fields(self):
+        res = self.client.get("/team2/api/articles/article-1/", {"fields": "name,score,current_version"})
+        self.assertEqual(res.json(), {"name": "article-1", "score": 1, "current_version": "article-1-v2"})
+        res = self.client.get("/team2/api/articles/missing/", {"fields": "name"})
+        self.assertEqual(res.status_code, 404)
+
+    def test_version_history_endpoint_pages_newest_first(self):
+        res = self.client.get("/team2/api/articles/article-0/versions/", {"limit": 2})
+        body = res.json()
+        self.assertEqual([v["name"] for v in body["results"]], ["article-0-v2", "article-0-v1"])
+        self.assertNotIn("content", body["results"][0])
+
+        res = self.client.get("/team2/api/articles/article-0/versions/", {"limit": 2, "cursor": body["next_cursor"]})
+        body = res.json()
+        self.assertEqual([v["name"] for v in body["results"]], ["article-0-v0"])
+        self.assertIsNone(body["next_cursor"])
@@ -11,6 +11,7 @@ urlpatterns = [
     path("api/articles/top-rated/", views.top_rated_articles, name="team2-top-rated-articles"),
     path("api/articles/top-by-tag/", views.top_articles_by_tag, name="team2-top-by-tag"),
     path("api/articles/<str:article_name>/", views.get_article, name="team2-get-article"),
+    path("api/articles/<str:article_name>/versions/", views.article_versions, name="team2-article-versions"),
     path("api/versions/create/", views.create_version_from_version, name="team2-create-version"),
     path("api/versions/create-empty/", views.create_empty_version, name="team2-create-empty-version"),
     path("api/versions/<str:version_name>/", views.get_version, name="team2-get-version"),
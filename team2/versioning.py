@@ -0,0 +1,163 @@
+"""
+Delta storage for Version content.
+
+A version is stored either as a snapshot (the full text) or as a line delta against
+another version, its delta_base. Deltas chain, but never deeper than MAX_DELTA_CHAIN,
+so reading any version applies at most MAX_DELTA_CHAIN deltas to one snapshot. A
+version whose delta would not be meaningfully smaller than its text is stored as a
+snapshot, which also restarts the chain.
+
+Delta format (JSON list of ops, applied in order):
+    ["c", start, end]   copy base lines [start:end]
+    ["i", text]         insert text
+"""
+import difflib
+import json
+
+from django.db import router, transaction
+
+MAX_DELTA_CHAIN = 8
+
+# A delta has to be at most this fraction of the full text to be worth storing.
+MAX_DELTA_RATIO = 0.8
+
+
+def make_delta(base_text, text):
+    base_lines = base_text.splitlines(keepends=True)
+    lines = text.splitlines(keepends=True)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, base_lines, lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append(["c", i1, i2])
+        elif tag in ("replace", "insert"):
+            ops.append(["i", "".join(lines[j1:j2])])
+    return json.dumps(ops, ensure_ascii=False, separators=(",", ":"))
+
+
+def apply_delta(base_text, delta):
+    base_lines = base_text.splitlines(keepends=True)
+    parts = []
+    for op in json.loads(delta):
+        if op[0] == "c":
+            parts.extend(base_lines[op[1]:op[2]])
+        else:
+            parts.append(op[1])
+    return "".join(parts)
+
+
+def read_content(version):
+    """
+    Rebuild the text of a version from its snapshot and at most MAX_DELTA_CHAIN deltas.
+    """
+    from .models import Version
+
+    if version.delta_base_id is None:
+        return version.stored_content
+    if Version.delta_base.is_cached(version):
+        return apply_delta(version.delta_base.content, version.stored_content)
+
+    deltas = [version.stored_content]
+    base_id = version.delta_base_id
+    while True:
+        stored, base_id = Version.objects.filter(pk=base_id).values_list("stored_content", "delta_base_id").get()
+        if base_id is None:
+            text = stored
+            break
+        deltas.append(stored)
+
+    for delta in reversed(deltas):
+        text = apply_delta(text, delta)
+    return text
+
+
+def prefetch_content(versions):
+    """
+    Rebuild the text of many versions at once, with one query per chain level instead of per version.
+    """
+    from .models import Version
+
+    rows = {v.pk: (v.stored_content, v.delta_base_id) for v in versions}
+    missing = {base_id for _, base_id in rows.values() if base_id is not None and base_id not in rows}
+    while missing:
+        fetched = Version.objects.filter(pk__in=missing).values_list("pk", "stored_content", "delta_base_id")
+        for pk, stored, base_id in fetched:
+            rows[pk] = (stored, base_id)
+        missing = {base_id for _, base_id in rows.values() if base_id is not None and base_id not in rows}
+
+    texts = {}
+
+    def text_of(pk):
+        if pk not in texts:
+            stored, base_id = rows[pk]
+            texts[pk] = stored if base_id is None else apply_delta(text_of(base_id), stored)
+        return texts[pk]
+
+    for version in versions:
+        if version._content is None:
+            version._content = text_of(version.pk)
+
+
+def encode(version, text):
+    """
+    Set stored_content, delta_base and delta_depth on an unsaved change of `version` to `text`.
+
+    The delta is taken against the version's current delta_base; without one, or when
+    the chain is full or the delta too large, the version becomes a snapshot.
+    """
+    base = version.delta_base
+    if base is not None and base.delta_depth < MAX_DELTA_CHAIN and text:
+        delta = make_delta(base.content, text)
+        if len(delta) <= len(text) * MAX_DELTA_RATIO:
+            version.stored_content = delta
+            version.delta_depth = base.delta_depth + 1
+            return
+
+    version.stored_content = text
+    version.delta_base = None
+    version.delta_depth = 0
+
+
+def save_with_content(version, save, text):
+    """
+    Encode `text` into `version` and save it, keeping versions that delta against it readable.
+    """
+    from .models import Version
+
+    with transaction.atomic(using=router.db_for_write(Version)):
+        children = []
+        if not version._state.adding:
+            # Dependents still decode against the old text; read them before it changes.
+            children = [(child, child.content) for child in Version.objects.filter(delta_base_id=version.pk)]
+        encode(version, text)
+        save()
+        # Re-encoding against this version never deepens a chain: an update keeps the
+        # version's delta_base, so its depth stays the same or drops to 0.
+        for child, child_text in children:
+            child.delta_base = version
+            encode(child, child_text)
+            Version.objects.filter(pk=child.pk).update(
+                stored_content=child.stored_content,
+                delta_base=child.delta_base,
+                delta_depth=child.delta_depth,
+            )
+
+
+def storage_report(article):
+    """
+    Per-article storage numbers: bytes the versions would take as full text vs. bytes stored.
+    """
+    full_bytes = stored_bytes = snapshots = 0
+    versions = list(article.versions.all())
+    for version in versions:
+        full_bytes += len(version.content.encode("utf-8"))
+        stored_bytes += len(version.stored_content.encode("utf-8"))
+        snapshots += version.delta_base_id is None
+    return {
+        "versions": len(versions),
+        "snapshots": snapshots,
+        "deltas": len(versions) - snapshots,
+        "full_bytes": full_bytes,
+        "stored_bytes": stored_bytes,
+        "savings": round(1 - stored_bytes / full_bytes, 4) if full_bytes else 0.0,
+    }
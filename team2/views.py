@@ -1,11 +1,12 @@
 import re
 import time
 import logging
+from itertools import groupby
+from operator import itemgetter
 
 from django.conf import settings
 from django.http import JsonResponse
 from django.shortcuts import redirect, get_object_or_404
-from django.db import transaction
 from rest_framework import status
 
 from rest_framework.decorators import api_view, authentication_classes, permission_classes
@@ -13,8 +14,9 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from core.auth import api_login_required
 from .authentication import JWTMiddlewareAuthentication
-from django.db.models import Prefetch
-from .models import Article, Version, Vote, PublishRequest, Tag
+from django.db.models import F, Prefetch, Q, Window
+from django.db.models.functions import RowNumber
+from .models import Article, LLMResult, Version, Vote, PublishRequest, Tag
 from celery import chord
 from .serializers import (
     ArticleSerializer, VersionSerializer, CreateArticleSerializer,
@@ -22,7 +24,8 @@ from .serializers import (
     PublishRequestSerializer, CreatePublishRequestSerializer,
 )
 from .tasks.tasks import summarize_article, tag_article
-from .tasks.indexing import index_article_version, search_articles_semantic
+from .tasks.indexing import index_article_version
+from . import listing, llm_cache, local_search, votes
 
 TEAM_NAME = "team2"
 
@@ -39,6 +42,25 @@ def base(request):
     return redirect(settings.TEAM2_FRONT_URL)
 
 
+def _enrich_and_index(article, version):
+    """
+    Tag, summarize and index a newly published version.
+
+    Tags and summaries already produced for identical content are copied over, and only
+    the Gemini tasks still missing go into the chord.
+    """
+    reused = llm_cache.apply_cached(version)
+    header = [
+        task.s(article.name)
+        for kind, task in ((LLMResult.KIND_TAGS, tag_article), (LLMResult.KIND_SUMMARY, summarize_article))
+        if kind not in reused
+    ]
+    if header:
+        chord(header)(index_article_version.s(version.name))
+    else:
+        index_article_version.delay(None, version.name)
+
+
 @api_view(['POST'])
 @authentication_classes(AUTH_CLASSES)
 @permission_classes(PERM_CLASSES)
@@ -78,10 +100,46 @@ def create_article(request):
 @authentication_classes(AUTH_CLASSES)
 @permission_classes([AllowAny])
 def get_article(request, article_name):
+    if 'fields' in request.GET:
+        try:
+            fields = listing.parse_fields(request, listing.ARTICLE_FIELDS, listing.DEFAULT_ARTICLE_FIELDS)
+        except listing.ListingError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        row = Article.objects.filter(name=article_name).values(
+            *{listing.ARTICLE_FIELDS[field] for field in fields}
+        ).first()
+        if row is None:
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response({field: row[listing.ARTICLE_FIELDS[field]] for field in fields})
+
     article = get_object_or_404(Article, name=article_name)
     return Response(ArticleSerializer(article).data)
 
 
+@api_view(['GET'])
+@authentication_classes(AUTH_CLASSES)
+@permission_classes([AllowAny])
+def article_versions(request, article_name):
+    """
+    Version history of an article, newest first, one page at a time.
+    """
+    article = get_object_or_404(Article, name=article_name)
+    try:
+        fields = listing.parse_fields(request, listing.VERSION_FIELDS, listing.DEFAULT_VERSION_FIELDS)
+        limit = listing.parse_limit(request)
+        cursor = listing.decode_cursor(request, ('created_at', 'name'))
+        versions = Version.objects.filter(article=article).order_by('-created_at', '-name')
+        if cursor is not None:
+            created_at = listing.cursor_datetime(cursor, 'created_at')
+            versions = versions.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, name__lt=cursor['name'])
+            )
+    except listing.ListingError as e:
+        return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response(listing.project(versions, fields, listing.VERSION_FIELDS, limit, key=['created_at', 'name']))
+
+
 @api_view(['GET'])
 @authentication_classes(AUTH_CLASSES)
 @permission_classes(PERM_CLASSES)
@@ -112,6 +170,7 @@ def create_version_from_version(request):
         name=new_name,
         article=source_version.article,
         content=source_version.content,
+        delta_base=source_version,
         summary=source_version.summary,
         editor_id=request.user.id,
     )
@@ -131,28 +190,16 @@ def vote(request):
     value = serializer.validated_data['value']
 
     article = get_object_or_404(Article, name=article_name)
-    user_id = request.user.id
-
-    with transaction.atomic():
-        existing_vote = Vote.objects.filter(user_id=user_id, article=article).first()
 
-        if existing_vote:
-            if existing_vote.value == value:
-                return Response(
-                    {"detail": "You have already voted this way."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-            old_value = existing_vote.value
-            existing_vote.value = value
-            existing_vote.save()
-            article.score += value - old_value
-        else:
-            Vote.objects.create(user_id=user_id, article=article, value=value)
-            article.score += value
-
-        article.save()
+    try:
+        score = votes.cast_vote(article, request.user.id, value)
+    except votes.AlreadyVoted:
+        return Response(
+            {"detail": "You have already voted this way."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
 
-    return Response({"article": article.name, "score": article.score, "your_vote": value})
+    return Response({"article": article.name, "score": score, "your_vote": value})
 
 
 @api_view(['PATCH'])
@@ -182,9 +229,7 @@ def publish_version(request, version_name):
     article.current_version = version
     article.save()
 
-    chord(
-        [tag_article.s(article.name), summarize_article.s(article.name)]
-    )(index_article_version.s(version.name))
+    _enrich_and_index(article, version)
 
     return Response(ArticleSerializer(article).data)
 
@@ -193,6 +238,20 @@ def publish_version(request, version_name):
 @authentication_classes(AUTH_CLASSES)
 @permission_classes(PERM_CLASSES)
 def my_articles(request):
+    if listing.is_listing_request(request):
+        # Projection mode: ?fields=, ?limit= and ?cursor= page through the user's articles by name.
+        try:
+            fields = listing.parse_fields(request, listing.ARTICLE_FIELDS, listing.DEFAULT_ARTICLE_FIELDS)
+            limit = listing.parse_limit(request)
+            cursor = listing.decode_cursor(request, ('name',))
+        except listing.ListingError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        articles = Article.objects.filter(creator_id=request.user.id).order_by('name')
+        if cursor is not None:
+            articles = articles.filter(name__gt=cursor['name'])
+        return Response(listing.project(articles, fields, listing.ARTICLE_FIELDS, limit, key=['name']))
+
     articles = Article.objects.filter(
         creator_id=request.user.id
     ).select_related('current_version').prefetch_related('versions')
@@ -242,7 +301,7 @@ def search_articles(request):
         return Response({"detail": "Query missing"}, status=400)
 
     try:
-        results = search_articles_semantic(query)
+        results, backend = local_search.search(query)
     except Exception as e:
         return Response(
             {"detail": f"Search service unavailable: {e}"},
@@ -250,6 +309,7 @@ def search_articles(request):
         )
 
     resp = Response({"query": query, "results": results})
+    resp["X-Search-Backend"] = backend
     return resp
 
 
@@ -262,7 +322,7 @@ def wiki_content(request):
         return Response({"detail": "Query parameter 'content' is required."}, status=400)
 
     try:
-        results = search_articles_semantic(content, size=1)
+        results, backend = local_search.search(content, size=1)
     except Exception as e:
         return Response(
             {"detail": f"Search service unavailable: {e}"},
@@ -287,7 +347,7 @@ def wiki_content(request):
 
     images = re.findall(r'!\[.*?\]\((https?://\S+?)\)', content)
 
-    return Response({
+    resp = Response({
         "tags": tags,
         "summary": summary,
         "description": content,
@@ -295,6 +355,8 @@ def wiki_content(request):
         "url": f"/articles/{article_name}",
         "updated_at": article.updated_at.isoformat() if article.updated_at else None,
     })
+    resp["X-Search-Backend"] = backend
+    return resp
 
 
 @api_view(['POST'])
@@ -383,9 +445,7 @@ def approve_publish_request(request, pk):
     article.current_version = version
     article.save()
 
-    chord(
-        [tag_article.s(article.name), summarize_article.s(article.name)]
-    )(index_article_version.s(version.name))
+    _enrich_and_index(article, version)
 
     return Response(PublishRequestSerializer(pub_request).data)
 
@@ -457,30 +517,27 @@ def top_rated_articles(request):
 @authentication_classes(AUTH_CLASSES)
 @permission_classes([AllowAny])
 def top_articles_by_tag(request):
-    tags = Tag.objects.all()
-    result = []
-
-    for tag in tags:
-        articles = Article.objects.filter(
-            current_version__isnull=False,
-            current_version__tags=tag,
-        ).select_related('current_version').order_by('-score')[:3]
-
-        if not articles:
-            continue
-
-        items = []
-        for a in articles:
-            v = a.current_version
-            items.append({
-                "name": a.name,
-                "summary": v.summary if v else "",
-                "score": a.score,
-            })
+    # One query for every tag: rank each tag's articles with a window function and
+    # keep the top 3, instead of one top-3 query per tag.
+    tag = F('current_version__tags__name')
+    rows = Article.objects.filter(
+        current_version__isnull=False,
+        current_version__tags__isnull=False,
+    ).annotate(
+        tag=tag,
+        rank=Window(RowNumber(), partition_by=[tag], order_by=[F('score').desc(), F('name').asc()]),
+    ).filter(rank__lte=3).order_by('tag', 'rank').values_list(
+        'tag', 'name', 'current_version__summary', 'score',
+    )
 
+    result = []
+    for tag_name, group in groupby(rows, key=itemgetter(0)):
         result.append({
-            "tag": tag.name,
-            "articles": items,
+            "tag": tag_name,
+            "articles": [
+                {"name": name, "summary": summary, "score": score}
+                for _, name, summary, score in group
+            ],
         })
 
     return Response(result)
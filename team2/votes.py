@@ -0,0 +1,36 @@
+from django.db import IntegrityError, router, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Article, Vote
+
+
+class AlreadyVoted(Exception):
+    pass
+
+
+def cast_vote(article, user_id, value):
+    """
+    Record a +1/-1 vote and return the article's new score.
+
+    The vote row is written with a single INSERT or conditional UPDATE, and the score
+    moves with score = score + delta, so parallel voters can't overwrite each other's
+    changes. The article row stays locked only from that UPDATE until the commit right
+    after it.
+    """
+    with transaction.atomic(using=router.db_for_write(Vote)):
+        try:
+            with transaction.atomic(using=router.db_for_write(Vote)):
+                Vote.objects.create(user_id=user_id, article=article, value=value)
+            delta = value
+        except IntegrityError:
+            # Votes are +1/-1, so changing an existing vote moves the score by 2 * value.
+            flipped = Vote.objects.filter(user_id=user_id, article=article).exclude(value=value).update(
+                value=value, updated_at=timezone.now()
+            )
+            if not flipped:
+                raise AlreadyVoted
+            delta = 2 * value
+
+        Article.objects.filter(pk=article.pk).update(score=F('score') + delta, updated_at=timezone.now())
+        return Article.objects.filter(pk=article.pk).values_list('score', flat=True).get()
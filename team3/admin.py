@@ -2,6 +2,7 @@ from django.contrib import admin
 
 from .models import (
     UserProfileFeature,
+    UserProfileVector,
     UserInteraction,
     LocationContext,
     Recommendation,
@@ -15,6 +16,12 @@ class UserProfileFeatureAdmin(admin.ModelAdmin):
     search_fields = ("feature_id", "user_id", "category")
 
 
+@admin.register(UserProfileVector)
+class UserProfileVectorAdmin(admin.ModelAdmin):
+    list_display = ("user_id", "interaction_count", "updated_at")
+    search_fields = ("user_id",)
+
+
 @admin.register(UserInteraction)
 class UserInteractionAdmin(admin.ModelAdmin):
     list_display = ("interaction_id", "user_id", "item_id", "item_type", "interaction_type", "created_at")
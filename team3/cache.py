@@ -0,0 +1,84 @@
+import hashlib
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+KEY_PREFIX = "team3:rec"
+
+
+class RecommendationCache:
+    """
+    Per-user cache of ranked results on top of Django's cache backend.
+
+    Every user has a generation stamp; entries remember the stamp they were computed
+    under and are ignored once it changes. invalidate() sets a new stamp, so writes to
+    interests, interactions or feedback drop all of that user's entries at once. With a
+    shared backend (CACHE_URL=redis://...) invalidation reaches every worker.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def ttl_seconds(self):
+        return getattr(settings, "TEAM3_RECOMMENDATION_CACHE_SECONDS", 300)
+
+    def _generation_key(self, user_id):
+        return f"{KEY_PREFIX}:gen:{user_id}"
+
+    def _generation(self, user_id):
+        key = self._generation_key(user_id)
+        generation = cache.get(key)
+        if generation is None:
+            # Unknown (or evicted) stamp: start a new one so older entries can't match it.
+            cache.add(key, time.time_ns(), None)
+            generation = cache.get(key)
+        return generation
+
+    def _entry_key(self, user_id, endpoint, params):
+        digest = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        return f"{KEY_PREFIX}:{endpoint}:{user_id}:{digest}"
+
+    def get(self, user_id, endpoint, params):
+        if self.ttl_seconds <= 0 or not user_id:
+            return None
+
+        entry = cache.get(self._entry_key(user_id, endpoint, params))
+        hit = entry is not None and entry["generation"] == self._generation(user_id)
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return entry["value"] if hit else None
+
+    def set(self, user_id, endpoint, params, value):
+        if self.ttl_seconds <= 0 or not user_id:
+            return
+        entry = {"generation": self._generation(user_id), "value": value}
+        cache.set(self._entry_key(user_id, endpoint, params), entry, self.ttl_seconds)
+
+    def invalidate(self, user_id):
+        cache.set(self._generation_key(user_id), time.time_ns(), None)
+        with self._lock:
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+
+recommendation_cache = RecommendationCache()
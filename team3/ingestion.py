@@ -0,0 +1,136 @@
+import atexit
+import logging
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections, router, transaction
+
+from . import profiles
+from .cache import recommendation_cache
+from .models import UserInteraction
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_SIZE = 500
+
+
+def build_interaction(user_id, item_id, item_type="place", interaction_type="view"):
+    return UserInteraction(
+        interaction_id=f"int_{uuid.uuid4().hex[:12]}",
+        user_id=user_id,
+        item_id=item_id,
+        item_type=item_type,
+        interaction_type=interaction_type,
+    )
+
+
+def save_interactions(interactions):
+    """
+    Insert UserInteraction instances in one transaction and fold them into the users' profiles.
+    """
+    if not interactions:
+        return 0
+
+    by_user = defaultdict(list)
+    for interaction in interactions:
+        by_user[interaction.user_id].append((interaction.item_id, interaction.interaction_type))
+
+    with transaction.atomic(using=router.db_for_write(UserInteraction)):
+        UserInteraction.objects.bulk_create(interactions)
+        for user_id, events in by_user.items():
+            profiles.add_interactions(user_id, events)
+
+    for user_id in by_user:
+        recommendation_cache.invalidate(user_id)
+    return len(interactions)
+
+
+class InteractionBuffer:
+    """
+    Coalesces single interaction writes and saves them with save_interactions.
+
+    A flush happens when max_size events are pending or flush_seconds after the first
+    pending event, whichever comes first. Pending events live in process memory only,
+    so a worker that is killed loses at most one buffer's worth of events.
+    """
+
+    def __init__(self, max_size, flush_seconds):
+        self.max_size = max_size
+        self.flush_seconds = flush_seconds
+        self._pending = []
+        self._lock = threading.Lock()
+        self._timer = None
+        self.flushed = 0
+        self.flushes = 0
+
+    def add(self, interaction):
+        with self._lock:
+            self._pending.append(interaction)
+            full = len(self._pending) >= self.max_size
+            if not full and self._timer is None:
+                self._timer = threading.Timer(self.flush_seconds, self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not batch:
+            return 0
+
+        started = time.perf_counter()
+        try:
+            saved = save_interactions(batch)
+        except Exception:
+            logger.exception("Dropping %d buffered interactions after a failed flush", len(batch))
+            return 0
+        with self._lock:
+            self.flushed += saved
+            self.flushes += 1
+        logger.debug("Flushed %d interactions in %.1f ms", saved, (time.perf_counter() - started) * 1000)
+        return saved
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        finally:
+            # Timer threads get their own DB connections; don't leak them.
+            connections.close_all()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "flushed": self.flushed,
+                "flushes": self.flushes,
+                "max_size": self.max_size,
+                "flush_seconds": self.flush_seconds,
+            }
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    """
+    The process-wide buffer, or None when TEAM3_INTERACTION_BUFFER_SIZE is 0 (write-through).
+    """
+    global _buffer
+    max_size = getattr(settings, "TEAM3_INTERACTION_BUFFER_SIZE", 0)
+    if max_size <= 0:
+        return None
+
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = InteractionBuffer(max_size, getattr(settings, "TEAM3_INTERACTION_FLUSH_SECONDS", 2.0))
+            atexit.register(_buffer.flush)
+        return _buffer
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.27 on 2026-10-18 04:06
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team3', '0002_userinteraction_search_choice'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserProfileVector',
+            fields=[
+                ('user_id', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('interest_weights', models.JSONField(default=dict)),
+                ('search_terms', models.JSONField(default=dict)),
+                ('interaction_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'user_profile_vectors',
+            },
+        ),
+    ]
@@ -24,6 +24,27 @@ class UserProfileFeature(models.Model):
         return f"{self.user_id}:{self.category} ({self.weight})"
 
 
+class UserProfileVector(models.Model):
+    """
+    Materialized ranking profile of a user, kept in sync by team3.profiles.
+
+    interest_weights: lowercased category -> weight normalized to sum to 1.
+    search_terms: lowercased search query -> number of times it was searched.
+    """
+
+    user_id = models.CharField(primary_key=True, max_length=64)
+    interest_weights = models.JSONField(default=dict)
+    search_terms = models.JSONField(default=dict)
+    interaction_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = "user_profile_vectors"
+
+    def __str__(self):
+        return f"{self.user_id} ({len(self.interest_weights)} interests, {len(self.search_terms)} search terms)"
+
+
 class UserInteraction(models.Model):
     ITEM_ARTICLE = "article"
     ITEM_PLACE = "place"
@@ -0,0 +1,140 @@
+import re
+import threading
+from collections import Counter, OrderedDict
+
+from django.db import router, transaction
+from django.utils import timezone
+
+from .models import UserInteraction, UserProfileFeature, UserProfileVector
+
+MATCHER_CACHE_SIZE = 512
+
+
+def _normalize(weights):
+    total = sum(weights.values())
+    if total <= 0:
+        return {term: 0.0 for term in weights}
+    return {term: round(weight / total, 6) for term, weight in weights.items()}
+
+
+def _interest_weights(user_id):
+    weights = {}
+    for category, weight in UserProfileFeature.objects.filter(user_id=user_id).values_list("category", "weight"):
+        term = category.lower()
+        weights[term] = max(weights.get(term, 0.0), weight)
+    return _normalize(weights)
+
+
+def rebuild_profile(user_id):
+    """
+    Recompute the profile from UserProfileFeature and UserInteraction rows.
+
+    Users with no data get an unsaved, empty profile so read-only traffic does not create rows.
+    """
+    interest_weights = _interest_weights(user_id)
+    search_terms = Counter(
+        term.lower()
+        for term in UserInteraction.objects.filter(
+            user_id=user_id, interaction_type=UserInteraction.INTERACTION_SEARCH
+        ).values_list("item_id", flat=True)
+    )
+    interaction_count = UserInteraction.objects.filter(user_id=user_id).count()
+
+    if not interest_weights and not interaction_count:
+        return UserProfileVector(user_id=user_id)
+
+    profile, _ = UserProfileVector.objects.update_or_create(
+        user_id=user_id,
+        defaults={
+            "interest_weights": interest_weights,
+            "search_terms": dict(search_terms),
+            "interaction_count": interaction_count,
+            "updated_at": timezone.now(),
+        },
+    )
+    return profile
+
+
+def get_profile(user_id):
+    return UserProfileVector.objects.filter(user_id=user_id).first() or rebuild_profile(user_id)
+
+
+def refresh_interests(user_id):
+    """
+    Re-derive interest weights after UserProfileFeature rows changed.
+    """
+    updated = UserProfileVector.objects.filter(user_id=user_id).update(
+        interest_weights=_interest_weights(user_id),
+        updated_at=timezone.now(),
+    )
+    if not updated:
+        rebuild_profile(user_id)
+
+
+def add_interactions(user_id, events):
+    """
+    Fold already-saved UserInteraction rows, given as (item_id, interaction_type) pairs, into the profile.
+    """
+    with transaction.atomic(using=router.db_for_write(UserProfileVector)):
+        profile = UserProfileVector.objects.select_for_update().filter(user_id=user_id).first()
+        if profile is None:
+            # The user's first interactions: the rebuild already counts them.
+            rebuild_profile(user_id)
+            return
+
+        for item_id, interaction_type in events:
+            profile.interaction_count += 1
+            if interaction_type == UserInteraction.INTERACTION_SEARCH:
+                term = str(item_id).lower()
+                profile.search_terms[term] = profile.search_terms.get(term, 0) + 1
+        profile.updated_at = timezone.now()
+        profile.save(update_fields=["interaction_count", "search_terms", "updated_at"])
+
+
+def _compile_terms(terms):
+    terms = [term for term in terms if term]
+    if not terms:
+        return None
+    return re.compile("|".join(re.escape(term) for term in terms))
+
+
+class ProfileMatcher:
+    """
+    Substring matchers over a profile's interest and search terms.
+
+    Each set of terms is compiled into one regex, so checking a title costs a single
+    scan instead of one `term in title` test per term.
+    """
+
+    def __init__(self, profile):
+        self._interest = _compile_terms(profile.interest_weights)
+        self._search = _compile_terms(profile.search_terms)
+
+    def matches_interest(self, title):
+        return self._interest is not None and self._interest.search(title) is not None
+
+    def matches_search(self, title):
+        return self._search is not None and self._search.search(title) is not None
+
+
+_matchers = OrderedDict()
+_matchers_lock = threading.Lock()
+
+
+def matcher_for(profile):
+    if profile._state.adding:
+        return ProfileMatcher(profile)
+
+    key = (profile.user_id, profile.updated_at)
+    with _matchers_lock:
+        matcher = _matchers.get(key)
+        if matcher is not None:
+            _matchers.move_to_end(key)
+            return matcher
+
+    matcher = ProfileMatcher(profile)
+    with _matchers_lock:
+        _matchers[key] = matcher
+        while len(_matchers) > MATCHER_CACHE_SIZE:
+            _matchers.popitem(last=False)
+    return matcher
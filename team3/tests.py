@@ -1,3 +1,5 @@
+from unittest import mock
+
 from django.test import TestCase
 
 
@@ -56,3 +58,247 @@ class RecommendationApiTests(TestCase):
             content_type="application/json",
         )
         self.assertEqual(res.status_code, 404)
+
+
+class FeedbackBiasQueryTests(TestCase):
+    databases = {"default", "team3"}
+
+    def _score(self, count):
+        payload = {"userId": "u200", "candidate_place_ids": [f"place_{i}" for i in range(count)]}
+        return self.client.post("/team3/api/recommendations/score-candidates/", payload, content_type="application/json")
+
+    def test_score_candidates_query_count_does_not_grow_with_candidates(self):
+        from django.db import connections
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connections["team3"]) as few:
+            self._score(2)
+        with CaptureQueriesContext(connections["team3"]) as many:
+            res = self._score(50)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(res.json()["scored_places"]), 50)
+        self.assertEqual(len(few.captured_queries), len(many.captured_queries))
+
+    def test_latest_feedback_wins(self):
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        from .models import Recommendation
+        from .views import _get_feedback_biases
+
+        now = timezone.now()
+        for rec_id, feedback, at in [
+            ("rec_old", Recommendation.FEEDBACK_LIKE, now - timedelta(days=1)),
+            ("rec_new", Recommendation.FEEDBACK_DISLIKE, now),
+        ]:
+            Recommendation.objects.create(
+                recommendation_id=rec_id, user_id="u201", item_id="place_1", item_type="place",
+                score=0.5, reason_type="popularity", user_feedback=feedback, feedback_at=at,
+            )
+        self.assertEqual(_get_feedback_biases("u201"), {"place_1": -0.45})
+
+
+class RecommendationPersistenceTests(TestCase):
+    databases = {"default", "team3"}
+
+    def test_contextual_recommendations_are_saved_with_one_insert(self):
+        from django.db import connections
+        from django.test.utils import CaptureQueriesContext
+
+        from .models import Recommendation
+
+        extra = [{"id": f"extra_{i}", "type": "place", "title": f"extra place {i}"} for i in range(20)]
+        payload = {"userId": "u300", "limit": 20, "context": {"destination": "yazd", "candidate_items": extra}}
+        with CaptureQueriesContext(connections["team3"]) as ctx:
+            res = self.client.post("/team3/api/recommendations/contextual/", payload, content_type="application/json")
+
+        self.assertEqual(res.status_code, 200)
+        recs = res.json()["recommendations"]
+        self.assertEqual(len(recs), 20)
+        inserts = [q for q in ctx.captured_queries if q["sql"].startswith("INSERT")]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(
+            set(Recommendation.objects.filter(user_id="u300").values_list("recommendation_id", flat=True)),
+            {rec["recommendation_id"] for rec in recs},
+        )
+
+
+class UserProfileVectorTests(TestCase):
+    databases = {"default", "team3"}
+
+    def _post(self, url, payload):
+        return self.client.post(url, payload, content_type="application/json")
+
+    def test_profile_is_updated_incrementally(self):
+        from .models import UserProfileVector
+
+        self._post("/team3/api/interests/", {"userId": "u400", "interests": [
+            {"category": "Museum", "weight": 0.6},
+            {"category": "Food", "weight": 0.2},
+        ]})
+        self._post("/team3/api/interactions/", {"userId": "u400", "item_id": "Cafes", "interaction": "search"})
+        self._post("/team3/api/interactions/", {"userId": "u400", "item_id": "cafes", "interaction": "search"})
+        self._post("/team3/api/interactions/", {"userId": "u400", "item_id": "place_9", "interaction": "view"})
+
+        profile = UserProfileVector.objects.get(user_id="u400")
+        self.assertEqual(profile.interest_weights, {"museum": 0.75, "food": 0.25})
+        self.assertEqual(profile.search_terms, {"cafes": 2})
+        self.assertEqual(profile.interaction_count, 3)
+
+    def test_ranking_uses_profile_terms(self):
+        self._post("/team3/api/interactions/", {"userId": "u401", "item_id": "cafes", "interaction": "search"})
+        res = self._post(
+            "/team3/api/recommendations/personalized/",
+            {"userId": "u401", "destination": "tabriz", "limit": 10},
+        )
+        reasons = {rec["title"]: rec["reason"] for rec in res.json()["recommendations"]}
+        self.assertEqual(reasons["best cafes in tabriz"], "Related to your previous search activity.")
+
+
+class InteractionIngestionTests(TestCase):
+    databases = {"default", "team3"}
+
+    def test_batch_endpoint_inserts_all_rows_at_once(self):
+        from django.db import connections
+        from django.test.utils import CaptureQueriesContext
+
+        from .models import UserInteraction, UserProfileVector
+
+        self.client.post(
+            "/team3/api/interactions/", {"userId": "u500", "item_id": "seed"}, content_type="application/json"
+        )
+        entries = [{"item_id": f"place_{i}", "interaction": "view"} for i in range(30)]
+        entries.append({"item_id": "Kashan", "interaction": "search"})
+        with CaptureQueriesContext(connections["team3"]) as ctx:
+            res = self.client.post(
+                "/team3/api/interactions/batch/",
+                {"userId": "u500", "interactions": entries},
+                content_type="application/json",
+            )
+
+        self.assertEqual(res.json(), {"success": True, "saved": 31})
+        inserts = [q for q in ctx.captured_queries if q["sql"].startswith("INSERT")]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(UserInteraction.objects.filter(user_id="u500").count(), 32)
+        profile = UserProfileVector.objects.get(user_id="u500")
+        self.assertEqual(profile.interaction_count, 32)
+        self.assertEqual(profile.search_terms, {"kashan": 1})
+
+    def test_batch_with_invalid_entry_is_rejected(self):
+        from .models import UserInteraction
+
+        res = self.client.post(
+            "/team3/api/interactions/batch/",
+            {"userId": "u501", "interactions": [{"item_id": "a"}, {"interaction": "view"}]},
+            content_type="application/json",
+        )
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(res.json()["invalid"], [1])
+        self.assertFalse(UserInteraction.objects.filter(user_id="u501").exists())
+
+    def test_batch_rejects_non_scalar_ids(self):
+        from .models import UserInteraction
+
+        entries = [{"user_id": "u503", "item_id": "a"}, {"user_id": [1], "item_id": 1}, {"item_id": {"x": 1}}]
+        res = self.client.post(
+            "/team3/api/interactions/batch/",
+            {"userId": "u503", "interactions": entries},
+            content_type="application/json",
+        )
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(res.json()["invalid"], [1, 2])
+        self.assertFalse(UserInteraction.objects.filter(user_id="u503").exists())
+
+    def test_authenticated_batch_ignores_entry_user_ids(self):
+        from django.contrib.auth import get_user_model
+
+        from core.jwt_utils import create_access_token
+        from .models import UserInteraction
+
+        user = get_user_model().objects.create_user(email="batch@test.com", password="x-Strong-pass-99")
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {create_access_token(user)}"}
+        with mock.patch.object(type(user), "username", "batch-user", create=True):
+            res = self.client.post(
+                "/team3/api/interactions/batch/",
+                {"interactions": [{"user_id": "victim", "item_id": "a"}, {"item_id": "b"}]},
+                content_type="application/json",
+                **headers,
+            )
+        self.assertEqual(res.json(), {"success": True, "saved": 2})
+        self.assertFalse(UserInteraction.objects.filter(user_id="victim").exists())
+        self.assertEqual(UserInteraction.objects.filter(user_id="batch-user").count(), 2)
+
+    def test_buffer_flushes_when_full(self):
+        from .ingestion import InteractionBuffer, build_interaction
+        from .models import UserInteraction
+
+        buffer = InteractionBuffer(max_size=3, flush_seconds=60)
+        buffer.add(build_interaction("u502", "a"))
+        buffer.add(build_interaction("u502", "b"))
+        self.assertEqual(UserInteraction.objects.filter(user_id="u502").count(), 0)
+
+        buffer.add(build_interaction("u502", "c"))
+        self.assertEqual(UserInteraction.objects.filter(user_id="u502").count(), 3)
+        self.assertEqual(buffer.stats()["pending"], 0)
+
+
+class RecommendationCacheTests(TestCase):
+    databases = {"default", "team3"}
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+
+    def _personalized(self):
+        return self.client.post(
+            "/team3/api/recommendations/personalized/",
+            {"userId": "u600", "destination": "yazd", "limit": 5},
+            content_type="application/json",
+        ).json()
+
+    def test_repeat_call_is_served_without_db_reads(self):
+        from django.db import connections
+        from django.test.utils import CaptureQueriesContext
+
+        first = self._personalized()
+        with CaptureQueriesContext(connections["team3"]) as ctx:
+            second = self._personalized()
+
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.assertEqual(first["recommendations"], second["recommendations"])
+
+    def test_writes_invalidate_cached_results(self):
+        first = self._personalized()
+        self.client.post(
+            "/team3/api/interactions/",
+            {"userId": "u600", "item_id": "yazd_place_1", "interaction": "view"},
+            content_type="application/json",
+        )
+        second = self._personalized()
+        self.assertNotEqual(
+            [rec["recommendation_id"] for rec in first["recommendations"]],
+            [rec["recommendation_id"] for rec in second["recommendations"]],
+        )
+
+        with self.settings(METRICS_TOKEN="scrape-secret"):
+            res = self.client.get("/team3/api/cache/stats/", HTTP_X_METRICS_TOKEN="scrape-secret")
+        self.assertGreaterEqual(res.json()["recommendations"]["invalidations"], 1)
+
+    def test_stats_require_staff_or_metrics_token(self):
+        from django.contrib.auth import get_user_model
+
+        from core.jwt_utils import create_access_token
+
+        self.assertEqual(self.client.get("/team3/api/cache/stats/").status_code, 401)
+        with self.settings(METRICS_TOKEN="scrape-secret"):
+            res = self.client.get("/team3/api/cache/stats/", HTTP_X_METRICS_TOKEN="wrong")
+            self.assertEqual(res.status_code, 401)
+            res = self.client.get("/team3/api/cache/stats/", HTTP_X_METRICS_TOKEN="scrape-secret")
+            self.assertEqual(res.status_code, 200)
+
+        staff = get_user_model().objects.create_user(email="ops@test.com", password="x-Strong-pass-99", is_staff=True)
+        res = self.client.get("/team3/api/cache/stats/", HTTP_AUTHORIZATION=f"Bearer {create_access_token(staff)}")
+        self.assertEqual(res.status_code, 200)
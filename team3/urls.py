@@ -5,6 +5,7 @@ urlpatterns = [
     path("", views.base),
     path("ping/", views.ping),
     path("health/", views.health),
+    path("api/cache/stats/", views.cache_stats),
     path("api/interests/", views.upsert_interests),
     path("api/recommendations/personalized/", views.personalized_recommendations),
     path("api/recommendations/contextual/", views.contextual_recommendations),
@@ -15,5 +16,6 @@ urlpatterns = [
     path("api/recommendations/<str:user_id>/", views.list_user_recommendations),
     path("api/recommendations/reason/<str:recommendation_id>/", views.recommendation_reason),
     path("api/interactions/", views.record_interaction),
+    path("api/interactions/batch/", views.record_interactions_batch),
     path("api/feedback/", views.submit_feedback),
 ]
@@ -8,9 +8,11 @@ from django.shortcuts import render
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 
-from core.auth import api_login_required
+from core.auth import api_login_required, staff_or_metrics_token_required
 
-from .models import Feedback, LocationContext, Recommendation, UserInteraction, UserProfileFeature
+from . import ingestion, profiles
+from .cache import recommendation_cache
+from .models import Feedback, LocationContext, Recommendation, UserProfileFeature
 
 TEAM_NAME = "team3"
 
@@ -45,49 +47,43 @@ def _clamp_limit(raw_limit, default_limit=10, min_limit=1):
     return max(min_limit, min(limit, 50))
 
 
-def _get_user_id(request, payload):
-    if request.user.is_authenticated and request.user.username:
-        return request.user.username
-    return payload.get("user_id") or payload.get("userId")
+def _authenticated_username(request):
+    # core.User has no username field; only user models that define one pin the user id.
+    if request.user.is_authenticated:
+        return getattr(request.user, "username", "")
+    return ""
 
 
-def _get_user_features(user_id):
-    return list(UserProfileFeature.objects.filter(user_id=user_id).values_list("category", "weight"))
+def _get_user_id(request, payload):
+    return _authenticated_username(request) or payload.get("user_id") or payload.get("userId")
 
 
-def _get_user_interactions(user_id):
-    return list(
-        UserInteraction.objects.filter(user_id=user_id).values("item_id", "item_type", "interaction_type")
-    )
+FEEDBACK_BIAS = {
+    Recommendation.FEEDBACK_LIKE: 0.18,
+    Recommendation.FEEDBACK_DISLIKE: -0.45,
+}
 
 
-def _get_search_terms(user_id):
-    return list(
-        UserInteraction.objects.filter(user_id=user_id, interaction_type="search").values_list("item_id", flat=True)
-    )
-
-
-def _feedback_bias(user_id, item_id):
-    rec = (
+def _get_feedback_biases(user_id):
+    """
+    Score bias per item_id from the user's latest like/dislike on it, loaded in one query.
+    """
+    rows = (
         Recommendation.objects.filter(
             user_id=user_id,
-            item_id=item_id,
             user_feedback__in=[Recommendation.FEEDBACK_LIKE, Recommendation.FEEDBACK_DISLIKE],
         )
         .order_by("-feedback_at", "-generated_at")
-        .first()
+        .values_list("item_id", "user_feedback")
     )
-    if not rec:
-        return 0.0
-    if rec.user_feedback == Recommendation.FEEDBACK_LIKE:
-        return 0.18
-    if rec.user_feedback == Recommendation.FEEDBACK_DISLIKE:
-        return -0.45
-    return 0.0
+    biases = {}
+    for item_id, feedback in rows:
+        biases.setdefault(item_id, FEEDBACK_BIAS.get(feedback, 0.0))
+    return biases
 
 
 def _build_recommendation(user_id, item, reason_type, reason_description, score):
-    return Recommendation.objects.create(
+    return Recommendation(
         recommendation_id=f"rec_{uuid.uuid4().hex[:12]}",
         user_id=user_id,
         item_id=item["id"],
@@ -98,6 +94,24 @@ def _build_recommendation(user_id, item, reason_type, reason_description, score)
     )
 
 
+def _save_ranked(user_id, ranked):
+    """
+    Persist ranked entries as Recommendation rows with a single INSERT and return their DTOs.
+    """
+    recs = [
+        _build_recommendation(
+            user_id=user_id,
+            item=entry["item"],
+            reason_type=entry["reason_type"],
+            reason_description=entry["reason_description"],
+            score=entry["score"],
+        )
+        for entry in ranked
+    ]
+    Recommendation.objects.bulk_create(recs)
+    return [_recommendation_to_dto(rec, title=entry["item"].get("title")) for rec, entry in zip(recs, ranked)]
+
+
 def _recommendation_to_dto(rec, title=None, meta=None):
     return {
         "recommendation_id": rec.recommendation_id,
@@ -127,18 +141,17 @@ def _popular_candidates(limit):
     return POPULAR_ITEMS[: max(limit, 5)]
 
 
-def _rank_candidates(user_id, candidates):
-    interests = _get_user_features(user_id)
-    interest_terms = {category.lower() for category, _ in interests}
-    search_terms = {term.lower() for term in _get_search_terms(user_id)}
+def _rank_candidates(user_id, candidates, profile=None):
+    matcher = profiles.matcher_for(profile or profiles.get_profile(user_id))
+    feedback_biases = _get_feedback_biases(user_id)
     ranked = []
     for item in candidates:
         item_title = item.get("title", "").lower()
         seed = f"{user_id}:{item['id']}:{item['type']}"
         base_score = _stable_score(seed)
-        interest_boost = 0.15 if any(term in item_title for term in interest_terms) else 0.0
-        search_boost = 0.12 if any(term in item_title for term in search_terms) else 0.0
-        feedback_boost = _feedback_bias(user_id, item["id"])
+        interest_boost = 0.15 if matcher.matches_interest(item_title) else 0.0
+        search_boost = 0.12 if matcher.matches_search(item_title) else 0.0
+        feedback_boost = feedback_biases.get(item["id"], 0.0)
         score = min(1.0, max(0.0, base_score + interest_boost + search_boost + feedback_boost))
         reason_type = "popularity"
         reason_description = "Suggested by popularity baseline."
@@ -175,6 +188,17 @@ def health(request):
     return JsonResponse({"service": "Recommendation Service", "status": "ok"})
 
 
+@staff_or_metrics_token_required
+def cache_stats(request):
+    buffer = ingestion.get_buffer()
+    return JsonResponse(
+        {
+            "recommendations": recommendation_cache.stats(),
+            "interaction_buffer": buffer.stats() if buffer is not None else None,
+        }
+    )
+
+
 @csrf_exempt
 def upsert_interests(request):
     if request.method != "POST":
@@ -200,6 +224,8 @@ def upsert_interests(request):
                 "updated_at": now,
             },
         )
+    profiles.refresh_interests(user_id)
+    recommendation_cache.invalidate(user_id)
     return JsonResponse({"success": True})
 
 
@@ -217,25 +243,26 @@ def personalized_recommendations(request):
     if not user_id:
         return JsonResponse({"recommendations": []}, status=400)
 
-    interactions = _get_user_interactions(user_id)
-    is_cold_start = not interactions and not _get_user_features(user_id)
-    candidates = _popular_candidates(limit) if is_cold_start else _generate_candidates(destination, season, payload)
-    ranked = _rank_candidates(user_id, candidates)[:limit]
-
-    recs = []
-    for entry in ranked:
-        item = entry["item"]
-        rec = _build_recommendation(
-            user_id=user_id,
-            item=item,
-            reason_type=entry["reason_type"],
-            reason_description=entry["reason_description"],
-            score=entry["score"],
-        )
-        recs.append(_recommendation_to_dto(rec, title=item.get("title")))
+    # A hit returns the recommendations (and recommendation_ids) saved by the call that filled it.
+    cache_params = {
+        "destination": destination,
+        "season": season,
+        "limit": limit,
+        "candidate_items": payload.get("candidate_items"),
+    }
+    cached = recommendation_cache.get(user_id, "personalized", cache_params)
+    if cached is None:
+        profile = profiles.get_profile(user_id)
+        is_cold_start = not profile.interaction_count and not profile.interest_weights
+        candidates = _popular_candidates(limit) if is_cold_start else _generate_candidates(destination, season, payload)
+        ranked = _rank_candidates(user_id, candidates, profile=profile)[:limit]
+        cached = {"recommendations": _save_ranked(user_id, ranked), "cold_start": is_cold_start}
+        recommendation_cache.set(user_id, "personalized", cache_params, cached)
 
     elapsed_ms = int((time.perf_counter() - started_at) * 1000)
-    return JsonResponse({"recommendations": recs, "response_time_ms": elapsed_ms, "cold_start": is_cold_start})
+    return JsonResponse(
+        {"recommendations": cached["recommendations"], "response_time_ms": elapsed_ms, "cold_start": cached["cold_start"]}
+    )
 
 
 @csrf_exempt
@@ -301,17 +328,7 @@ def contextual_recommendations(request):
 
     candidates = _generate_candidates(destination, season, context)
     ranked = _rank_candidates(user_id, candidates)[:limit]
-    recs = []
-    for entry in ranked:
-        item = entry["item"]
-        rec = _build_recommendation(
-            user_id=user_id,
-            item=item,
-            reason_type=entry["reason_type"],
-            reason_description=entry["reason_description"],
-            score=entry["score"],
-        )
-        recs.append(_recommendation_to_dto(rec, title=item.get("title")))
+    recs = _save_ranked(user_id, ranked)
     return JsonResponse({"recommendations": recs})
 
 
@@ -326,10 +343,11 @@ def score_candidates(request):
     if not user_id or not candidate_ids:
         return JsonResponse({"scored_places": []})
 
+    feedback_biases = _get_feedback_biases(user_id)
     scored = []
     for place_id in candidate_ids:
         seed = f"{user_id}:{place_id}"
-        score = _stable_score(seed) + _feedback_bias(user_id, place_id)
+        score = _stable_score(seed) + feedback_biases.get(place_id, 0.0)
         scored.append(
             {
                 "place_id": place_id,
@@ -358,20 +376,23 @@ def suggest_destinations(request):
         ("mashhad", "Mashhad"),
     ]
 
-    suggestions = []
-    for region_id, region_name in regions:
-        score = _stable_score(f"{user_id}:{region_id}") if user_id else 0.5
-        suggestions.append(
-            {
-                "region_id": region_id,
-                "region_name": region_name,
-                "match_score": round(score, 3),
-                "image_url": "",
-                "reason": "Suggested based on your profile and trend.",
-            }
-        )
-
-    suggestions.sort(key=lambda x: x["match_score"], reverse=True)
+    suggestions = recommendation_cache.get(user_id, "destinations", {})
+    if suggestions is None:
+        suggestions = []
+        for region_id, region_name in regions:
+            score = _stable_score(f"{user_id}:{region_id}") if user_id else 0.5
+            suggestions.append(
+                {
+                    "region_id": region_id,
+                    "region_name": region_name,
+                    "match_score": round(score, 3),
+                    "image_url": "",
+                    "reason": "Suggested based on your profile and trend.",
+                }
+            )
+
+        suggestions.sort(key=lambda x: x["match_score"], reverse=True)
+        recommendation_cache.set(user_id, "destinations", {}, suggestions)
     return JsonResponse({"destinations": suggestions[:limit]})
 
 
@@ -387,19 +408,23 @@ def suggest_by_region(request):
     if not user_id or not region_id:
         return JsonResponse({"scored_places": []})
 
-    candidates = [
-        {"id": f"{region_id}_place_{i}", "type": "place", "title": f"{region_id} place {i}"}
-        for i in range(1, limit + 3)
-    ]
-    ranked = _rank_candidates(user_id, candidates)[:limit]
-    scored_places = [
-        {
-            "place_id": entry["item"]["id"],
-            "score": round(entry["score"], 3),
-            "reasoning_tag": entry["reason_type"],
-        }
-        for entry in ranked
-    ]
+    cache_params = {"region_id": region_id, "limit": limit}
+    scored_places = recommendation_cache.get(user_id, "region", cache_params)
+    if scored_places is None:
+        candidates = [
+            {"id": f"{region_id}_place_{i}", "type": "place", "title": f"{region_id} place {i}"}
+            for i in range(1, limit + 3)
+        ]
+        ranked = _rank_candidates(user_id, candidates)[:limit]
+        scored_places = [
+            {
+                "place_id": entry["item"]["id"],
+                "score": round(entry["score"], 3),
+                "reasoning_tag": entry["reason_type"],
+            }
+            for entry in ranked
+        ]
+        recommendation_cache.set(user_id, "region", cache_params, scored_places)
     return JsonResponse({"scored_places": scored_places})
 
 
@@ -416,16 +441,66 @@ def record_interaction(request):
     if not user_id or not item_id:
         return JsonResponse({"success": False}, status=400)
 
-    UserInteraction.objects.create(
-        interaction_id=f"int_{uuid.uuid4().hex[:12]}",
-        user_id=user_id,
-        item_id=item_id,
-        item_type=item_type,
-        interaction_type=interaction_type,
-    )
+    interaction = ingestion.build_interaction(user_id, item_id, item_type, interaction_type)
+    buffer = ingestion.get_buffer()
+    if buffer is not None:
+        buffer.add(interaction)
+    else:
+        ingestion.save_interactions([interaction])
     return JsonResponse({"success": True})
 
 
+def _is_id(value):
+    return isinstance(value, (str, int)) and not isinstance(value, bool)
+
+
+@csrf_exempt
+def record_interactions_batch(request):
+    if request.method != "POST":
+        return JsonResponse({"detail": "Method not allowed"}, status=405)
+    payload = _json_body(request)
+    default_user_id = _get_user_id(request, payload)
+    # Like the single endpoint: an authenticated caller only writes its own interactions.
+    per_entry_users = not _authenticated_username(request)
+    entries = payload.get("interactions")
+
+    if not isinstance(entries, list) or not entries:
+        return JsonResponse({"success": False}, status=400)
+    if len(entries) > ingestion.MAX_BATCH_SIZE:
+        return JsonResponse(
+            {"success": False, "detail": f"at most {ingestion.MAX_BATCH_SIZE} interactions per batch"},
+            status=400,
+        )
+
+    interactions = []
+    invalid = []
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            invalid.append(index)
+            continue
+        user_id = default_user_id
+        if per_entry_users:
+            user_id = entry.get("user_id") or entry.get("userId") or default_user_id
+        item_id = entry.get("item_id")
+        if not user_id or not item_id or not _is_id(user_id) or not _is_id(item_id):
+            invalid.append(index)
+            continue
+        interactions.append(
+            ingestion.build_interaction(
+                user_id,
+                item_id,
+                entry.get("item_type") or "place",
+                entry.get("interaction") or entry.get("interaction_type") or "view",
+            )
+        )
+
+    if invalid:
+        return JsonResponse({"success": False, "invalid": invalid}, status=400)
+
+    saved = ingestion.save_interactions(interactions)
+    return JsonResponse({"success": True, "saved": saved})
+
+
 @csrf_exempt
 def submit_feedback(request):
     if request.method != "POST":
@@ -453,6 +528,7 @@ def submit_feedback(request):
         recommendation_id=recommendation_id,
         value=parsed_value,
     )
+    recommendation_cache.invalidate(user_id)
     return JsonResponse({"success": True})
 
 
@@ -4,6 +4,7 @@ from team4.models import (
     Facility, FacilityAmenity, Pricing, Image,
     Favorite, Review
 )
+from team4.services.rating_service import RatingService
 
 
 # =====================================================
@@ -162,14 +163,10 @@ class ReviewAdmin(admin.ModelAdmin):
     actions = ['approve_reviews', 'disapprove_reviews']
     
     def approve_reviews(self, request, queryset):
-        queryset.update(is_approved=True)
-        for review in queryset:
-            review.update_facility_rating()
+        RatingService.set_approval(queryset, True)
     approve_reviews.short_description = "تایید نظرات انتخاب شده"
     
     def disapprove_reviews(self, request, queryset):
-        queryset.update(is_approved=False)
-        for review in queryset:
-            review.update_facility_rating()
+        RatingService.set_approval(queryset, False)
     disapprove_reviews.short_description = "رد نظرات انتخاب شده"
 
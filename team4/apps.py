@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class Team4Config(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'team4'
+
+    # ثبت signalها (باطل کردن ایندکس مناطق) هنگام لود شدن اپلیکیشن
+    def ready(self):
+        import team4.signals
@@ -134,6 +134,10 @@ class PointField(models.Field):
         """Prepare value for saving to database - return raw SQL expression"""
         if value is None:
             return None
+
+        # Expressions (e.g. the Case/When built by bulk_update) compile themselves
+        if hasattr(value, 'as_sql'):
+            return value
             
         # Prepare the value first
         value = self.get_prep_value(value)
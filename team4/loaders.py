@@ -0,0 +1,440 @@
+"""
+بارگذاری دسته‌ای fixture های JSON (مناطق و مکان‌ها)
+
+رکوردها به صورت جریانی از فایل خوانده می‌شوند، شهرها/دسته‌بندی‌ها/رکوردهای موجود
+یک بار در حافظه بارگذاری می‌شوند و نوشتن با bulk_create/bulk_update در دسته‌های
+batch_size تایی، هر دسته در یک تراکنش، انجام می‌شود.
+"""
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from team4.fields import Point
+from team4.models import Amenity, Category, City, Facility, FacilityAmenity, Province, Village
+from team4.services.region_index import region_index
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def iter_json_array(path, chunk_size=64 * 1024):
+    """
+    عناصر آرایه JSON سطح بالای یک فایل، بدون خواندن کل فایل در حافظه
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = f.read(chunk_size).lstrip()
+        if not buffer.startswith('['):
+            raise ValueError(f'{path}: expected a JSON array')
+        buffer = buffer[1:]
+        eof = False
+        while True:
+            buffer = buffer.lstrip().lstrip(',').lstrip()
+            if buffer.startswith(']'):
+                return
+            try:
+                item, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer += chunk
+                continue
+            yield item
+            buffer = buffer[end:]
+
+
+def parse_point(location):
+    if location and location.get('latitude') and location.get('longitude'):
+        return Point(float(location['longitude']), float(location['latitude']))
+    return None
+
+
+class LoadStats:
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.skipped = 0
+        self.seconds = 0.0
+
+    @property
+    def rows(self):
+        return self.created + self.updated
+
+    @property
+    def rows_per_sec(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return (
+            f'{self.created} created, {self.updated} updated, {self.skipped} skipped '
+            f'in {self.seconds:.2f}s ({self.rows_per_sec:,.0f} rows/s)'
+        )
+
+
+class BulkLoader:
+    """
+    پایه بارگذارها: هر رکورد با کلید طبیعی key_fields به رکورد موجود نگاشت می‌شود؛
+    رکوردهای موجود bulk_update و بقیه bulk_create می‌شوند.
+
+    زیرکلاس‌ها build(item) را پیاده می‌کنند که یک نمونه ذخیره‌نشده (یا None برای پرش) برمی‌گرداند.
+    """
+
+    model = None
+    fixture = None
+    key_fields = ()
+    update_fields = ()
+
+    def __init__(self, database='team4', batch_size=DEFAULT_BATCH_SIZE, log=None):
+        self.db = database
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        self.stats = LoadStats()
+
+    @property
+    def objects(self):
+        return self.model.objects.using(self.db)
+
+    def key(self, obj):
+        return tuple(getattr(obj, field) for field in self.key_fields)
+
+    def prepare(self):
+        """بارگذاری نقشه‌های مورد نیاز build در حافظه"""
+        pk_name = self.model._meta.pk.attname
+        self.existing = {
+            tuple(row[1:]): row[0]
+            for row in self.objects.values_list(pk_name, *self.key_fields)
+        }
+
+    def build(self, item):
+        raise NotImplementedError
+
+    def before_write(self, obj):
+        """همگام‌سازی ستون‌هایی که save() پر می‌کند و bulk_create/bulk_update دور می‌زنند"""
+
+    def after_write(self, pairs):
+        """pairs: لیست (obj, item) های ذخیره‌شده این دسته، با pk"""
+
+    def load(self, path=None):
+        path = path or os.path.join(FIXTURES_DIR, self.fixture)
+        started = time.perf_counter()
+        self.prepare()
+        batch = {}
+        for item in iter_json_array(path):
+            obj = self.build(item)
+            if obj is None:
+                self.stats.skipped += 1
+                continue
+            # تکرار یک کلید در fixture: مثل update_or_create، رکورد آخر برنده است
+            batch[self.key(obj)] = (obj, item)
+            if len(batch) >= self.batch_size:
+                self._write(batch)
+                batch = {}
+        if batch:
+            self._write(batch)
+        self.stats.seconds = time.perf_counter() - started
+        return self.stats
+
+    def _write(self, batch):
+        to_create, to_update = [], []
+        now = timezone.now()
+        for key, (obj, item) in batch.items():
+            self.before_write(obj)
+            pk = self.existing.get(key)
+            if pk is None:
+                to_create.append(obj)
+            else:
+                obj.pk = pk
+                # bulk_update مثل save() فیلد auto_now را پر نمی‌کند
+                obj.updated_at = now
+                to_update.append(obj)
+
+        with transaction.atomic(using=self.db):
+            self.objects.bulk_create(to_create)
+            if to_update:
+                self.objects.bulk_update(to_update, [*self.update_fields, 'updated_at'])
+            self._resolve_created_pks(to_create)
+            self.after_write(list(batch.values()))
+
+        for obj in to_create:
+            self.existing[self.key(obj)] = obj.pk
+        self.stats.created += len(to_create)
+        self.stats.updated += len(to_update)
+
+    def _resolve_created_pks(self, created):
+        # MySQL شناسه رکوردهای bulk_create را برنمی‌گرداند
+        missing = [obj for obj in created if obj.pk is None]
+        if not missing:
+            return
+        keys = {self.key(obj) for obj in missing}
+        pk_name = self.model._meta.pk.attname
+        first_field = self.key_fields[0]
+        rows = self.objects.filter(
+            **{f'{first_field}__in': {key[0] for key in keys}}
+        ).values_list(pk_name, *self.key_fields)
+        pks = {tuple(row[1:]): row[0] for row in rows}
+        for obj in missing:
+            obj.pk = pks[self.key(obj)]
+
+
+class RegionLoader(BulkLoader):
+    """بارگذار استان/شهر/روستا؛ bulk_create/bulk_update سیگنال ندارند، پس ایندکس مناطق دستی باطل می‌شود"""
+
+    def load(self, path=None):
+        try:
+            return super().load(path)
+        finally:
+            region_index.invalidate()
+
+
+class ProvinceLoader(RegionLoader):
+    model = Province
+    fixture = 'province.json'
+    key_fields = ('province_id',)
+    update_fields = ('name_fa', 'name_en', 'search_name', 'location')
+
+    def build(self, item):
+        return Province(
+            province_id=item['province_id'],
+            name_fa=item['name_fa'],
+            name_en=item['name_en'],
+            location=parse_point(item.get('location')),
+        )
+
+    def before_write(self, obj):
+        obj.sync_search_name()
+
+
+class CityLoader(RegionLoader):
+    """شهرها با کلید (name_en, province)؛ شهر جدید city_id فایل را می‌گیرد"""
+    model = City
+    fixture = 'cities.json'
+    key_fields = ('name_en', 'province_id')
+    update_fields = ('name_fa', 'search_name', 'location')
+
+    def prepare(self):
+        super().prepare()
+        self.province_ids = set(Province.objects.using(self.db).values_list('province_id', flat=True))
+        self.used_ids = set(self.objects.values_list('city_id', flat=True))
+
+    def build(self, item):
+        province_id = (item.get('province') or {}).get('province_id')
+        if province_id not in self.province_ids:
+            return None
+        city = City(
+            name_fa=item['name_fa'],
+            name_en=item['name_en'],
+            province_id=province_id,
+            location=parse_point(item.get('location')),
+        )
+        if self.key(city) not in self.existing and item['city_id'] not in self.used_ids:
+            city.city_id = item['city_id']
+            self.used_ids.add(city.city_id)
+        return city
+
+    def before_write(self, obj):
+        obj.sync_search_name()
+
+
+class VillageLoader(RegionLoader):
+    model = Village
+    fixture = 'villages.json'
+    key_fields = ('city_id', 'name_en')
+    update_fields = ('name_fa', 'search_name', 'location')
+
+    def prepare(self):
+        super().prepare()
+        self.city_ids = set(City.objects.using(self.db).values_list('city_id', flat=True))
+        self.used_ids = set(self.objects.values_list('village_id', flat=True))
+
+    def build(self, item):
+        city_id = (item.get('city') or {}).get('city_id')
+        if city_id not in self.city_ids:
+            return None
+        village = Village(
+            city_id=city_id,
+            name_fa=item['name_fa'],
+            name_en=item['name_en'],
+            location=parse_point(item.get('location')),
+        )
+        if self.key(village) not in self.existing and item.get('village_id') not in self.used_ids:
+            village.village_id = item.get('village_id')
+            self.used_ids.add(village.village_id)
+        return village
+
+    def before_write(self, obj):
+        obj.sync_search_name()
+
+
+class FacilityLoader(BulkLoader):
+    """
+    مکان‌ها با کلید (name_fa, city)؛ شهر اول با city_id و در غیر این صورت با نام فارسی پیدا می‌شود.
+
+    زیرکلاس‌ها fixture، کلمه دسته‌بندی پیش‌فرض و مقادیر پیش‌فرض هر نوع را مشخص می‌کنند.
+    """
+    model = Facility
+    key_fields = ('name_fa', 'city_id')
+    # امتیاز fixture جایگزین می‌شود و rating_sum خالی، تا اولین نظر بعدی آن را از نو حساب کند
+    update_fields = (
+        'name_en', 'search_name', 'category', 'address', 'location', 'lat', 'lng',
+        'phone', 'email', 'website', 'description_fa', 'description_en',
+        'avg_rating', 'review_count', 'rating_sum', 'status', 'is_24_hour', 'price_tier',
+    )
+    category_keyword = None
+    defaults = {'status': True, 'is_24_hour': False, 'price_tier': 'unknown'}
+    # فیلدهایی که مقدارشان از defaults می‌آید و از fixture خوانده نمی‌شود
+    fixed_fields = ()
+
+    def prepare(self):
+        super().prepare()
+        cities = City.objects.using(self.db).order_by('city_id').values_list('city_id', 'name_fa')
+        self.city_ids = set()
+        self.city_by_name = {}
+        for city_id, name_fa in cities:
+            self.city_ids.add(city_id)
+            self.city_by_name.setdefault(name_fa, city_id)
+
+        self.categories = {c.category_id: c for c in Category.objects.using(self.db)}
+        self.default_category = None
+        if self.category_keyword:
+            self.default_category = next(
+                (c for _, c in sorted(self.categories.items()) if self.category_keyword in c.name_fa), None
+            )
+        self.amenity_ids = set(Amenity.objects.using(self.db).values_list('amenity_id', flat=True))
+        # (name_en, city_id) یکتاست؛ تکرارها مثل load_museums با شناسه رکورد متمایز می‌شوند
+        self.names_en = {
+            (name_en, city_id): (name_fa, city_id)
+            for name_en, name_fa, city_id in self.objects.values_list('name_en', 'name_fa', 'city_id')
+        }
+
+    def resolve_city(self, item):
+        city_id = item.get('city_id')
+        if city_id and city_id in self.city_ids:
+            return city_id
+        return self.city_by_name.get(item.get('city_name_fa'))
+
+    def field(self, item, name):
+        if name in self.fixed_fields:
+            return self.defaults[name]
+        return item.get(name, self.defaults[name])
+
+    def build(self, item):
+        name_fa = item.get('name_fa')
+        if not name_fa:
+            return None
+        city_id = self.resolve_city(item)
+        if city_id is None:
+            self.log(f'⚠ شهر یافت نشد: {item.get("city_name_fa")} (ID: {item.get("city_id")}) برای {name_fa}')
+            return None
+        category = self.categories.get(item.get('category_id')) or self.default_category
+        if category is None:
+            return None
+
+        name_en = item.get('name_en', '')
+        owner = self.names_en.get((name_en, city_id))
+        if owner is not None and owner != (name_fa, city_id):
+            record_id = item.get('id')
+            if record_id is None:
+                self.log(f'⚠ نام انگلیسی تکراری در این شهر: {name_en} برای {name_fa}')
+                return None
+            name_en = f'{name_en} ({record_id})'
+        self.names_en[(name_en, city_id)] = (name_fa, city_id)
+
+        return Facility(
+            name_fa=name_fa,
+            name_en=name_en,
+            city_id=city_id,
+            category=category,
+            address=item.get('address', ''),
+            location=parse_point(item.get('location')),
+            phone=item.get('phone', ''),
+            email=item.get('email', ''),
+            website=item.get('website', ''),
+            description_fa=item.get('description_fa', ''),
+            description_en=item.get('description_en', ''),
+            avg_rating=item.get('avg_rating', 0.0),
+            review_count=item.get('review_count', 0),
+            status=self.field(item, 'status'),
+            is_24_hour=self.field(item, 'is_24_hour'),
+            price_tier=self.field(item, 'price_tier'),
+        )
+
+    def before_write(self, obj):
+        obj.sync_coordinates()
+        obj.sync_search_name()
+
+    def after_write(self, pairs):
+        # مثل amenities.set(): امکانات رکوردهایی که در fixture لیست amenities دارند جایگزین می‌شود
+        # لیست خالی هم امکانات قبلی را پاک می‌کند؛ رکورد بدون کلید amenities دست نمی‌خورد
+        amenities = {
+            obj.pk: [a for a in item['amenities'] or () if a in self.amenity_ids]
+            for obj, item in pairs if 'amenities' in item
+        }
+        if not amenities:
+            return
+        FacilityAmenity.objects.using(self.db).filter(facility_id__in=amenities).delete()
+        rows = [
+            FacilityAmenity(facility_id=fac_id, amenity_id=amenity_id)
+            for fac_id, amenity_ids in amenities.items()
+            for amenity_id in dict.fromkeys(amenity_ids)
+        ]
+        if rows:
+            FacilityAmenity.objects.using(self.db).bulk_create(rows, ignore_conflicts=True)
+
+
+class HotelLoader(FacilityLoader):
+    fixture = 'hotels.json'
+    category_keyword = 'هتل'
+    fixed_fields = ('status',)
+
+
+class HospitalLoader(FacilityLoader):
+    fixture = 'hospitals.json'
+    category_keyword = 'بیمارستان'
+    defaults = {'status': True, 'is_24_hour': True, 'price_tier': 'low'}
+    fixed_fields = ('status',)
+
+
+class MuseumLoader(FacilityLoader):
+    fixture = 'museums.json'
+    category_keyword = 'موزه'
+    defaults = {'status': True, 'is_24_hour': False, 'price_tier': 'moderate'}
+    fixed_fields = ('is_24_hour',)
+
+
+class RestaurantLoader(FacilityLoader):
+    fixture = 'restaurants.json'
+    category_keyword = 'رستوران'
+    defaults = {'status': True, 'is_24_hour': False, 'price_tier': 'moderate'}
+
+
+class LoaderCommand(BaseCommand):
+    """دستور مدیریتی مشترک load_* ؛ زیرکلاس فقط loader_class را تعیین می‌کند"""
+    loader_class = None
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', type=str, default='team4')
+        parser.add_argument('--file', type=str, default=None, help='Fixture path (default: team4/fixtures/...)')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        loader = self.loader_class(
+            database=options['database'],
+            batch_size=options['batch_size'],
+            log=lambda message: self.stdout.write(self.style.WARNING(message)),
+        )
+        path = options['file']
+        if path and not os.path.exists(path):
+            path = os.path.join(FIXTURES_DIR, path)
+        path = path or os.path.join(FIXTURES_DIR, loader.fixture)
+        if not os.path.exists(path):
+            self.stdout.write(self.style.ERROR(f'❌ File not found: {path}'))
+            return
+        stats = loader.load(path)
+        self.stdout.write(self.style.SUCCESS(f'✅ {self.loader_class.model.__name__}: {stats}'))
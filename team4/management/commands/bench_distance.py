@@ -0,0 +1,90 @@
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from team4.fields import Point
+from team4.models import Facility
+from team4.services.facility_service import FacilityService
+from team4.services.geo_service import GeoService
+
+FIXTURES_DIR = Path(__file__).resolve().parents[2] / 'fixtures'
+FACILITY_FIXTURES = ['hotels.json', 'hospitals.json', 'museums.json']
+
+
+def _per_object_sort(facilities, reference_point):
+    """
+    The previous sort_by_distance, kept here as the baseline.
+    """
+    facilities_with_distance = []
+    for facility in facilities:
+        distance = facility.calculate_distance_to(reference_point)
+        if distance is not None:
+            facilities_with_distance.append({
+                'facility': facility,
+                'distance_km': round(distance, 2)
+            })
+    facilities_with_distance.sort(key=lambda x: x['distance_km'])
+    return facilities_with_distance
+
+
+class Command(BaseCommand):
+    help = 'Compare per-object distance sorting with the NumPy kernel on the bundled facility fixtures.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queries', type=int, default=50, help='Number of reference points (city centres)')
+
+    def handle(self, *args, **options):
+        facilities = self._load_facilities()
+        with open(FIXTURES_DIR / 'cities.json', encoding='utf-8') as f:
+            cities = json.load(f)
+        step = max(len(cities) // options['queries'], 1)
+        centres = [
+            Point(city['location']['longitude'], city['location']['latitude'])
+            for city in cities[::step][:options['queries']]
+        ]
+        self.stdout.write(f'{len(facilities)} facilities, {len(centres)} reference points')
+
+        runs = [
+            ('before: per-object loop', _per_object_sort),
+            ('after: NumPy kernel', FacilityService.sort_by_distance),
+        ]
+        rankings = {}
+        for label, sort in runs:
+            elapsed, rankings[label] = 0.0, []
+            for centre in centres:
+                started = time.perf_counter()
+                ranked = sort(facilities, centre)
+                elapsed += time.perf_counter() - started
+                rankings[label].append([row['distance_km'] for row in ranked])
+            self.stdout.write(f'{label:<26} {elapsed * 1000 / len(centres):>8.2f} ms/query')
+
+        lats = np.array([facility.lat for facility in facilities])
+        lngs = np.array([facility.lng for facility in facilities])
+        started = time.perf_counter()
+        for centre in centres:
+            GeoService.distance_kernel(lats, lngs, centre.latitude, centre.longitude)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'{"kernel only (arrays)":<26} {elapsed * 1000 / len(centres):>8.2f} ms/query')
+
+        before, after = rankings.values()
+        mismatches = sum(old != new for old, new in zip(before, after))
+        self.stdout.write(f'rankings differing in distances: {mismatches}')
+
+    def _load_facilities(self):
+        facilities = []
+        for name in FACILITY_FIXTURES:
+            with open(FIXTURES_DIR / name, encoding='utf-8') as f:
+                for item in json.load(f):
+                    location = item.get('location') or {}
+                    if location.get('latitude') is None or location.get('longitude') is None:
+                        continue
+                    facility = Facility(
+                        name_fa=item.get('name_fa', ''),
+                        location=Point(location['longitude'], location['latitude']),
+                    )
+                    facility.sync_coordinates()
+                    facilities.append(facility)
+        return facilities
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from team4.models import Facility
+from team4.services.search_service import SearchService
+
+DEFAULT_QUERIES = ['هتل', 'بیمارستان امام', 'موزه ملی', 'پارس', 'كوثر', 'کافی‌شاپ', 'hotel', 'Azadi', 'شهید بهشتی']
+
+
+class Command(BaseCommand):
+    help = 'Compare icontains name search with SearchService on the facilities in the database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', type=str, default='team4')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('queries', nargs='*', help='Search phrases (default: a fixed mix of Persian/English)')
+
+    def handle(self, *args, **options):
+        facilities = Facility.objects.using(options['database']).filter(status=True)
+        self.stdout.write(f'{facilities.count()} facilities, backend: {facilities.db} ({self._backend(facilities)})')
+        self.stdout.write(f'{"query":<20} {"icontains ms":>13} {"hits":>6} {"search ms":>10} {"hits":>6}')
+
+        for query in options['queries'] or DEFAULT_QUERIES:
+            old = facilities.filter(Q(name_fa__icontains=query) | Q(name_en__icontains=query)).order_by('-avg_rating')
+            new = SearchService.search(facilities, query).order_by('-relevance', '-avg_rating')
+            old_ms, old_hits = self._time(old, options['repeat'])
+            new_ms, new_hits = self._time(new, options['repeat'])
+            self.stdout.write(f'{query:<20} {old_ms:>13.2f} {old_hits:>6} {new_ms:>10.2f} {new_hits:>6}')
+
+    def _backend(self, queryset):
+        probe = SearchService.search(queryset, 'probe')
+        return 'FULLTEXT ngram' if 'MATCH' in str(probe.query) else 'normalized contains'
+
+    def _time(self, queryset, repeat):
+        """Average ms for one first page of 20 plus the total count, as the list endpoint runs them"""
+        started = time.perf_counter()
+        for _ in range(repeat):
+            list(queryset[:20])
+            hits = queryset.count()
+        return (time.perf_counter() - started) * 1000 / repeat, hits
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from team4.services.rating_service import RatingService
+
+
+class Command(BaseCommand):
+    help = 'Recompute facility rating_sum/review_count/avg_rating from approved reviews and fix any drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', type=str, default='team4')
+        parser.add_argument('--dry-run', action='store_true', help='Report drifted facilities without fixing them')
+        parser.add_argument('facility_ids', nargs='*', type=int, help='Facilities to check (default: all with reviews)')
+
+    def handle(self, *args, **options):
+        drifted = RatingService.reconcile(
+            options['facility_ids'] or None,
+            using=options['database'],
+            dry_run=options['dry_run'],
+        )
+        for fac_id, (old_sum, old_count, old_avg), (new_sum, new_count, new_avg) in drifted:
+            self.stdout.write(
+                f'  facility {fac_id}: sum {old_sum} -> {new_sum}, '
+                f'count {old_count} -> {new_count}, avg {old_avg} -> {new_avg}'
+            )
+        verb = 'would be fixed' if options['dry_run'] else 'fixed'
+        self.stdout.write(self.style.SUCCESS(f'✅ {len(drifted)} facilities {verb}'))
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from team4.services.region_index import region_index
+
+DEFAULT_QUERIES = ['شی', 'شیراز', 'اصف', 'بندر عباس', 'كرج', 'tehr', 'a']
+
+
+class Command(BaseCommand):
+    help = 'Build the in-memory region index and print its size, build time and query latency.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument('queries', nargs='*', help='Queries to time (default: a fixed Persian/English mix)')
+
+    def handle(self, *args, **options):
+        region_index.build()
+        stats = region_index.stats()
+        self.stdout.write(
+            f"{stats['entries']} regions, {stats['gram_keys']} trigrams, {stats['prefix_keys']} prefixes, "
+            f"{stats['memory_bytes'] / 1024:.0f} KiB, built in {stats['build_ms']:.1f} ms"
+        )
+        for query in options['queries'] or DEFAULT_QUERIES:
+            started = time.perf_counter()
+            for _ in range(options['repeat']):
+                results = region_index.search(query)
+            elapsed_us = (time.perf_counter() - started) * 1e6 / options['repeat']
+            names = ', '.join(result['name'] for result in results[:3])
+            self.stdout.write(f'{query:<12} {elapsed_us:>8.1f} µs  {len(results):>3} results  {names}')
@@ -0,0 +1,36 @@
+from django.db import migrations, models
+
+
+def copy_coordinates(apps, schema_editor):
+    # location فقط روی MySQL ستون POINT واقعی است؛ روی بقیه دیتابیس‌ها مختصاتی برای کپی نیست
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    # ستون POINT بدون SRID است: ST_X طول و ST_Y عرض جغرافیایی
+    schema_editor.execute(
+        'UPDATE facilities_facility SET lat = ST_Y(location), lng = ST_X(location) WHERE location IS NOT NULL'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team4', '0006_facility_price_tier'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='facility',
+            name='lat',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='عرض جغرافیایی (ایندکس)'),
+        ),
+        migrations.AddField(
+            model_name='facility',
+            name='lng',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='طول جغرافیایی (ایندکس)'),
+        ),
+        migrations.AddIndex(
+            model_name='facility',
+            index=models.Index(fields=['lat', 'lng'], name='idx_facility_lat_lng'),
+        ),
+        migrations.RunPython(copy_coordinates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 4.2.27 on 2026-10-18 04:25
+
+from django.db import migrations, models
+
+from team4.normalization import search_text
+
+FULLTEXT_INDEX = 'ft_facility_search_name'
+
+
+def fill_search_names(apps, schema_editor):
+    db_alias = schema_editor.connection.alias
+    for model_name in ('Province', 'City', 'Village', 'Facility'):
+        model = apps.get_model('team4', model_name)
+        batch = []
+        for obj in model.objects.using(db_alias).only('pk', 'name_fa', 'name_en').iterator(chunk_size=2000):
+            obj.search_name = search_text(obj.name_fa, obj.name_en)
+            batch.append(obj)
+            if len(batch) >= 2000:
+                model.objects.using(db_alias).bulk_update(batch, ['search_name'])
+                batch = []
+        if batch:
+            model.objects.using(db_alias).bulk_update(batch, ['search_name'])
+
+
+def add_fulltext_index(apps, schema_editor):
+    # FULLTEXT با پارسر ngram فقط در MySQL وجود دارد؛ روی بقیه دیتابیس‌ها SearchService از contains استفاده می‌کند
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    schema_editor.execute(
+        f'ALTER TABLE facilities_facility ADD FULLTEXT INDEX {FULLTEXT_INDEX} (search_name) WITH PARSER ngram'
+    )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    schema_editor.execute(f'ALTER TABLE facilities_facility DROP INDEX {FULLTEXT_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team4', '0007_facility_lat_lng'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='city',
+            name='search_name',
+            field=models.CharField(blank=True, editable=False, max_length=250, verbose_name='نام نرمال\u200cشده (جستجو)'),
+        ),
+        migrations.AddField(
+            model_name='facility',
+            name='search_name',
+            field=models.CharField(blank=True, editable=False, max_length=500, verbose_name='نام نرمال\u200cشده (جستجو)'),
+        ),
+        migrations.AddField(
+            model_name='province',
+            name='search_name',
+            field=models.CharField(blank=True, editable=False, max_length=250, verbose_name='نام نرمال\u200cشده (جستجو)'),
+        ),
+        migrations.AddField(
+            model_name='village',
+            name='search_name',
+            field=models.CharField(blank=True, editable=False, max_length=250, verbose_name='نام نرمال\u200cشده (جستجو)'),
+        ),
+        migrations.RunPython(fill_search_names, migrations.RunPython.noop),
+        migrations.RunPython(add_fulltext_index, drop_fulltext_index),
+    ]
@@ -0,0 +1,42 @@
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_rating_sum(apps, schema_editor):
+    Facility = apps.get_model('team4', 'Facility')
+    Review = apps.get_model('team4', 'Review')
+    db_alias = schema_editor.connection.alias
+    reviews = Review.objects.using(db_alias).order_by()
+    approved = {
+        row['facility_id']: (row['total'], row['count'])
+        for row in reviews.filter(is_approved=True).values('facility_id').annotate(
+            total=Sum('rating'), count=Count('review_id')
+        )
+    }
+    # مکان‌های بدون نظر امتیاز fixture خود را نگه می‌دارند (rating_sum خالی)
+    facility_ids = set(reviews.values_list('facility_id', flat=True))
+    batch = []
+    for facility in Facility.objects.using(db_alias).filter(pk__in=facility_ids).only(
+        'fac_id', 'rating_sum', 'review_count', 'avg_rating'
+    ):
+        total, count = approved.get(facility.pk, (0, 0))
+        facility.rating_sum, facility.review_count = total, count
+        facility.avg_rating = round(total / count, 2) if count else 0
+        batch.append(facility)
+    Facility.objects.using(db_alias).bulk_update(batch, ['rating_sum', 'review_count', 'avg_rating'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team4', '0008_search_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='facility',
+            name='rating_sum',
+            field=models.IntegerField(blank=True, editable=False, null=True, verbose_name='مجموع امتیازات'),
+        ),
+        migrations.RunPython(backfill_rating_sum, migrations.RunPython.noop),
+    ]
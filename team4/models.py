@@ -1,8 +1,9 @@
-from django.db import models
+from django.db import models, router, transaction
 from django.core.validators import MinValueValidator, MaxValueValidator, EmailValidator
 from django.core.exceptions import ValidationError
 from django.conf import settings
 from .fields import PointField, Point
+from .normalization import search_text
 import math
 
 
@@ -23,11 +24,25 @@ class PriceTier(models.TextChoices):
     LUXURY = 'luxury', 'لوکس'
 
 
+class SearchNameMixin:
+    """پر کردن ستون search_name از نسخه نرمال‌شده name_fa و name_en هنگام ذخیره"""
 
-class Province(models.Model):
+    def sync_search_name(self):
+        self.search_name = search_text(self.name_fa, self.name_en)
+
+    def save(self, *args, **kwargs):
+        self.sync_search_name()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'name_fa', 'name_en'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'search_name'}
+        super().save(*args, **kwargs)
+
+
+class Province(SearchNameMixin, models.Model):
     province_id = models.AutoField(primary_key=True)
     name_fa = models.CharField(max_length=100, verbose_name="نام فارسی")
     name_en = models.CharField(max_length=100, unique=True, verbose_name="نام انگلیسی")
+    search_name = models.CharField(max_length=250, blank=True, editable=False, verbose_name="نام نرمال‌شده (جستجو)")
     location = PointField(null=True, blank=True, verbose_name="موقعیت جغرافیایی مرکز")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -61,7 +76,7 @@ class Province(models.Model):
         return self.location.longitude if self.location else None
 
 
-class City(models.Model):
+class City(SearchNameMixin, models.Model):
     city_id = models.AutoField(primary_key=True)
     province = models.ForeignKey(
         Province,
@@ -71,6 +86,7 @@ class City(models.Model):
     )
     name_fa = models.CharField(max_length=100, verbose_name="نام فارسی")
     name_en = models.CharField(max_length=100, verbose_name="نام انگلیسی")
+    search_name = models.CharField(max_length=250, blank=True, editable=False, verbose_name="نام نرمال‌شده (جستجو)")
     location = PointField(verbose_name="موقعیت جغرافیایی")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -101,7 +117,7 @@ class City(models.Model):
         return self.location.longitude if self.location else None
 
 
-class Village(models.Model):
+class Village(SearchNameMixin, models.Model):
     village_id = models.AutoField(primary_key=True)
     city = models.ForeignKey(
         City,
@@ -111,6 +127,7 @@ class Village(models.Model):
     )
     name_fa = models.CharField(max_length=100, verbose_name="نام فارسی")
     name_en = models.CharField(max_length=100, verbose_name="نام انگلیسی")
+    search_name = models.CharField(max_length=250, blank=True, editable=False, verbose_name="نام نرمال‌شده (جستجو)")
     location = PointField(null=True, blank=True, verbose_name="موقعیت جغرافیایی")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -192,10 +209,12 @@ class Amenity(models.Model):
         return self.name_fa
 
 
-class Facility(models.Model):
+class Facility(SearchNameMixin, models.Model):
     fac_id = models.BigAutoField(primary_key=True)
     name_fa = models.CharField(max_length=200, verbose_name="نام فارسی")
     name_en = models.CharField(max_length=200, verbose_name="نام انگلیسی")
+    # name_fa و name_en نرمال‌شده؛ روی MySQL ایندکس FULLTEXT (ngram) دارد
+    search_name = models.CharField(max_length=500, blank=True, editable=False, verbose_name="نام نرمال‌شده (جستجو)")
     
     category = models.ForeignKey(
         Category,
@@ -213,6 +232,9 @@ class Facility(models.Model):
     
     address = models.TextField(verbose_name="آدرس")
     location = PointField(verbose_name="موقعیت جغرافیایی") 
+    # کپی مختصات location در ستون‌های عددی ایندکس‌دار، برای پیش‌فیلتر bounding box
+    lat = models.FloatField(null=True, blank=True, editable=False, verbose_name="عرض جغرافیایی (ایندکس)")
+    lng = models.FloatField(null=True, blank=True, editable=False, verbose_name="طول جغرافیایی (ایندکس)")
     phone = models.CharField(max_length=20, blank=True, verbose_name="تلفن")
     email = models.EmailField(blank=True, validators=[EmailValidator()], verbose_name="ایمیل")
     website = models.URLField(max_length=200, blank=True, verbose_name="وبسایت")
@@ -230,6 +252,8 @@ class Facility(models.Model):
         validators=[MinValueValidator(0)],
         verbose_name="تعداد نظرات"
     )
+    # مجموع امتیاز نظرات تاییدشده، برای بروزرسانی افزایشی avg_rating (خالی: امتیاز از fixture)
+    rating_sum = models.IntegerField(null=True, blank=True, editable=False, verbose_name="مجموع امتیازات")
     
     status = models.BooleanField(default=True, verbose_name="وضعیت فعال")
     is_24_hour = models.BooleanField(default=False, verbose_name="24 ساعته")
@@ -261,11 +285,27 @@ class Facility(models.Model):
             models.Index(fields=['category'], name='idx_facility_category'),
             models.Index(fields=['city'], name='idx_facility_city'),
             models.Index(fields=['status'], name='idx_facility_status'),
+            models.Index(fields=['lat', 'lng'], name='idx_facility_lat_lng'),
         ]
 
     def __str__(self):
         return f"{self.name_fa} - {self.city.name_fa}"
 
+    def sync_coordinates(self):
+        """همگام‌سازی lat/lng با location"""
+        point = self._meta.get_field('location').to_python(self.location)
+        if isinstance(point, Point):
+            self.lat, self.lng = point.latitude, point.longitude
+        else:
+            self.lat = self.lng = None
+
+    def save(self, *args, **kwargs):
+        self.sync_coordinates()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'location' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'lat', 'lng'}
+        super().save(*args, **kwargs)
+
     def get_coordinates(self):
         if self.location:
             return (self.location.longitude, self.location.latitude)
@@ -298,11 +338,23 @@ class Facility(models.Model):
         # محاسبه فاصله با استفاده از Haversine formula
         return self.location.distance(point)
 
+    def _prefetched(self, related_name):
+        """اشیای prefetch شده یک رابطه، یا None اگر prefetch نشده باشد"""
+        return getattr(self, '_prefetched_objects_cache', {}).get(related_name)
+
     def get_primary_image(self):
-        return self.images.filter(is_primary=True).first()
+        images = self._prefetched('images')
+        if images is None:
+            return self.images.filter(is_primary=True).first()
+        # بدون کوئری اضافه، با همان ترتیب first() (کوچک‌ترین شناسه)
+        return min((image for image in images if image.is_primary), key=lambda image: image.pk, default=None)
 
     def get_min_price(self):
         """دریافت کمترین قیمت - اگر قیمت دقیق نداشت، بر اساس tier تخمین میزنه"""
+        pricing_set = self._prefetched('pricing_set')
+        if pricing_set is not None:
+            return min((pricing.price for pricing in pricing_set if pricing.status), default=None)
+
         pricing = self.pricing_set.filter(status=True).order_by('price').first()
         if pricing:
             return pricing.price
@@ -504,31 +556,65 @@ class Review(models.Model):
         if self.rating < 1 or self.rating > 5:
             raise ValidationError("امتیاز باید بین 1 تا 5 باشد")
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # سهم ذخیره‌شده نظر در امتیاز مکان، برای محاسبه اختلاف در save/delete
+        if {'facility_id', 'rating', 'is_approved'} <= instance.__dict__.keys():
+            instance._stored_contribution = instance.rating_contribution()
+        return instance
+
+    def rating_contribution(self):
+        """سهم نظر در امتیاز مکان: (facility_id, rating) برای نظر تاییدشده، وگرنه None"""
+        if self.is_approved:
+            return self.facility_id, self.rating
+        return None
+
+    def stored_rating_contribution(self, using):
+        """سهم فعلی این نظر در دیتابیس (None برای نظر جدید یا تاییدنشده)"""
+        if self._state.adding:
+            return None
+        if not hasattr(self, '_stored_contribution'):
+            stored = Review.objects.using(using).filter(pk=self.pk).values('facility_id', 'rating', 'is_approved').first()
+            self._stored_contribution = (
+                (stored['facility_id'], stored['rating']) if stored and stored['is_approved'] else None
+            )
+        return self._stored_contribution
+
     def save(self, *args, **kwargs):
-        self.full_clean()
-        super().save(*args, **kwargs)
-        # بروزرسانی امتیاز میانگین و تعداد نظرات مکان
-        self.update_facility_rating()
+        # full_clean بدون validate_unique و بررسی کلیدهای خارجی: یکتایی (user, facility)
+        # و وجود مکان را constraint های دیتابیس تضمین می‌کنند
+        self.clean_fields(exclude=['user', 'facility'])
+        self.clean()
+        from team4.services.rating_service import RatingService
+
+        using = kwargs.get('using') or router.db_for_write(Review, instance=self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not {'facility', 'facility_id', 'rating', 'is_approved'} & set(update_fields):
+            super().save(*args, **kwargs)
+            return
+
+        with transaction.atomic(using=using):
+            before = self.stored_rating_contribution(using)
+            super().save(*args, **kwargs)
+            after = self.rating_contribution()
+            # بروزرسانی افزایشی امتیاز میانگین و تعداد نظرات مکان
+            RatingService.apply_change(before, after, using)
+        self._stored_contribution = after
 
     def delete(self, *args, **kwargs):
-        super().delete(*args, **kwargs)
-        # بروزرسانی امتیاز میانگین و تعداد نظرات مکان
-        self.update_facility_rating()
+        from team4.services.rating_service import RatingService
+
+        using = kwargs.get('using') or router.db_for_write(Review, instance=self)
+        with transaction.atomic(using=using):
+            before = self.stored_rating_contribution(using)
+            result = super().delete(*args, **kwargs)
+            RatingService.apply_change(before, None, using)
+        self._stored_contribution = None
+        return result
 
     def update_facility_rating(self):
-        """بروزرسانی امتیاز میانگین و تعداد نظرات مکان"""
-        from django.db.models import Avg, Count
-        
-        # محاسبه امتیاز میانگین و تعداد نظرات تایید شده
-        stats = Review.objects.filter(
-            facility=self.facility,
-            is_approved=True
-        ).aggregate(
-            avg_rating=Avg('rating'),
-            review_count=Count('review_id')
-        )
-        
-        # بروزرسانی مکان
-        self.facility.avg_rating = stats['avg_rating'] or 0.00
-        self.facility.review_count = stats['review_count'] or 0
-        self.facility.save(update_fields=['avg_rating', 'review_count'])
+        """محاسبه کامل امتیاز میانگین و تعداد نظرات مکان از روی نظرات تاییدشده"""
+        from team4.services.rating_service import RatingService
+
+        RatingService.reconcile([self.facility_id], using=self._state.db or router.db_for_write(Review, instance=self))
@@ -0,0 +1,42 @@
+"""
+نرمال‌سازی متن فارسی/انگلیسی برای جستجو
+
+نویسه‌های عربی هم‌ارز با فارسی یکی می‌شوند (ي/ی، ك/ک، ...)، نیم‌فاصله و اعراب حذف
+می‌شوند و ارقام فارسی/عربی به لاتین تبدیل می‌شوند تا نوشتارهای مختلف یک نام یکسان شوند.
+"""
+import re
+
+_PERSIAN_CHARS = str.maketrans({
+    "\u064a": "\u06cc",  # ي -> ی
+    "\u0649": "\u06cc",  # ى -> ی
+    "\u0643": "\u06a9",  # ك -> ک
+    "\u0629": "\u0647",  # ة -> ه
+    "\u06c0": "\u0647",  # ۀ -> ه
+    "\u0623": "\u0627",  # أ -> ا
+    "\u0625": "\u0627",  # إ -> ا
+    "\u0671": "\u0627",  # ٱ -> ا
+    "\u0624": "\u0648",  # ؤ -> و
+    "\u200c": "",  # نیم‌فاصله: «هتل‌ها» و «هتلها» یکی هستند
+    "\u200d": "",
+    "\u0640": "",  # کشیده
+    **{chr(0x06F0 + d): str(d) for d in range(10)},  # ارقام فارسی
+    **{chr(0x0660 + d): str(d) for d in range(10)},  # ارقام عربی
+})
+_DIACRITICS = re.compile("[\u064b-\u065f\u0670]")
+_TOKEN = re.compile(r'\w+')
+
+
+def normalize(text):
+    """متن نرمال‌شده با حروف کوچک و فاصله‌های یکتا"""
+    if not text:
+        return ''
+    return ' '.join(tokenize(text))
+
+
+def tokenize(text):
+    return _TOKEN.findall(_DIACRITICS.sub('', text.translate(_PERSIAN_CHARS)).lower())
+
+
+def search_text(*parts):
+    """مقدار ستون search_name از نام‌های یک رکورد"""
+    return ' '.join(filter(None, (normalize(part) for part in parts)))
@@ -0,0 +1,212 @@
+"""
+صفحه‌بندی keyset (cursor) و شمارش کش‌شده برای لیست مکان‌ها و نظرات
+
+در حالت keyset به جای OFFSET، صفحه بعد با شرط «بعد از کلید آخرین رکورد صفحه قبل» روی همان
+ترتیب خوانده می‌شود، پس هزینه هر صفحه به عمق آن بستگی ندارد. COUNT فقط با درخواست (count=true)
+و از کش محاسبه می‌شود.
+"""
+import base64
+import binascii
+import bisect
+import datetime
+import decimal
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.core.exceptions import EmptyResultSet, FieldDoesNotExist, FieldError
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import FloatField, Q, QuerySet
+from django.utils.functional import cached_property
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+# مدت اعتبار تعداد نتایج یک کوئری در کش (ثانیه)
+COUNT_CACHE_TTL = 60
+
+
+def cached_count(queryset):
+    """
+    COUNT(*) کوئری با کش COUNT_CACHE_TTL ثانیه‌ای، با کلید SQL بدون ORDER BY
+    """
+    queryset = queryset.order_by()
+    try:
+        sql = str(queryset.query)
+    except EmptyResultSet:
+        return 0
+    key = 'team4:count:' + hashlib.md5(f'{queryset.db}:{sql}'.encode()).hexdigest()
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, COUNT_CACHE_TTL)
+    return count
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator جنگو با تعداد کش‌شده، تا صفحه‌های بعدی COUNT را تکرار نکنند"""
+
+    @cached_property
+    def count(self):
+        if isinstance(self.object_list, QuerySet):
+            return cached_count(self.object_list)
+        return len(self.object_list)
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    return value
+
+
+class KeysetPagination(BasePagination):
+    """
+    صفحه‌بندی keyset رو به جلو
+
+    QuerySet ها بر اساس order_by خودشان صفحه‌بندی می‌شوند؛ آخرین فیلد ترتیب باید یکتا باشد
+    (کلید اصلی). لیست‌های مرتب‌شده در حافظه (مثل نتایج فاصله) با paginate_list و تابع key.
+
+    Query Parameters:
+    - cursor: از لینک next صفحه قبل (خالی برای صفحه اول)
+    - page_size: تعداد نتایج هر صفحه
+    - count: با true تعداد کل (کش‌شده) هم برگردانده می‌شود
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+
+    @classmethod
+    def requested(cls, request):
+        return cls.cursor_query_param in request.query_params
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param], strict=True, cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def decode_cursor(self, request, converters):
+        """
+        مقادیر cursor، هر کدام با تبدیل‌کننده هم‌اندیس در converters (مثلا Field.to_python)
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            if not isinstance(values, list) or len(values) != len(converters) or None in values:
+                raise ValueError(values)
+            return [convert(value) for convert, value in zip(converters, values)]
+        except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, DjangoValidationError):
+            raise ValidationError({self.cursor_query_param: 'cursor نامعتبر است'})
+
+    def encode_cursor(self, values):
+        data = json.dumps([_encode_value(value) for value in values], separators=(',', ':'))
+        return base64.urlsafe_b64encode(data.encode()).decode()
+
+    @staticmethod
+    def ordering(queryset):
+        """(نام فیلد، نزولی؟) برای هر فیلد order_by"""
+        fields = [field for field in queryset.query.order_by if isinstance(field, str)]
+        if not fields or len(fields) != len(queryset.query.order_by):
+            raise ValueError('keyset pagination needs a queryset ordered by plain field names')
+        return [(field.lstrip('-'), field.startswith('-')) for field in fields]
+
+    @staticmethod
+    def output_field(queryset, name):
+        """فیلد مدل (یا output_field یک annotation) که نام ترتیب name به آن اشاره می‌کند"""
+        annotation = queryset.query.annotations.get(name)
+        if annotation is not None:
+            try:
+                return annotation.output_field
+            except FieldError:
+                # نوع خروجی annotation مشخص نیست (مثلا ترکیب فیلدهای مختلف)؛ امتیازها عددی‌اند
+                return FloatField()
+        opts = queryset.model._meta
+        *path, last = name.split('__')
+        try:
+            for part in path:
+                opts = opts.get_field(part).related_model._meta
+            return opts.get_field(last)
+        except (AttributeError, FieldDoesNotExist):
+            raise ValueError(f'keyset pagination cannot order by {name!r}')
+
+    @staticmethod
+    def after(ordering, values):
+        """شرط «بعد از values» برای ترتیب ordering: (a < v1) | (a = v1 & b > v2) | ..."""
+        condition = Q()
+        for index, (field, descending) in enumerate(ordering):
+            branch = Q(**{previous: value for (previous, _), value in zip(ordering[:index], values)})
+            branch &= Q(**{f'{field}__{"lt" if descending else "gt"}': values[index]})
+            condition |= branch
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        ordering = self.ordering(queryset)
+        self.page_size_value = self.get_page_size(request)
+        self.total = cached_count(queryset) if self._count_requested() else None
+
+        converters = [self.output_field(queryset, field).to_python for field, _ in ordering]
+        cursor = self.decode_cursor(request, converters)
+        if cursor is not None:
+            queryset = queryset.filter(self.after(ordering, cursor))
+        rows = list(queryset[:self.page_size_value + 1])
+        page = rows[:self.page_size_value]
+        self.next_values = None
+        if len(rows) > self.page_size_value:
+            self.next_values = [getattr(page[-1], field) for field, _ in ordering]
+        return page
+
+    def paginate_list(self, items, key, request):
+        """
+        صفحه‌بندی لیست در حافظه به ترتیب صعودی key(item)؛ key باید یکتا باشد (مثلا (فاصله، شناسه))
+        """
+        self.request = request
+        self.page_size_value = self.get_page_size(request)
+        items = sorted(items, key=key)
+        keys = [list(key(item)) for item in items]
+        self.total = len(items) if self._count_requested() else None
+
+        # مقدارهای cursor به نوع اجزای کلید (مثلا float فاصله و int شناسه) تبدیل می‌شوند
+        cursor = self.decode_cursor(request, [type(part) for part in keys[0]]) if items else None
+        start = bisect.bisect_right(keys, cursor) if cursor is not None else 0
+        page = items[start:start + self.page_size_value]
+        self.next_values = None
+        if start + self.page_size_value < len(items):
+            self.next_values = keys[start + self.page_size_value - 1]
+        return page
+
+    def _count_requested(self):
+        return self.request.query_params.get(self.count_query_param, '').lower() in ('1', 'true')
+
+    def get_next_link(self):
+        if self.next_values is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_values))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'count': self.total,
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'count': {'type': 'integer', 'nullable': True},
+                'results': schema,
+            },
+        }
@@ -1,3 +1,4 @@
+from django.db.models import prefetch_related_objects
 from rest_framework import serializers
 from .fields import Point
 from team4.models import (
@@ -73,7 +74,30 @@ class ImageSerializer(serializers.ModelSerializer):
 
 
 
+class FacilityListPageSerializer(serializers.ListSerializer):
+    """
+    Loads the relations FacilityListSerializer reads for the whole page at once,
+    so a page costs a fixed number of queries instead of several per row.
+    """
+    
+    def to_representation(self, data):
+        facilities = list(data.all() if hasattr(data, 'all') else data)
+        prefetch_list_relations(facilities)
+        return super().to_representation(facilities)
+
+
+def prefetch_list_relations(facilities):
+    """
+    Prefetch what FacilityListSerializer (and FacilityDetailSerializer) read on
+    already-loaded facilities; relations that are already loaded are skipped.
+    """
+    prefetch_related_objects(facilities, *FacilityListSerializer.PREFETCH_RELATED)
+
+
 class FacilityListSerializer(serializers.ModelSerializer):
+    # Relations read per row; see prefetch_list_relations
+    PREFETCH_RELATED = ('category', 'city__province', 'amenities', 'pricing_set', 'images')
+    
     category = serializers.CharField(source='category.name_en', read_only=True)
     city = serializers.CharField(source='city.name_fa', read_only=True)
     province = serializers.CharField(source='city.province.name_fa', read_only=True)
@@ -93,6 +117,7 @@ class FacilityListSerializer(serializers.ModelSerializer):
             'primary_image', 'price_from', 'price_tier', 'price_tier_display',
             'is_24_hour', 'amenities'
         ]
+        list_serializer_class = FacilityListPageSerializer
     
     def get_location(self, obj):
         if obj.location:
@@ -153,6 +178,7 @@ class FacilityDetailSerializer(serializers.ModelSerializer):
             'amenities', 'pricing', 'images',
             'created_at', 'updated_at'
         ]
+        list_serializer_class = FacilityListPageSerializer
     
     def get_location(self, obj):
         if obj.location:
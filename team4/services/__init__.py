@@ -2,5 +2,9 @@
 Services Layer - Business Logic
 """
 from .facility_service import FacilityService
+from .geo_service import GeoService
+from .rating_service import RatingService
+from .routing_service import RoutingService
+from .search_service import SearchService
 
-__all__ = ['FacilityService']
+__all__ = ['FacilityService', 'GeoService', 'RatingService', 'RoutingService', 'SearchService']
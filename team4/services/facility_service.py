@@ -1,7 +1,9 @@
 from django.db.models import Q, F, Count, Min, Avg
 from django.core.exceptions import ObjectDoesNotExist
 from ..fields import Point
-from team4.models import Facility, City, Category, Amenity, Pricing
+from .geo_service import GeoService
+from .search_service import SearchService
+from team4.models import Facility, FacilityAmenity, City, Category, Amenity, Pricing
 
 
 class FacilityService:
@@ -10,12 +12,9 @@ class FacilityService:
     def search_facilities(city_name=None, category_name=None, **filters):
         queryset = Facility.objects.filter(status=True)
         
-        # فیلتر شهر
+        # فیلتر شهر (روی نام نرمال‌شده شهرها)
         if city_name:
-            queryset = queryset.filter(
-                Q(city__name_fa__icontains=city_name) | 
-                Q(city__name_en__icontains=city_name)
-            )
+            queryset = SearchService.filter_by_region(queryset, 'city', city_name)
         
         # فیلتر دسته‌بندی
         if category_name:
@@ -43,8 +42,7 @@ class FacilityService:
             if max_price:
                 facility_ids = facility_ids.filter(price__lte=max_price)
             
-            facility_ids = facility_ids.values_list('facility_id', flat=True).distinct()
-            queryset = queryset.filter(fac_id__in=facility_ids)
+            queryset = queryset.filter(fac_id__in=facility_ids.values('facility_id'))
         
         # فیلتر امتیاز
         min_rating = filters.get('min_rating')
@@ -58,36 +56,32 @@ class FacilityService:
             if isinstance(amenities, str):
                 amenities = [int(x.strip()) for x in amenities.split(',') if x.strip()]
             
+            # زیرکوئری به جای join، تا ردیف تکراری و distinct لازم نباشد
             for amenity_id in amenities:
-                queryset = queryset.filter(amenities__amenity_id=amenity_id)
+                queryset = queryset.filter(
+                    fac_id__in=FacilityAmenity.objects.filter(amenity_id=amenity_id).values('facility_id')
+                )
         
         # فیلتر 24 ساعته
         is_24_hour = filters.get('is_24_hour')
         if is_24_hour in [True, 'true', 'True', '1']:
             queryset = queryset.filter(is_24_hour=True)
         
-        return queryset.distinct()
+        return queryset
     
     @staticmethod
     def sort_by_distance(facilities, reference_point):
-        # تبدیل به Point اگر tuple است
+        # reference_point: Point یا tuple (lng, lat)
         if isinstance(reference_point, (tuple, list)):
-            reference_point = Point(reference_point[0], reference_point[1], srid=4326)
-        
-        facilities_with_distance = []
-        
-        for facility in facilities:
-            distance = facility.calculate_distance_to(reference_point)
-            if distance is not None:
-                facilities_with_distance.append({
-                    'facility': facility,
-                    'distance_km': round(distance, 2)
-                })
+            reference_point = Point(reference_point[0], reference_point[1])
         
-        # مرتب‌سازی بر اساس فاصله
-        facilities_with_distance.sort(key=lambda x: x['distance_km'])
-        
-        return facilities_with_distance
+        # محاسبه فاصله همه امکانات در یک فراخوانی برداری و مرتب‌سازی بر اساس فاصله
+        return [
+            {'facility': facility, 'distance_km': distance}
+            for facility, distance in GeoService.rank_by_distance(
+                facilities, reference_point.latitude, reference_point.longitude, decimals=2
+            )
+        ]
     
     @staticmethod
     def get_facility_details(fac_id):
@@ -136,28 +130,22 @@ class FacilityService:
         
         nearby = nearby.select_related('city', 'category').prefetch_related('amenities')
         
-        # محاسبه فاصله و فیلتر
+        # پیش‌فیلتر bounding box روی ایندکس lat/lng و سپس فاصله دقیق
+        center = center_facility.location
         nearby_with_distance = []
         
-        for facility in nearby:
-            if not facility.location:
-                continue
-                
-            distance = facility.calculate_distance_to(center_facility.location)
+        for facility, distance in GeoService.facilities_within(
+            nearby, center.latitude, center.longitude, radius_km
+        ):
+            # محاسبه زمان پیاده‌روی (فرض: 5 km/h)
+            walking_time = round((distance / 5) * 60)  # دقیقه
             
-            if distance and distance <= radius_km:
-                # محاسبه زمان پیاده‌روی (فرض: 5 km/h)
-                walking_time = round((distance / 5) * 60)  # دقیقه
-                
-                nearby_with_distance.append({
-                    'facility': facility,
-                    'distance_km': round(distance, 2),
-                    'walking_time_minutes': walking_time,
-                    'driving_time_minutes': None  # باید از Neshan API بگیریم
-                })
-        
-        # مرتب‌سازی بر اساس فاصله
-        nearby_with_distance.sort(key=lambda x: x['distance_km'])
+            nearby_with_distance.append({
+                'facility': facility,
+                'distance_km': round(distance, 2),
+                'walking_time_minutes': walking_time,
+                'driving_time_minutes': None  # باید از Neshan API بگیریم
+            })
         
         return center_facility, nearby_with_distance
     
@@ -192,9 +180,9 @@ class FacilityService:
         most_amenities_count = 0
         
         for facility in facilities:
-            # دریافت کمترین قیمت
-            min_price_obj = facility.pricing_set.filter(status=True).order_by('price').first()
-            min_price = float(min_price_obj.price) if min_price_obj else 0
+            # دریافت کمترین قیمت (از pricing_set پیش‌بارگذاری‌شده)
+            min_price = facility.get_min_price()
+            min_price = float(min_price) if min_price else 0
             
             # آپدیت کمترین قیمت
             if min_price > 0 and min_price < lowest_price:
@@ -207,8 +195,8 @@ class FacilityService:
                 highest_rating_id = facility.fac_id
             
             # دریافت امکانات
-            facility_amenities = facility.amenities.all()
-            amenity_count = facility_amenities.count()
+            facility_amenities = list(facility.amenities.all())
+            amenity_count = len(facility_amenities)
             
             if amenity_count > most_amenities_count:
                 most_amenities_count = amenity_count
@@ -223,13 +211,15 @@ class FacilityService:
             if facility.city.location and facility.location:
                 distance_from_center = facility.calculate_distance_to(facility.city.location)
             
+            primary_image = facility.get_primary_image()
+            
             # ساخت دیکشنری امکانات
             amenities_dict = {amenity.name_en: True for amenity in facility_amenities}
             
             comparison_data.append({
                 'fac_id': facility.fac_id,
                 'name_fa': facility.name_fa,
-                'image_url': facility.get_primary_image().image_url if facility.get_primary_image() else None,
+                'image_url': primary_image.image_url if primary_image else None,
                 'avg_rating': float(facility.avg_rating),
                 'price_per_night': min_price,
                 'distance_from_center_km': round(distance_from_center, 2),
@@ -0,0 +1,98 @@
+import math
+
+import numpy as np
+
+
+class GeoService:
+    """
+    محاسبات مکانی روی ستون‌های ایندکس‌دار lat/lng
+
+    جستجوی شعاعی ابتدا با یک bounding box روی ایندکس (lat, lng) کاندیداها را فیلتر
+    می‌کند؛ فاصله دقیق (Haversine) برای کل کاندیداها یکجا با NumPy محاسبه می‌شود.
+    """
+
+    EARTH_RADIUS_KM = 6371.0
+
+    @staticmethod
+    def bounding_box(lat, lng, radius_km):
+        """
+        کوچک‌ترین مستطیل (min_lat, max_lat, min_lng, max_lng) که دایره به شعاع radius_km را می‌پوشاند
+        """
+        dlat = math.degrees(radius_km / GeoService.EARTH_RADIUS_KM)
+        min_lat, max_lat = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+
+        # نزدیک قطب‌ها دایره همه طول‌های جغرافیایی را می‌پوشاند
+        cos_lat = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+        if cos_lat <= 1e-9:
+            return min_lat, max_lat, -180.0, 180.0
+        dlng = min(math.degrees(radius_km / (GeoService.EARTH_RADIUS_KM * cos_lat)), 180.0)
+        return min_lat, max_lat, max(lng - dlng, -180.0), min(lng + dlng, 180.0)
+
+    @staticmethod
+    def filter_bounding_box(queryset, lat, lng, radius_km):
+        min_lat, max_lat, min_lng, max_lng = GeoService.bounding_box(lat, lng, radius_km)
+        return queryset.filter(lat__range=(min_lat, max_lat), lng__range=(min_lng, max_lng))
+
+    @staticmethod
+    def distance_kernel(lats, lngs, lat, lng):
+        """
+        فاصله Haversine آرایه‌ای از نقاط تا (lat, lng) در یک فراخوانی
+
+        Args:
+            lats, lngs: آرایه (یا لیست) عرض و طول جغرافیایی کاندیداها
+            lat, lng: نقطه مرجع
+
+        Returns:
+            tuple: (distances_km, order) که order اندیس‌های مرتب‌شده بر اساس فاصله است
+        """
+        lat1 = np.radians(np.asarray(lats, dtype=np.float64))
+        lng1 = np.radians(np.asarray(lngs, dtype=np.float64))
+        lat2, lng2 = math.radians(lat), math.radians(lng)
+
+        a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * math.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+        distances = 2 * GeoService.EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+        return distances, np.argsort(distances, kind='stable')
+
+    @staticmethod
+    def rank_by_distance(facilities, lat, lng, radius_km=None, decimals=None):
+        """
+        مرتب‌سازی امکانات بر اساس فاصله تا (lat, lng)
+
+        امکانات بدون مختصات کنار گذاشته می‌شوند؛ اگر radius_km داده شود، موارد دورتر هم حذف می‌شوند.
+        با decimals فاصله‌ها (بعد از فیلتر شعاع) گرد می‌شوند.
+
+        Returns:
+            list: لیست tuple های (facility, distance_km)
+        """
+        facilities = list(facilities)
+        if not facilities:
+            return []
+
+        # None در آرایه float به nan تبدیل می‌شود
+        lats = np.array([facility.lat for facility in facilities], dtype=np.float64)
+        lngs = np.array([facility.lng for facility in facilities], dtype=np.float64)
+        for i in np.flatnonzero(np.isnan(lats) | np.isnan(lngs)).tolist():
+            # نمونه‌هایی که هنوز ذخیره نشده‌اند lat/lng ندارند
+            location = facilities[i].location
+            if location is not None and not isinstance(location, str):
+                lats[i], lngs[i] = location.latitude, location.longitude
+
+        distances, order = GeoService.distance_kernel(lats, lngs, lat, lng)
+        # فاصله nan (بدون مختصات) در انتهای order قرار می‌گیرد و این شرط آن را هم حذف می‌کند
+        keep = distances[order] <= (math.inf if radius_km is None else radius_km)
+        order = order[keep]
+        distances = distances[order]
+        if decimals is not None:
+            distances = np.round(distances, decimals)
+        return list(zip(map(facilities.__getitem__, order.tolist()), distances.tolist()))
+
+    @staticmethod
+    def facilities_within(queryset, lat, lng, radius_km, decimals=None):
+        """
+        مکان‌های داخل شعاع radius_km از نقطه (lat, lng)، مرتب‌شده بر اساس فاصله
+
+        Returns:
+            list: لیست tuple های (facility, distance_km)
+        """
+        candidates = GeoService.filter_bounding_box(queryset, lat, lng, radius_km)
+        return GeoService.rank_by_distance(candidates, lat, lng, radius_km, decimals)
@@ -0,0 +1,141 @@
+from collections import defaultdict
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, FloatField, Q, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf, Round
+
+from team4.models import Facility, Review
+
+# بیشترین اختلاف avg_rating ذخیره‌شده با میانگین دقیق که ناشی از گرد کردن است
+AVG_TOLERANCE = Decimal('0.005')
+
+
+class RatingService:
+    """
+    نگهداری افزایشی امتیاز مکان‌ها
+
+    هر مکان مجموع (rating_sum) و تعداد (review_count) امتیازهای نظرات تاییدشده را نگه می‌دارد؛
+    ثبت، ویرایش، تایید/رد و حذف نظر فقط اختلاف را با یک UPDATE اتمی (F) اعمال می‌کند.
+    rating_sum خالی یعنی امتیاز مکان از fixture آمده و هنوز از روی نظرات محاسبه نشده است؛
+    اولین تغییر چنین مکانی یک بار کل نظراتش را جمع می‌زند.
+    """
+
+    @staticmethod
+    def average(total, count):
+        """عبارت avg_rating = total / count (گرد شده به دو رقم، صفر برای count صفر)"""
+        return Coalesce(
+            Round(Cast(total, FloatField()) / NullIf(count, Value(0)), 2),
+            Value(0),
+            output_field=DecimalField(max_digits=3, decimal_places=2),
+        )
+
+    @staticmethod
+    def apply_change(before, after, using):
+        """اعمال اختلاف سهم قبلی و جدید یک نظر (خروجی Review.rating_contribution) روی مکان‌ها"""
+        if before == after:
+            return
+        deltas = defaultdict(lambda: [0, 0])
+        if before is not None:
+            deltas[before[0]][0] -= before[1]
+            deltas[before[0]][1] -= 1
+        if after is not None:
+            deltas[after[0]][0] += after[1]
+            deltas[after[0]][1] += 1
+        for facility_id, (sum_delta, count_delta) in deltas.items():
+            RatingService.apply_delta(facility_id, sum_delta, count_delta, using)
+
+    @staticmethod
+    def apply_delta(facility_id, sum_delta, count_delta, using):
+        """افزودن sum_delta به rating_sum و count_delta به review_count مکان در یک UPDATE"""
+        if not sum_delta and not count_delta:
+            return
+        total = F('rating_sum') + sum_delta
+        count = F('review_count') + count_delta
+        updated = Facility.objects.using(using).filter(pk=facility_id, rating_sum__isnull=False).update(
+            # avg_rating اول می‌آید: MySQL در SET مقدار جدید ستون‌های قبلی را می‌خواند
+            avg_rating=RatingService.average(total, count),
+            rating_sum=total,
+            review_count=count,
+        )
+        if not updated:
+            RatingService.reconcile([facility_id], using=using)
+
+    @staticmethod
+    def set_approval(queryset, approved):
+        """
+        تایید یا رد گروهی نظرات با یک UPDATE و یک اختلاف به ازای هر مکان
+
+        Returns:
+            int: تعداد نظراتی که وضعیتشان تغییر کرد
+        """
+        using = queryset.db
+        changing = queryset.exclude(is_approved=approved).order_by()
+        sign = 1 if approved else -1
+        with transaction.atomic(using=using):
+            deltas = list(
+                changing.values('facility_id').annotate(total=Sum('rating'), count=Count('review_id'))
+            )
+            updated = Review.objects.using(using).filter(
+                pk__in=list(changing.values_list('pk', flat=True))
+            ).update(is_approved=approved)
+            for row in deltas:
+                RatingService.apply_delta(row['facility_id'], sign * row['total'], sign * row['count'], using)
+        return updated
+
+    @staticmethod
+    def expected(total, count):
+        """(rating_sum, review_count, avg_rating) درست برای مجموع و تعداد داده‌شده"""
+        if not count:
+            return 0, 0, Decimal('0.00')
+        avg = (Decimal(total) / count).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        return total, count, avg
+
+    @staticmethod
+    def reconcile(facility_ids=None, using='team4', dry_run=False):
+        """
+        محاسبه مجدد امتیاز از روی نظرات تاییدشده و اصلاح مکان‌هایی که با آن فرق دارند
+
+        بدون facility_ids همه مکان‌هایی بررسی می‌شوند که rating_sum دارند یا نظر تاییدشده دارند
+        (امتیاز fixture مکان‌های بدون نظر دست نمی‌خورد).
+
+        Returns:
+            list: (fac_id, مقادیر قبلی, مقادیر درست) با ترتیب (rating_sum, review_count, avg_rating)
+        """
+        approved = Review.objects.using(using).filter(is_approved=True).order_by()
+        facilities = Facility.objects.using(using).only('fac_id', 'rating_sum', 'review_count', 'avg_rating')
+        if facility_ids is not None:
+            approved = approved.filter(facility_id__in=facility_ids)
+            facilities = facilities.filter(pk__in=facility_ids)
+        else:
+            facilities = facilities.filter(
+                Q(rating_sum__isnull=False) | Q(pk__in=approved.values('facility_id'))
+            )
+
+        drifted, to_update = [], []
+        with transaction.atomic(using=using):
+            # قفل مکان‌ها پیش از جمع زدن، تا اختلاف‌های هم‌زمان بین این دو گم نشوند
+            facilities = list(facilities.select_for_update())
+            stats = {
+                row['facility_id']: (row['total'], row['count'])
+                for row in approved.values('facility_id').annotate(total=Sum('rating'), count=Count('review_id'))
+            }
+            for facility in facilities:
+                rating_sum, review_count, avg_rating = RatingService.expected(*stats.get(facility.pk, (0, 0)))
+                if (
+                    facility.rating_sum == rating_sum
+                    and facility.review_count == review_count
+                    and abs(Decimal(facility.avg_rating) - Decimal(rating_sum) / (review_count or 1)) <= AVG_TOLERANCE
+                ):
+                    continue
+                drifted.append((
+                    facility.pk,
+                    (facility.rating_sum, facility.review_count, facility.avg_rating),
+                    (rating_sum, review_count, avg_rating),
+                ))
+                to_update.append(facility)
+                facility.rating_sum, facility.review_count, facility.avg_rating = rating_sum, review_count, avg_rating
+
+            if to_update and not dry_run:
+                Facility.objects.using(using).bulk_update(to_update, ['rating_sum', 'review_count', 'avg_rating'])
+        return drifted
@@ -0,0 +1,200 @@
+import heapq
+import sys
+import threading
+import time
+
+from django.db.models import Count, Max
+
+from ..normalization import normalize, tokenize
+from team4.models import Province, City, Village
+
+# کوتاه‌ترین کلمه‌ای که با trigram جستجو می‌شود؛ کلمات کوتاه‌تر فقط با پیشوند کلمات تطبیق می‌خورند
+GRAM_SIZE = 3
+
+TYPE_ORDER = {'province': 0, 'city': 1, 'village': 2}
+
+
+def _grams(token):
+    return {token[i:i + GRAM_SIZE] for i in range(len(token) - GRAM_SIZE + 1)}
+
+
+def _deep_size(obj, seen=None):
+    """اندازه تقریبی (بایت) یک ساختار تو در تو از dict/list/tuple/set/str"""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_size(k, seen) + _deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(_deep_size(item, seen) for item in obj)
+    return size
+
+
+class _Snapshot:
+    """ساختارهای یک بار ساخت ایندکس؛ پس از ساخت تغییر نمی‌کند و بدون قفل خوانده می‌شود"""
+
+    def __init__(self, entries):
+        # entry: (region_type, id, name_fa, parent_id, parent_name, normalized_fa, normalized_en)
+        self.entries = entries
+        self.grams = {}
+        self.prefixes = {}
+        for index, entry in enumerate(entries):
+            for token in set(entry[5].split()) | set(entry[6].split()):
+                for length in range(1, min(len(token), GRAM_SIZE - 1) + 1):
+                    self.prefixes.setdefault(token[:length], []).append(index)
+                for gram in _grams(token):
+                    self.grams.setdefault(gram, []).append(index)
+        # هر اندیس ممکن است از چند کلمه یک رکورد تکراری اضافه شده باشد
+        self.prefixes = {key: tuple(sorted(set(ids))) for key, ids in self.prefixes.items()}
+        self.grams = {key: tuple(sorted(set(ids))) for key, ids in self.grams.items()}
+
+    def lookup(self, term):
+        """اندیس رکوردهایی که یکی از کلماتشان term را دارد (برای term کوتاه: با آن شروع می‌شود)"""
+        if len(term) < GRAM_SIZE:
+            return set(self.prefixes.get(term, ()))
+        postings = sorted((self.grams.get(gram, ()) for gram in _grams(term)), key=len)
+        candidates = set(postings[0])
+        for ids in postings[1:]:
+            candidates.intersection_update(ids)
+            if not candidates:
+                break
+        # trigram ها ترتیب را تضمین نمی‌کنند؛ تطابق واقعی بررسی می‌شود
+        return {i for i in candidates if term in self.entries[i][5] or term in self.entries[i][6]}
+
+
+class RegionIndex:
+    """
+    ایندکس درون‌حافظه‌ای نام استان‌ها، شهرها و روستاها برای تکمیل خودکار
+
+    نام‌های فارسی و انگلیسی نرمال‌شده با trigram (برای کلمات سه‌حرفی به بالا) و پیشوند
+    کلمات (برای کلمات کوتاه‌تر) ایندکس می‌شوند. با تغییر رکوردهای مناطق در همین پروسه
+    (سیگنال‌های post_save/post_delete) ایندکس باطل می‌شود؛ تغییرات پروسه‌های دیگر یا
+    bulk_create با مقایسه تعداد و آخرین updated_at هر refresh_seconds ثانیه تشخیص داده می‌شود.
+
+    کدی که بدون save() مناطق را تغییر می‌دهد (bulk_update یا QuerySet.update) باید updated_at را
+    هم بنویسد تا پروسه‌های دیگر تغییر را ببینند، و در همان پروسه invalidate() را صدا بزند
+    (مثل RegionLoader).
+    """
+
+    def __init__(self, refresh_seconds=60):
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._fingerprint = None
+        self._checked_at = 0.0
+        self.build_ms = None
+
+    def invalidate(self):
+        self._snapshot = None
+
+    def _fingerprint_now(self):
+        return tuple(
+            tuple(model.objects.aggregate(count=Count('pk'), latest=Max('updated_at')).values())
+            for model in (Province, City, Village)
+        )
+
+    def _load_entries(self):
+        entries = [
+            ('province', str(pk), name_fa, None, None, normalize(name_fa), normalize(name_en))
+            for pk, name_fa, name_en in Province.objects.values_list('province_id', 'name_fa', 'name_en')
+        ]
+        entries += [
+            ('city', str(pk), name_fa, str(parent_id), parent_name, normalize(name_fa), normalize(name_en))
+            for pk, name_fa, name_en, parent_id, parent_name in City.objects.values_list(
+                'city_id', 'name_fa', 'name_en', 'province_id', 'province__name_fa'
+            )
+        ]
+        entries += [
+            ('village', str(pk), name_fa, str(parent_id), parent_name, normalize(name_fa), normalize(name_en))
+            for pk, name_fa, name_en, parent_id, parent_name in Village.objects.values_list(
+                'village_id', 'name_fa', 'name_en', 'city_id', 'city__name_fa'
+            )
+        ]
+        return entries
+
+    def build(self):
+        started = time.perf_counter()
+        fingerprint = self._fingerprint_now()
+        snapshot = _Snapshot(self._load_entries())
+        self.build_ms = (time.perf_counter() - started) * 1000
+        self._fingerprint = fingerprint
+        self._checked_at = time.monotonic()
+        self._snapshot = snapshot
+        return snapshot
+
+    def _current(self):
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._checked_at < self.refresh_seconds:
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and time.monotonic() - self._checked_at < self.refresh_seconds:
+                return snapshot
+            if snapshot is not None and self._fingerprint_now() == self._fingerprint:
+                self._checked_at = time.monotonic()
+                return snapshot
+            return self.build()
+
+    def search(self, query, region_type=None, limit=20):
+        """
+        حداکثر limit منطقه که نامشان همه کلمات query را دارد، رتبه‌بندی‌شده
+
+        رتبه: تطابق کامل نام، شروع نام با عبارت، شروع یکی از کلمات با اولین کلمه، سپس بقیه؛
+        در رتبه برابر استان قبل از شهر و شهر قبل از روستا و نام کوتاه‌تر جلوتر می‌آید.
+        """
+        terms = tokenize(query or '')
+        if not terms or limit <= 0:
+            return []
+        snapshot = self._current()
+
+        candidates = None
+        for term in sorted(terms, key=len, reverse=True):
+            ids = snapshot.lookup(term)
+            candidates = ids if candidates is None else candidates & ids
+            if not candidates:
+                return []
+
+        entries = snapshot.entries
+        if region_type:
+            candidates = [i for i in candidates if entries[i][0] == region_type]
+
+        phrase = ' '.join(terms)
+        first = terms[0]
+
+        def rank(i):
+            entry = entries[i]
+            names = (entry[5], entry[6])
+            if phrase in names:
+                score = 0
+            elif any(name.startswith(phrase) for name in names):
+                score = 1
+            elif any(token.startswith(first) for name in names for token in name.split()):
+                score = 2
+            else:
+                score = 3
+            return score, TYPE_ORDER[entry[0]], len(entry[2]), entry[2], i
+
+        return [
+            {
+                'id': entries[i][1],
+                'name': entries[i][2],
+                'parent_region_id': entries[i][3],
+                'parent_region_name': entries[i][4],
+            }
+            for i in heapq.nsmallest(limit, candidates, key=rank)
+        ]
+
+    def stats(self):
+        snapshot = self._current()
+        return {
+            'entries': len(snapshot.entries),
+            'gram_keys': len(snapshot.grams),
+            'prefix_keys': len(snapshot.prefixes),
+            'memory_bytes': _deep_size((snapshot.entries, snapshot.grams, snapshot.prefixes)),
+            'build_ms': round(self.build_ms, 2),
+        }
+
+
+region_index = RegionIndex()
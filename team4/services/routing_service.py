@@ -0,0 +1,243 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# مختصات با ۴ رقم اعشار (حدود ۱۱ متر) کلید کش می‌شوند و همان مقدار به سرویس مسیریابی می‌رود
+COORD_DECIMALS = 4
+DEFAULT_TTL = 10 * 60
+DEFAULT_MAX_ENTRIES = 1024
+
+
+class RoutingError(Exception):
+    """سرویس مسیریابی در دسترس نیست یا پاسخ معتبر نداد"""
+
+
+class NeshanRoutingBackend:
+    """API مسیریابی نشان (v4/direction) روی یک Session با اتصال‌های ماندگار"""
+
+    URL = 'https://api.neshan.org/v4/direction'
+
+    def __init__(self, api_key=None, timeout=(3.05, 10), pool_size=10):
+        self.api_key = api_key
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+
+    def route(self, params):
+        """
+        Returns:
+            tuple: (status_code, پاسخ JSON سرویس)
+        """
+        headers = {'Api-Key': self.api_key or os.getenv('MAP_SERVICE_KEY')}
+        try:
+            response = self.session.get(self.URL, headers=headers, params=params, timeout=self.timeout)
+            return response.status_code, response.json()
+        except Exception as exc:
+            # خطای شبکه یا پاسخ غیر JSON (مثلا صفحه خطای HTML پروکسی)
+            raise RoutingError(str(exc)) from exc
+
+
+class LocalRoutingBackend:
+    """
+    جایگزین محلی بدون شبکه (توسعه و تست): مسیر مستقیم با ضریب پیچ‌وخم و سرعت ثابت
+
+    پاسخ همان ساختار routes/legs نشان را دارد.
+    """
+
+    DETOUR_FACTOR = 1.3
+    SPEED_KMH = {'car': 40, 'motorcycle': 35}
+
+    def __init__(self):
+        self.calls = 0
+
+    def route(self, params):
+        self.calls += 1
+        (lat1, lng1), (lat2, lng2) = (
+            map(float, params[name].split(',')) for name in ('origin', 'destination')
+        )
+        dlat, dlng = math.radians(lat2 - lat1), math.radians(lng2 - lng1)
+        a = math.sin(dlat / 2) ** 2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlng / 2) ** 2
+        distance_km = 2 * 6371 * math.asin(math.sqrt(a)) * self.DETOUR_FACTOR
+        duration_s = distance_km / self.SPEED_KMH.get(params.get('type'), 40) * 3600
+        leg = {
+            'summary': 'local',
+            'distance': {'value': round(distance_km * 1000), 'text': f'{distance_km:.1f} کیلومتر'},
+            'duration': {'value': round(duration_s), 'text': f'{duration_s / 60:.0f} دقیقه'},
+            'steps': [],
+        }
+        return 200, {'routes': [{'overview_polyline': {'points': ''}, 'legs': [leg]}]}
+
+
+BACKENDS = {
+    'neshan': NeshanRoutingBackend,
+    'local': LocalRoutingBackend,
+}
+
+
+class RouteCache:
+    """کش LRU با TTL؛ امن برای چند thread"""
+
+    def __init__(self, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class _Call:
+    """درخواست در جریان به سرویس؛ درخواست‌های یکسان هم‌زمان منتظر نتیجه آن می‌مانند"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class RoutingService:
+    """
+    مسیریابی با کش، یکی‌سازی درخواست‌های هم‌زمان یکسان و آمار
+
+    کلید: مختصات گرد شده مبدا/مقصد، نوع وسیله و گزینه‌ها. فقط پاسخ‌های 200 کش می‌شوند؛
+    درخواست‌های یکسانی که هم‌زمان با یک فراخوانی در جریان برسند، نتیجه همان را می‌گیرند.
+    """
+
+    def __init__(self, backend=None, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES, wait_timeout=15):
+        self.backend = backend or BACKENDS[os.getenv('TEAM4_ROUTING_BACKEND', 'neshan')]()
+        self.cache = RouteCache(ttl=ttl, max_entries=max_entries)
+        self.wait_timeout = wait_timeout
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {
+                'requests': 0, 'hits': 0, 'coalesced': 0,
+                'upstream_calls': 0, 'upstream_errors': 0, 'upstream_ms_total': 0.0, 'upstream_ms_max': 0.0,
+            }
+
+    @staticmethod
+    def build_params(origin, destination, vehicle_type='car', **options):
+        """
+        پارامترهای درخواست نشان؛ origin/destination با ویژگی‌های latitude/longitude
+
+        options: avoidTrafficZone, avoidOddEvenZone, alternative (bool)
+        """
+        def coords(point):
+            return f'{round(point.latitude, COORD_DECIMALS)},{round(point.longitude, COORD_DECIMALS)}'
+
+        params = {'type': vehicle_type, 'origin': coords(origin), 'destination': coords(destination)}
+        for name in sorted(options):
+            params[name] = str(bool(options[name])).lower()
+        return params
+
+    def route(self, origin, destination, vehicle_type='car', **options):
+        """
+        Returns:
+            tuple: (status_code, پاسخ سرویس) - پاسخ بین درخواست‌ها مشترک است و نباید تغییر کند
+
+        Raises:
+            RoutingError: اگر سرویس در دسترس نباشد
+        """
+        params = self.build_params(origin, destination, vehicle_type, **options)
+        key = tuple(params.items())
+
+        with self._lock:
+            self._stats['requests'] += 1
+            cached = self.cache.get(key)
+            if cached is not None:
+                self._stats['hits'] += 1
+                return cached
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _Call()
+            else:
+                self._stats['coalesced'] += 1
+
+        if not leader:
+            if not call.done.wait(self.wait_timeout):
+                raise RoutingError('timed out waiting for an identical routing request')
+            if call.error is not None:
+                # استثنای مشترک leader دوباره raise نمی‌شود تا traceback آن بین threadها دست نخورد
+                raise RoutingError(str(call.error)) from call.error
+            return call.result
+
+        try:
+            call.result = self._call_backend(params)
+            if call.result[0] == 200:
+                self.cache.set(key, call.result)
+            return call.result
+        except Exception as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            call.done.set()
+
+    def _call_backend(self, params):
+        started = time.perf_counter()
+        try:
+            return self.backend.route(params)
+        except RoutingError:
+            with self._lock:
+                self._stats['upstream_errors'] += 1
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self._stats['upstream_calls'] += 1
+                self._stats['upstream_ms_total'] += elapsed_ms
+                self._stats['upstream_ms_max'] = max(self._stats['upstream_ms_max'], elapsed_ms)
+
+    def stats(self):
+        """آمار کش و سرویس بالادستی از زمان شروع پروسه"""
+        with self._lock:
+            stats = dict(self._stats)
+        upstream_ms_total = stats.pop('upstream_ms_total')
+        stats.update({
+            'hit_rate': round(stats['hits'] / stats['requests'], 3) if stats['requests'] else 0.0,
+            'upstream_ms_avg': round(upstream_ms_total / stats['upstream_calls'], 1) if stats['upstream_calls'] else 0.0,
+            'upstream_ms_max': round(stats['upstream_ms_max'], 1),
+            'cache_entries': len(self.cache),
+            'cache_max_entries': self.cache.max_entries,
+            'cache_ttl_seconds': self.cache.ttl,
+            'backend': type(self.backend).__name__,
+        })
+        return stats
+
+
+routing_service = RoutingService()
@@ -0,0 +1,101 @@
+from django.db import connections
+from django.db.models import Case, F, FloatField, Func, Q, Value, When
+
+from ..normalization import tokenize
+from team4.models import City, Facility, Province, Village
+
+# کوتاه‌ترین عبارتی که ایندکس ngram می‌شناسد (ngram_token_size پیش‌فرض MySQL)
+NGRAM_TOKEN_SIZE = 2
+
+
+class FullTextMatch(Func):
+    """MATCH (column) AGAINST (query IN BOOLEAN MODE) - فقط MySQL"""
+    template = '%(function)s (%(expressions)s IN BOOLEAN MODE)'
+    function = 'MATCH'
+    arg_joiner = ') AGAINST ('
+    output_field = FloatField()
+
+
+class SearchService:
+    """
+    جستجوی نام روی ستون نرمال‌شده search_name
+
+    روی MySQL جستجوی نام مکان‌ها از ایندکس FULLTEXT (ngram) روی search_name استفاده می‌کند
+    و امتیاز MATCH ملاک رتبه‌بندی است؛ روی بقیه دیتابیس‌ها (و برای عبارت‌های تک‌حرفی)
+    همه کلمات با contains روی search_name جستجو و بر اساس تطابق کامل/پیشوندی رتبه‌بندی می‌شوند.
+    """
+
+    # مدل‌هایی که ایندکس FULLTEXT دارند (migration 0008)
+    FULLTEXT_MODELS = (Facility,)
+
+    @staticmethod
+    def _uses_fulltext(queryset, terms):
+        return (
+            queryset.model in SearchService.FULLTEXT_MODELS
+            and connections[queryset.db].vendor == 'mysql'
+            and all(len(term) >= NGRAM_TOKEN_SIZE for term in terms)
+        )
+
+    @staticmethod
+    def search(queryset, query):
+        """
+        فیلتر queryset به رکوردهایی که نامشان همه کلمات query را دارد، با annotation به نام relevance
+
+        Returns:
+            QuerySet: مرتب‌شده بر اساس relevance (نزولی)
+        """
+        terms = tokenize(query or '')
+        if not terms:
+            return queryset.none()
+
+        if SearchService._uses_fulltext(queryset, terms):
+            # هر کلمه به صورت عبارت اجباری، تا ngram های آن پشت سر هم تطبیق داده شوند
+            boolean_query = ' '.join(f'+"{term}"' for term in terms)
+            queryset = queryset.annotate(
+                relevance=FullTextMatch(F('search_name'), Value(boolean_query))
+            ).filter(relevance__gt=0)
+        else:
+            for term in terms:
+                queryset = queryset.filter(search_name__contains=term)
+            phrase = ' '.join(terms)
+            queryset = queryset.annotate(relevance=Case(
+                When(search_name=phrase, then=Value(3.0)),
+                When(search_name__startswith=phrase, then=Value(2.0)),
+                When(search_name__contains=phrase, then=Value(1.5)),
+                default=Value(1.0),
+                output_field=FloatField(),
+            ))
+        return queryset.order_by('-relevance')
+
+    @staticmethod
+    def name_filter(query):
+        """
+        شرط Q برای تطبیق نام (بدون رتبه‌بندی) با contains روی search_name؛ برای فیلتر جداول کوچک
+        """
+        condition = Q()
+        for term in tokenize(query or ''):
+            condition &= Q(search_name__contains=term)
+        return condition
+
+    @staticmethod
+    def filter_by_region(queryset, region_type, region_name):
+        """
+        فیلتر امکانات بر اساس نام منطقه
+
+        نام منطقه ابتدا روی جدول کوچک مناطق (search_name نرمال‌شده) پیدا می‌شود و امکانات
+        با city_id (ایندکس idx_facility_city) فیلتر می‌شوند. امکانات به روستا وصل نیستند،
+        پس فیلتر روستا امکانات شهر آن روستا را برمی‌گرداند.
+        """
+        if not tokenize(region_name or ''):
+            return queryset
+
+        condition = SearchService.name_filter(region_name)
+        if region_type == 'village':
+            cities = City.objects.filter(city_id__in=Village.objects.filter(condition).values('city_id'))
+        elif region_type == 'city':
+            cities = City.objects.filter(condition)
+        elif region_type == 'province':
+            cities = City.objects.filter(province__in=Province.objects.filter(condition))
+        else:
+            return queryset
+        return queryset.filter(city__in=cities.values('city_id'))
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from team4.models import City, Province, Village
+from team4.services.region_index import region_index
+
+
+@receiver([post_save, post_delete], sender=Province)
+@receiver([post_save, post_delete], sender=City)
+@receiver([post_save, post_delete], sender=Village)
+def invalidate_region_index(sender, **kwargs):
+    """ایندکس مناطق در جستجوی بعدی از نو ساخته می‌شود"""
+    region_index.invalidate()
@@ -0,0 +1,97 @@
+"""
+Tests for GeoService
+"""
+import random
+
+from django.test import SimpleTestCase
+from team4.fields import Point
+from team4.models import Facility
+from team4.services.facility_service import FacilityService
+from team4.services.geo_service import GeoService
+
+
+class BoundingBoxTest(SimpleTestCase):
+    """تست bounding box پیش‌فیلتر مکانی"""
+
+    def assert_covers(self, lat, lng, radius_km):
+        min_lat, max_lat, min_lng, max_lng = GeoService.bounding_box(lat, lng, radius_km)
+        center = Point(lng, lat)
+        rng = random.Random(f"{lat},{lng},{radius_km}")
+        for _ in range(2000):
+            p_lat = rng.uniform(max(lat - 3, -90), min(lat + 3, 90))
+            p_lng = rng.uniform(max(lng - 3, -180), min(lng + 3, 180))
+            if Point(p_lng, p_lat).distance(center) <= radius_km:
+                self.assertTrue(min_lat <= p_lat <= max_lat, (p_lat, p_lng))
+                self.assertTrue(min_lng <= p_lng <= max_lng, (p_lat, p_lng))
+
+    def test_box_covers_circle(self):
+        self.assert_covers(35.6892, 51.3890, 5)
+        self.assert_covers(29.5918, 52.5837, 50)
+        self.assert_covers(-33.86, 151.2, 100)
+
+    def test_box_is_tight(self):
+        min_lat, max_lat, min_lng, max_lng = GeoService.bounding_box(35.0, 51.0, 10)
+        # 10km ≈ 0.09° عرض؛ در عرض 35 درجه طول حدوداً 0.11°
+        self.assertAlmostEqual(max_lat - 35.0, 0.0899, places=3)
+        self.assertLess(max_lng - 51.0, 0.12)
+        self.assertGreater(max_lng - 51.0, 0.10)
+
+    def test_box_is_clamped_near_poles(self):
+        min_lat, max_lat, min_lng, max_lng = GeoService.bounding_box(89.99, 10.0, 50)
+        self.assertEqual(max_lat, 90.0)
+        self.assertEqual((min_lng, max_lng), (-180.0, 180.0))
+
+    def test_sync_coordinates(self):
+        facility = Facility(location=Point(51.389, 35.6892))
+        facility.sync_coordinates()
+        self.assertEqual((facility.lat, facility.lng), (35.6892, 51.389))
+
+        facility.location = 'POINT(52.5 29.6)'
+        facility.sync_coordinates()
+        self.assertEqual((facility.lat, facility.lng), (29.6, 52.5))
+
+        facility.location = None
+        facility.sync_coordinates()
+        self.assertEqual((facility.lat, facility.lng), (None, None))
+
+
+class DistanceKernelTest(SimpleTestCase):
+    """تست محاسبه برداری فاصله"""
+
+    def make_facility(self, lng, lat, saved=True):
+        facility = Facility(location=Point(lng, lat))
+        if saved:
+            facility.sync_coordinates()
+        return facility
+
+    def test_kernel_matches_point_distance(self):
+        rng = random.Random(4)
+        points = [Point(rng.uniform(44, 63), rng.uniform(25, 40)) for _ in range(200)]
+        center = Point(51.389, 35.6892)
+        distances, order = GeoService.distance_kernel(
+            [p.latitude for p in points], [p.longitude for p in points], center.latitude, center.longitude
+        )
+        for point, distance in zip(points, distances):
+            self.assertAlmostEqual(distance, point.distance(center), places=6)
+        self.assertEqual(list(order), sorted(range(len(points)), key=lambda i: distances[i]))
+
+    def test_rank_by_distance(self):
+        far = self.make_facility(59.6, 36.3)
+        near = self.make_facility(51.40, 35.70)
+        unsaved = self.make_facility(51.42, 35.72, saved=False)
+        no_location = Facility()
+
+        ranked = GeoService.rank_by_distance([far, no_location, unsaved, near], 35.6892, 51.389)
+        self.assertEqual([facility for facility, _ in ranked], [near, unsaved, far])
+
+        ranked = GeoService.rank_by_distance([far, unsaved, near], 35.6892, 51.389, radius_km=50, decimals=2)
+        self.assertEqual([facility for facility, _ in ranked], [near, unsaved])
+        self.assertEqual(ranked[0][1], round(near.calculate_distance_to(Point(51.389, 35.6892)), 2))
+
+        self.assertEqual(GeoService.rank_by_distance([], 35.6892, 51.389), [])
+
+    def test_sort_by_distance_accepts_tuple(self):
+        near = self.make_facility(51.40, 35.70)
+        far = self.make_facility(52.58, 29.59)
+        result = FacilityService.sort_by_distance([far, near], (51.389, 35.6892))
+        self.assertEqual([row['facility'] for row in result], [near, far])
@@ -0,0 +1,134 @@
+"""
+Tests for the bulk fixture loaders
+"""
+import json
+import os
+import tempfile
+
+from django.test import SimpleTestCase, TestCase
+from team4.fields import Point
+from team4.loaders import HotelLoader, ProvinceLoader, iter_json_array
+from team4.models import Amenity, Category, City, Facility, FacilityAmenity, Province
+from team4.services.region_index import region_index
+
+
+def write_fixture(items):
+    f = tempfile.NamedTemporaryFile('w', suffix='.json', delete=False, encoding='utf-8')
+    with f:
+        json.dump(items, f, ensure_ascii=False, indent=2)
+    return f.name
+
+
+class IterJsonArrayTest(SimpleTestCase):
+    """تست خواندن جریانی آرایه JSON"""
+
+    def test_items_across_chunk_boundaries(self):
+        items = [{'id': i, 'name_fa': f'مکان {i}', 'tags': [i, {'x': 'a,]'}]} for i in range(50)]
+        path = write_fixture(items)
+        self.addCleanup(os.remove, path)
+        self.assertEqual(list(iter_json_array(path, chunk_size=7)), items)
+
+    def test_empty_and_invalid(self):
+        path = write_fixture([])
+        self.addCleanup(os.remove, path)
+        self.assertEqual(list(iter_json_array(path)), [])
+
+        path = write_fixture({'a': 1})
+        self.addCleanup(os.remove, path)
+        with self.assertRaises(ValueError):
+            list(iter_json_array(path))
+
+
+class FacilityLoaderTest(TestCase):
+    """تست بارگذاری دسته‌ای مکان‌ها"""
+
+    databases = {'default', 'team4'}
+
+    @classmethod
+    def setUpTestData(cls):
+        province = Province.objects.create(name_fa="تهران", name_en="Tehran")
+        cls.city = City.objects.create(province=province, name_fa="تهران", name_en="Tehran", location=Point(51.38, 35.68))
+        cls.category = Category.objects.create(name_fa="هتل", name_en="Hotel")
+        cls.wifi = Amenity.objects.create(name_fa="وای فای", name_en="WiFi")
+        cls.parking = Amenity.objects.create(name_fa="پارکینگ", name_en="Parking")
+
+    def item(self, name_fa, name_en, **extra):
+        return {
+            'name_fa': name_fa,
+            'name_en': name_en,
+            'city_name_fa': 'تهران',
+            'location': {'latitude': 35.7, 'longitude': 51.4},
+            **extra,
+        }
+
+    def load(self, items, batch_size=2):
+        path = write_fixture(items)
+        self.addCleanup(os.remove, path)
+        loader = HotelLoader(batch_size=batch_size)
+        loader.load(path)
+        return loader.stats
+
+    def test_create_then_update(self):
+        items = [
+            self.item("هتل آزادی", "Azadi Hotel", amenities=[self.wifi.pk, self.parking.pk]),
+            self.item("هتل اسپیناس", "Espinas Hotel"),
+            self.item("هتل لاله", "Laleh Hotel", phone="021"),
+            self.item("", "No Name"),
+        ]
+        stats = self.load(items)
+        self.assertEqual((stats.created, stats.updated, stats.skipped), (3, 0, 1))
+
+        azadi = Facility.objects.get(name_fa="هتل آزادی")
+        self.assertEqual(azadi.category, self.category)
+        self.assertEqual((azadi.lat, azadi.lng), (35.7, 51.4))
+        self.assertEqual(azadi.search_name, "هتل آزادی azadi hotel")
+        self.assertEqual(set(azadi.amenities.values_list('pk', flat=True)), {self.wifi.pk, self.parking.pk})
+
+        items[0]['amenities'] = [self.wifi.pk]
+        items[2]['phone'] = "021-2"
+        stats = self.load(items)
+        self.assertEqual((stats.created, stats.updated), (0, 3))
+        self.assertEqual(Facility.objects.count(), 3)
+        self.assertEqual(Facility.objects.get(name_fa="هتل لاله").phone, "021-2")
+        self.assertEqual(FacilityAmenity.objects.filter(facility=azadi).count(), 1)
+
+    def test_empty_amenities_clear_and_missing_key_keeps(self):
+        items = [
+            self.item("هتل آزادی", "Azadi Hotel", amenities=[self.wifi.pk]),
+            self.item("هتل لاله", "Laleh Hotel", amenities=[self.parking.pk]),
+        ]
+        self.load(items)
+        items[0]['amenities'] = []
+        del items[1]['amenities']
+        self.load(items)
+        self.assertFalse(FacilityAmenity.objects.filter(facility__name_fa="هتل آزادی").exists())
+        self.assertEqual(
+            list(FacilityAmenity.objects.filter(facility__name_fa="هتل لاله").values_list('amenity_id', flat=True)),
+            [self.parking.pk],
+        )
+
+    def test_duplicate_english_name_in_city(self):
+        stats = self.load([
+            self.item("هتل پارس", "Pars Hotel"),
+            self.item("هتل پارس جدید", "Pars Hotel"),
+            self.item("هتل پارس نو", "Pars Hotel", id=7),
+        ])
+        self.assertEqual((stats.created, stats.skipped), (2, 1))
+        self.assertTrue(Facility.objects.filter(name_en="Pars Hotel (7)").exists())
+
+
+class RegionLoaderTest(TestCase):
+    """تست باطل شدن ایندکس مناطق پس از بارگذاری دسته‌ای"""
+
+    databases = {'default', 'team4'}
+
+    def test_load_invalidates_region_index(self):
+        self.addCleanup(region_index.invalidate)
+        region_index.build()
+        self.assertEqual(region_index.search('Gilan'), [])
+
+        path = write_fixture([{'province_id': 5, 'name_fa': 'گیلان', 'name_en': 'Gilan', 'location': None}])
+        self.addCleanup(os.remove, path)
+        ProvinceLoader().load(path)
+        # bulk_create سیگنال post_save ندارد و بازه بررسی ۶۰ ثانیه‌ای هنوز نگذشته
+        self.assertEqual([r['name'] for r in region_index.search('Gilan')], ['گیلان'])
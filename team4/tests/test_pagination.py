@@ -0,0 +1,121 @@
+"""
+Tests for keyset pagination and cached counts
+"""
+import base64
+import json
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from team4.fields import Point
+from team4.models import Province, City, Category, Facility
+from team4.pagination import cached_count
+
+LIST_URL = '/team4/api/facilities/'
+EMERGENCY_URL = '/team4/api/facilities/emergency/'
+NEARBY_URL = '/team4/api/facilities/nearby/'
+
+
+def cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+class KeysetPaginationTest(TestCase):
+    """تست صفحه‌بندی keyset لیست مکان‌ها"""
+
+    databases = {'default', 'team4'}
+
+    @classmethod
+    def setUpTestData(cls):
+        province = Province.objects.create(name_fa="تهران", name_en="Tehran")
+        city = City.objects.create(province=province, name_fa="تهران", name_en="Tehran", location=Point(51.38, 35.68))
+        hotel = Category.objects.create(name_fa="هتل", name_en="Hotel")
+        hospital = Category.objects.create(name_fa="بیمارستان", name_en="Hospital", is_emergency=True)
+        for i in range(23):
+            Facility.objects.create(
+                name_fa=f"مکان {i}", name_en=f"Place {i}", city=city,
+                category=hospital if i % 2 else hotel,
+                # امتیازهای تکراری تا ترتیب با fac_id یکتا شود
+                avg_rating=[4.5, 4.0, 3.5][i % 3],
+                location=Point(51.38 + i * 0.001, 35.68),
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def collect(self, url, params):
+        ids, pages = [], 0
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            ids.extend(item['fac_id'] for item in response.data['results'])
+            pages += 1
+            if not response.data['next']:
+                return ids, pages, response
+            response = self.client.get(response.data['next'])
+
+    def test_walks_all_pages_in_rating_order(self):
+        ids, pages, _ = self.collect(LIST_URL, {'cursor': '', 'page_size': 5})
+        expected = list(Facility.objects.order_by('-avg_rating', 'fac_id').values_list('fac_id', flat=True))
+        self.assertEqual(ids, expected)
+        self.assertEqual(pages, 5)
+
+    def test_deep_page_costs_the_same(self):
+        first = self.client.get(LIST_URL, {'cursor': '', 'page_size': 5})
+        second = self.client.get(first.data['next'])
+        with self.assertNumQueries(7, using='team4'):
+            self.client.get(LIST_URL, {'cursor': '', 'page_size': 5})
+        with self.assertNumQueries(7, using='team4'):
+            self.client.get(second.data['next'])
+
+    def test_count_is_optional_and_cached(self):
+        response = self.client.get(LIST_URL, {'cursor': ''})
+        self.assertIsNone(response.data['count'])
+
+        response = self.client.get(LIST_URL, {'cursor': '', 'count': 'true'})
+        self.assertEqual(response.data['count'], 23)
+
+        queryset = Facility.objects.filter(status=True)
+        with self.assertNumQueries(0, using='team4'):
+            self.assertEqual(cached_count(queryset.order_by('-avg_rating', 'fac_id')), 23)
+
+    def test_page_number_mode_unchanged(self):
+        response = self.client.get(LIST_URL, {'page': 2, 'page_size': 5})
+        self.assertEqual(response.data['count'], 23)
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(LIST_URL, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_wrongly_typed_cursor(self):
+        # ترتیب پیش‌فرض: (-avg_rating, -review_count, fac_id)
+        for values in (['abc', 0, 1], [[4.5], 0, 1], [4.5, 0, 'x'], [None, 0, 1], [4.5]):
+            response = self.client.get(LIST_URL, {'cursor': cursor(values)})
+            self.assertEqual(response.status_code, 400, values)
+        location = {'lat': 35.68, 'lng': 51.38}
+        for values in (['far', 1], [{'km': 1}, 1], [0.5, 'x']):
+            response = self.client.get(EMERGENCY_URL, {'cursor': cursor(values), **location})
+            self.assertEqual(response.status_code, 400, values)
+        # مقدار رشته‌ای قابل تبدیل پذیرفته می‌شود
+        response = self.client.get(LIST_URL, {'cursor': cursor(['4.0', '0', 1])})
+        self.assertEqual(response.status_code, 200)
+
+    def test_nearby_ignores_cursor(self):
+        params = {'lat': 35.68, 'lng': 51.38, 'radius': 5000, 'page_size': 5}
+        response = self.client.get(NEARBY_URL, {**params, 'cursor': ''})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 23)
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_emergency_by_distance(self):
+        ids, _, response = self.collect(EMERGENCY_URL, {'cursor': '', 'page_size': 4, 'lat': 35.68, 'lng': 51.38})
+        expected = list(
+            Facility.objects.filter(category__is_emergency=True).order_by('fac_id').values_list('fac_id', flat=True)
+        )
+        self.assertEqual(ids, expected)
+        # فاصله هر مورد مال خودش است، نه مورد هم‌اندیس صفحه اول
+        last = response.data['results'][-1]
+        facility = Facility.objects.get(pk=last['fac_id'])
+        self.assertAlmostEqual(last['distance_km'], facility.calculate_distance_to(Point(51.38, 35.68)), places=1)
@@ -0,0 +1,118 @@
+"""
+Tests for incremental facility rating aggregation
+"""
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connections
+from django.test import TestCase
+from team4.fields import Point
+from team4.models import Province, City, Category, Facility, Review
+from team4.services.rating_service import RatingService
+
+
+class RatingAggregationTest(TestCase):
+    """تست بروزرسانی افزایشی امتیاز مکان با ثبت، ویرایش، تایید و حذف نظر"""
+
+    databases = {'default', 'team4'}
+
+    @classmethod
+    def setUpClass(cls):
+        # جدول review به کاربر کلید خارجی دارد؛ دیتابیس تستی team4 جدول کاربر را ندارد
+        User = get_user_model()
+        connection = connections['team4']
+        if User._meta.db_table not in connection.introspection.table_names():
+            with connection.schema_editor() as editor:
+                editor.create_model(User)
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            get_user_model().objects.db_manager('team4').create_user(email=f'user{i}@example.com')
+            for i in range(4)
+        ]
+        province = Province.objects.create(name_fa="فارس", name_en="Fars")
+        city = City.objects.create(province=province, name_fa="شیراز", name_en="Shiraz", location=Point(52.58, 29.59))
+        category = Category.objects.create(name_fa="هتل", name_en="Hotel")
+        cls.facility = Facility.objects.create(
+            name_fa="هتل تست", name_en="Test Hotel", category=category, city=city,
+            location=Point(52.54, 29.61), avg_rating=4.5, review_count=120,
+        )
+        cls.other = Facility.objects.create(
+            name_fa="هتل دوم", name_en="Second Hotel", category=category, city=city,
+            location=Point(52.55, 29.62),
+        )
+
+    def review(self, user_index, rating, **kwargs):
+        kwargs.setdefault('facility', self.facility)
+        return Review.objects.create(user=self.users[user_index], rating=rating, **kwargs)
+
+    def assertRating(self, facility, rating_sum, review_count, avg_rating):
+        facility.refresh_from_db()
+        self.assertEqual(
+            (facility.rating_sum, facility.review_count, facility.avg_rating),
+            (rating_sum, review_count, Decimal(avg_rating)),
+        )
+
+    def test_first_review_replaces_fixture_rating(self):
+        self.review(1, 3)
+        self.assertRating(self.facility, 3, 1, '3.00')
+
+    def test_create_update_delete(self):
+        self.review(1, 4)
+        second = self.review(2, 5)
+        third = self.review(3, 2)
+        self.assertRating(self.facility, 11, 3, '3.67')
+
+        second.rating = 1
+        second.save()
+        self.assertRating(self.facility, 7, 3, '2.33')
+
+        third.delete()
+        self.assertRating(self.facility, 5, 2, '2.50')
+
+        moved = Review.objects.get(pk=second.pk)
+        moved.facility = self.other
+        moved.save()
+        self.assertRating(self.facility, 4, 1, '4.00')
+        self.assertRating(self.other, 1, 1, '1.00')
+
+    def test_approval_toggles(self):
+        first = self.review(1, 4)
+        self.review(2, 2, is_approved=False)
+        self.assertRating(self.facility, 4, 1, '4.00')
+
+        first.is_approved = False
+        first.save()
+        self.assertRating(self.facility, 0, 0, '0.00')
+
+        self.assertEqual(RatingService.set_approval(Review.objects.all(), True), 2)
+        self.assertRating(self.facility, 6, 2, '3.00')
+        self.assertEqual(RatingService.set_approval(Review.objects.all(), True), 0)
+        self.assertRating(self.facility, 6, 2, '3.00')
+
+    def test_save_query_count(self):
+        self.review(1, 4)
+        facility = Facility.objects.get(pk=self.facility.pk)
+        # درج نظر و یک UPDATE مکان (به اضافه savepoint)، بدون کوئری یکتایی یا میانگین گیری
+        with self.assertNumQueries(4, using='team4'):
+            Review.objects.create(user=self.users[2], facility=facility, rating=5)
+        self.assertRating(facility, 9, 2, '4.50')
+
+    def test_reconcile_fixes_drift(self):
+        self.review(1, 4)
+        self.review(2, 5)
+        Facility.objects.filter(pk=self.facility.pk).update(rating_sum=1, review_count=7, avg_rating=1)
+        Review.objects.filter(user=self.users[2]).update(is_approved=False)
+
+        call_command('reconcile_ratings', '--dry-run', stdout=StringIO())
+        self.assertRating(self.facility, 1, 7, '1.00')
+
+        call_command('reconcile_ratings', stdout=StringIO())
+        self.assertRating(self.facility, 4, 1, '4.00')
+        self.assertEqual(RatingService.reconcile(), [])
+        # امتیاز fixture مکان بدون نظر دست نمی‌خورد
+        self.assertRating(self.other, None, 0, '0.00')
@@ -0,0 +1,184 @@
+"""
+Tests for the cached routing proxy
+"""
+import threading
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+from rest_framework.test import APIClient
+from team4.fields import Point
+from team4.services.routing_service import (
+    LocalRoutingBackend, NeshanRoutingBackend, RouteCache, RoutingError, RoutingService, routing_service,
+)
+
+ORIGIN = Point(51.3347, 35.7219)
+DESTINATION = Point(51.3890, 35.6892)
+
+
+class GatedBackend(LocalRoutingBackend):
+    """بک‌اند محلی که تا باز شدن gate جواب نمی‌دهد"""
+
+    def __init__(self):
+        super().__init__()
+        self.gate = threading.Event()
+        self.started = threading.Event()
+
+    def route(self, params):
+        self.started.set()
+        self.gate.wait(5)
+        return super().route(params)
+
+
+class FailingBackend:
+    def route(self, params):
+        raise RoutingError('unreachable')
+
+
+class GatedFailingBackend(GatedBackend):
+    def route(self, params):
+        self.started.set()
+        self.gate.wait(5)
+        raise RoutingError('unreachable')
+
+
+class RouteCacheTest(SimpleTestCase):
+    """تست کش LRU با TTL"""
+
+    def test_lru_eviction(self):
+        cache = RouteCache(ttl=60, max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual((cache.get('a'), cache.get('b'), cache.get('c')), (1, None, 3))
+
+    def test_ttl_expiry(self):
+        cache = RouteCache(ttl=60)
+        with mock.patch('team4.services.routing_service.time.monotonic', return_value=1000):
+            cache.set('a', 1)
+        with mock.patch('team4.services.routing_service.time.monotonic', return_value=1059):
+            self.assertEqual(cache.get('a'), 1)
+        with mock.patch('team4.services.routing_service.time.monotonic', return_value=1061):
+            self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+
+class RoutingServiceTest(SimpleTestCase):
+    """تست کش، یکی‌سازی درخواست‌ها و آمار سرویس مسیریابی"""
+
+    def test_cache_key_rounds_coordinates_and_includes_options(self):
+        backend = LocalRoutingBackend()
+        service = RoutingService(backend=backend)
+        first = service.route(ORIGIN, DESTINATION)
+        # ۲ متر جابه‌جایی: همان کلید
+        self.assertEqual(service.route(Point(51.33471, 35.72191), DESTINATION), first)
+        service.route(ORIGIN, DESTINATION, 'motorcycle')
+        service.route(ORIGIN, DESTINATION, alternative=True)
+        self.assertEqual(backend.calls, 3)
+
+        stats = service.stats()
+        self.assertEqual((stats['requests'], stats['hits'], stats['upstream_calls']), (4, 1, 3))
+        self.assertEqual(stats['hit_rate'], 0.25)
+        self.assertEqual(stats['cache_entries'], 3)
+
+    def test_concurrent_identical_requests_share_one_call(self):
+        backend = GatedBackend()
+        service = RoutingService(backend=backend)
+        results = []
+
+        def request():
+            results.append(service.route(ORIGIN, DESTINATION))
+
+        leader = threading.Thread(target=request)
+        leader.start()
+        backend.started.wait(5)
+        followers = [threading.Thread(target=request) for _ in range(4)]
+        for thread in followers:
+            thread.start()
+        deadline = time.monotonic() + 5
+        while service.stats()['coalesced'] < len(followers) and time.monotonic() < deadline:
+            time.sleep(0.001)
+        backend.gate.set()
+        for thread in [leader, *followers]:
+            thread.join(5)
+
+        self.assertEqual(backend.calls, 1)
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(result is results[0] for result in results))
+
+    def test_followers_get_their_own_error(self):
+        backend = GatedFailingBackend()
+        service = RoutingService(backend=backend)
+        errors = []
+
+        def request():
+            try:
+                service.route(ORIGIN, DESTINATION)
+            except RoutingError as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=request) for _ in range(3)]
+        threads[0].start()
+        backend.started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        deadline = time.monotonic() + 5
+        while service.stats()['coalesced'] < 2 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        backend.gate.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(errors), 3)
+        self.assertEqual(len({id(exc) for exc in errors}), 3)
+        leader_error = next(exc for exc in errors if exc.__cause__ is None)
+        self.assertTrue(all(exc.__cause__ is leader_error for exc in errors if exc is not leader_error))
+
+    def test_non_json_upstream_response(self):
+        backend = NeshanRoutingBackend(api_key='key')
+        response = mock.Mock(status_code=502)
+        response.json.side_effect = ValueError('Expecting value')
+        with mock.patch.object(backend.session, 'get', return_value=response):
+            with self.assertRaises(RoutingError):
+                RoutingService(backend=backend).route(ORIGIN, DESTINATION)
+
+    def test_errors_are_not_cached(self):
+        service = RoutingService(backend=FailingBackend())
+        for _ in range(2):
+            with self.assertRaises(RoutingError):
+                service.route(ORIGIN, DESTINATION)
+        stats = service.stats()
+        self.assertEqual((stats['upstream_calls'], stats['upstream_errors'], stats['cache_entries']), (2, 2, 0))
+
+
+class RoutingViewTest(SimpleTestCase):
+    """تست endpoint مسیریابی با بک‌اند محلی"""
+
+    def setUp(self):
+        patcher = mock.patch.object(routing_service, 'backend', LocalRoutingBackend())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        routing_service.cache.clear()
+        routing_service.reset_stats()
+        self.client = APIClient()
+
+    def test_route_and_stats(self):
+        body = {'type': 'car', 'origin': '35.7219,51.3347', 'destination': '35.6892,51.3890'}
+        for _ in range(2):
+            response = self.client.post('/team4/api/navigation/route/', body, format='json')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['internal_air_distance_km'], round(ORIGIN.distance(DESTINATION), 3))
+            self.assertIn('routes', response.data)
+
+        self.assertEqual(self.client.get('/team4/api/navigation/route/stats/').status_code, 401)
+        with self.settings(METRICS_TOKEN='scrape-secret'):
+            stats = self.client.get('/team4/api/navigation/route/stats/', HTTP_X_METRICS_TOKEN='scrape-secret').data
+        self.assertEqual((stats['requests'], stats['hits'], stats['backend']), (2, 1, 'LocalRoutingBackend'))
+
+    def test_unreachable_service(self):
+        with mock.patch.object(routing_service, 'backend', FailingBackend()):
+            response = self.client.post(
+                '/team4/api/navigation/route/', {'origin': '35.7,51.3', 'destination': '35.6,51.4'}, format='json'
+            )
+        self.assertEqual(response.status_code, 503)
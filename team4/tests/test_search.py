@@ -0,0 +1,134 @@
+"""
+Tests for normalized name search
+"""
+from django.test import SimpleTestCase, TestCase
+from team4.fields import Point
+from team4.models import Province, City, Village, Category, Facility
+from team4.normalization import normalize, search_text
+from team4.services.region_index import region_index
+from team4.services.region_service import RegionService
+from team4.services.search_service import SearchService
+
+
+class NormalizationTest(SimpleTestCase):
+    """تست نرمال‌سازی متن فارسی"""
+
+    def test_arabic_variants_and_zwnj(self):
+        self.assertEqual(normalize("كافي‌شاپ"), normalize("کافیشاپ"))
+        self.assertEqual(normalize("مُوزه  ملّي"), "موزه ملی")
+        self.assertEqual(normalize("هتل ۵ ستاره"), "هتل 5 ستاره")
+
+    def test_search_text(self):
+        self.assertEqual(search_text("هتل پارس", "Pars Hotel"), "هتل پارس pars hotel")
+        self.assertEqual(search_text("موزه", ""), "موزه")
+
+
+class FacilitySearchTest(TestCase):
+    """تست جستجو و رتبه‌بندی نام مکان‌ها"""
+
+    databases = {'default', 'team4'}
+
+    @classmethod
+    def setUpTestData(cls):
+        fars = Province.objects.create(name_fa="فارس", name_en="Fars")
+        tehran = Province.objects.create(name_fa="تهران", name_en="Tehran")
+        cls.shiraz = City.objects.create(province=fars, name_fa="شيراز", name_en="Shiraz", location=Point(52.58, 29.59))
+        cls.tehran = City.objects.create(province=tehran, name_fa="تهران", name_en="Tehran", location=Point(51.38, 35.68))
+        Village.objects.create(city=cls.shiraz, name_fa="قلات", name_en="Qalat")
+        category = Category.objects.create(name_fa="هتل", name_en="Hotel")
+
+        def create(name_fa, name_en, city):
+            return Facility.objects.create(
+                name_fa=name_fa, name_en=name_en, category=category, city=city,
+                address="آدرس", location=city.location
+            )
+
+        cls.exact = create("هتل پارس", "Pars Hotel", cls.shiraz)
+        cls.contains = create("بزرگ هتل پارس", "Grand Pars Hotel", cls.tehran)
+        cls.other = create("هتل كوثر", "Kowsar Hotel", cls.shiraz)
+
+    def test_search_matches_character_variants(self):
+        # «ک» فارسی باید «ك» عربی ذخیره‌شده را پیدا کند
+        results = SearchService.search(Facility.objects.all(), "کوثر")
+        self.assertEqual(list(results), [self.other])
+
+    def test_search_ranks_prefix_before_contains(self):
+        results = list(SearchService.search(Facility.objects.all(), "هتل پارس"))
+        self.assertEqual(results, [self.exact, self.contains])
+
+    def test_search_requires_all_terms(self):
+        self.assertEqual(list(SearchService.search(Facility.objects.all(), "pars kowsar")), [])
+        self.assertEqual(list(SearchService.search(Facility.objects.all(), "  ")), [])
+
+    def test_search_name_follows_name_updates(self):
+        self.other.name_en = "Kosar Inn"
+        self.other.save(update_fields=['name_en'])
+        self.assertEqual(Facility.objects.get(pk=self.other.pk).search_name, "هتل کوثر kosar inn")
+
+    def test_region_filter(self):
+        facilities = Facility.objects.all()
+        self.assertCountEqual(
+            SearchService.filter_by_region(facilities, 'city', "شیراز"), [self.exact, self.other]
+        )
+        self.assertCountEqual(
+            SearchService.filter_by_region(facilities, 'province', "tehran"), [self.contains]
+        )
+        self.assertCountEqual(
+            SearchService.filter_by_region(facilities, 'village', "قلات"), [self.exact, self.other]
+        )
+
+    def test_region_search(self):
+        region_index.invalidate()
+        results = RegionService.search_regions("شیراز")
+        self.assertEqual([r['id'] for r in results], [str(self.shiraz.city_id)])
+
+
+class RegionIndexTest(TestCase):
+    """تست ایندکس درون‌حافظه‌ای مناطق"""
+
+    databases = {'default', 'team4'}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.fars = Province.objects.create(name_fa="فارس", name_en="Fars")
+        cls.shiraz = City.objects.create(province=cls.fars, name_fa="شيراز", name_en="Shiraz", location=Point(52.58, 29.59))
+        cls.shirvan = City.objects.create(province=cls.fars, name_fa="شیروان", name_en="Shirvan", location=Point(57.9, 37.4))
+        cls.bandar = City.objects.create(province=cls.fars, name_fa="بندر عباس", name_en="Bandar Abbas", location=Point(56.2, 27.1))
+        cls.village = Village.objects.create(city=cls.shiraz, name_fa="شیراز کوچک", name_en="Little Shiraz")
+
+    def setUp(self):
+        region_index.invalidate()
+
+    def names(self, query, **kwargs):
+        return [result['name'] for result in region_index.search(query, **kwargs)]
+
+    def test_ranking_and_variants(self):
+        self.assertEqual(self.names("شیراز"), ["شيراز", "شیراز کوچک"])
+        self.assertEqual(self.names("شی"), ["شيراز", "شیروان", "شیراز کوچک"])
+        self.assertEqual(self.names("عباس"), ["بندر عباس"])
+        self.assertEqual(self.names("SHIR", region_type='village'), ["شیراز کوچک"])
+        self.assertEqual(self.names("شی", limit=1), ["شيراز"])
+        self.assertEqual(self.names("xyz"), [])
+
+    def test_result_shape(self):
+        result = region_index.search("little shiraz")[0]
+        self.assertEqual(result, {
+            'id': str(self.village.village_id),
+            'name': "شیراز کوچک",
+            'parent_region_id': str(self.shiraz.city_id),
+            'parent_region_name': "شيراز",
+        })
+
+    def test_rebuilds_after_region_changes(self):
+        self.assertEqual(self.names("کازرون"), [])
+        City.objects.create(province=self.fars, name_fa="کازرون", name_en="Kazerun", location=Point(51.6, 29.6))
+        self.assertEqual(self.names("کازرون"), ["کازرون"])
+
+        self.shirvan.delete()
+        self.assertEqual(self.names("شیروان"), [])
+
+    def test_stats(self):
+        stats = region_index.stats()
+        self.assertEqual(stats['entries'], 5)
+        self.assertGreater(stats['memory_bytes'], 0)
+        self.assertGreaterEqual(stats['build_ms'], 0)
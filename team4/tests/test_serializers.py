@@ -0,0 +1,75 @@
+"""
+Tests for facility list serializers
+"""
+from decimal import Decimal
+
+from django.test import TestCase
+from team4.fields import Point
+from team4.models import Province, City, Category, Amenity, Facility, FacilityAmenity, Pricing, Image
+from team4.serializers import FacilityListSerializer, FacilityDetailSerializer
+from team4.services.facility_service import FacilityService
+
+
+class FacilityListQueriesTest(TestCase):
+    """تعداد کوئری‌های سریالایز یک صفحه نباید به تعداد ردیف‌ها وابسته باشد"""
+
+    databases = {'default', 'team4'}
+
+    @classmethod
+    def setUpTestData(cls):
+        province = Province.objects.create(name_fa="فارس", name_en="Fars")
+        city = City.objects.create(
+            province=province, name_fa="شیراز", name_en="Shiraz", location=Point(52.583698, 29.591768)
+        )
+        category = Category.objects.create(name_fa="هتل", name_en="Hotel")
+        wifi = Amenity.objects.create(name_fa="وای‌فای", name_en="WiFi")
+
+        cls.facilities = []
+        for i in range(6):
+            facility = Facility.objects.create(
+                name_fa=f"هتل {i}", name_en=f"Hotel {i}", category=category, city=city,
+                address="آدرس", location=Point(52.54 + i / 100, 29.61)
+            )
+            FacilityAmenity.objects.create(facility=facility, amenity=wifi)
+            Pricing.objects.create(facility=facility, price_type='Per Night', price=Decimal(900 + i))
+            Pricing.objects.create(facility=facility, price_type='Per Night', price=Decimal(500 + i))
+            Pricing.objects.create(facility=facility, price_type='Per Night', price=Decimal(100), status=False)
+            Image.objects.create(facility=facility, image_url=f"https://example.com/{i}-b.jpg")
+            Image.objects.create(facility=facility, image_url=f"https://example.com/{i}-a.jpg", is_primary=True)
+            cls.facilities.append(facility)
+
+    def serialize_page(self, serializer_class, size):
+        page = list(Facility.objects.order_by('fac_id')[:size])
+        return serializer_class(page, many=True).data
+
+    def test_list_page_query_count_is_constant(self):
+        # صفحه + category + city + province + amenities + pricing + images
+        with self.assertNumQueries(7, using='team4'):
+            small = self.serialize_page(FacilityListSerializer, 2)
+        with self.assertNumQueries(7, using='team4'):
+            large = self.serialize_page(FacilityListSerializer, 6)
+
+        self.assertEqual(len(small), 2)
+        self.assertEqual(len(large), 6)
+        self.assertEqual(large[3]['primary_image'], "https://example.com/3-a.jpg")
+        self.assertEqual(large[3]['price_from'], {'type': 'exact', 'value': 503.0})
+        self.assertEqual([a['name_en'] for a in large[3]['amenities']], ['WiFi'])
+
+    def test_detail_page_query_count_is_constant(self):
+        with self.assertNumQueries(7, using='team4'):
+            self.serialize_page(FacilityDetailSerializer, 2)
+        with self.assertNumQueries(7, using='team4'):
+            self.serialize_page(FacilityDetailSerializer, 6)
+
+    def test_accessors_match_without_prefetch(self):
+        facility = Facility.objects.get(fac_id=self.facilities[2].fac_id)
+        self.assertEqual(facility.get_primary_image().image_url, "https://example.com/2-a.jpg")
+        self.assertEqual(facility.get_min_price(), Decimal(502))
+
+    def test_compare_facilities_query_count(self):
+        fac_ids = [facility.fac_id for facility in self.facilities[:5]]
+        # facilities (+city, category) + amenities + pricing + images
+        with self.assertNumQueries(4, using='team4'):
+            result = FacilityService.compare_facilities(fac_ids)
+        self.assertEqual(len(result['facilities']), 5)
+        self.assertEqual(result['comparison_matrix']['lowest_price'], fac_ids[0])
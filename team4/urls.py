@@ -18,6 +18,7 @@ urlpatterns = [
     path("api/", include(router.urls)),
     path("api/regions/search/", views.search_regions, name='search-regions'),
     path("api/navigation/route/", views.RoutingView.as_view(), name='route'),
+    path("api/navigation/route/stats/", views.routing_stats, name='route-stats'),
 ]
 
 
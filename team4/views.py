@@ -8,22 +8,25 @@ from rest_framework.views import APIView
 from rest_framework.pagination import PageNumberPagination
 from django.core.exceptions import ObjectDoesNotExist
 from .fields import Point
-import os
-import requests
 from dotenv import load_dotenv
 
-from core.auth import api_login_required
-from team4.models import Facility, Category, City, Amenity, Province, Village, RegionType, Favorite, Review
+from core.auth import api_login_required, staff_or_metrics_token_required
+from team4.pagination import CachedCountPaginator, KeysetPagination
+from team4.models import Facility, Category, City, Amenity, FacilityAmenity, Province, Village, RegionType, Favorite, Review
 from team4.serializers import (
     FacilityListSerializer, FacilityDetailSerializer,
     FacilityNearbySerializer, FacilityComparisonSerializer,
     CategorySerializer, CitySerializer, AmenitySerializer,
     FacilityCreateSerializer, RegionSearchResultSerializer,
     FavoriteSerializer, ReviewSerializer, ReviewCreateSerializer,
-    FacilityFilterSerializer, NearbyPlaceSerializer, RoutingRequestSerializer
+    FacilityFilterSerializer, NearbyPlaceSerializer, RoutingRequestSerializer,
+    prefetch_list_relations
 )
 from team4.services.facility_service import FacilityService
+from team4.services.geo_service import GeoService
 from team4.services.region_service import RegionService
+from team4.services.routing_service import RoutingError, routing_service
+from team4.services.search_service import SearchService
 
 TEAM_NAME = "team4"
 load_dotenv()
@@ -36,6 +39,7 @@ class StandardResultsSetPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 100
+    django_paginator_class = CachedCountPaginator
 
 
 # =====================================================
@@ -48,7 +52,29 @@ class FacilityViewSet(viewsets.ModelViewSet):
     """
     queryset = Facility.objects.filter(status=True)
     pagination_class = StandardResultsSetPagination
+    # actionهایی که ترتیب یکتا دارند؛ بقیه (مثل nearby) همیشه با شماره صفحه
+    keyset_actions = ('list', 'search', 'emergency', 'reviews')
     
+    @property
+    def paginator(self):
+        """
+        در keyset_actions با پارامتر cursor صفحه‌بندی keyset (بدون OFFSET و COUNT)، وگرنه شماره صفحه
+        """
+        if not hasattr(self, '_paginator'):
+            if self.action in self.keyset_actions and KeysetPagination.requested(self.request):
+                self._paginator = KeysetPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    def _paginate_ranked(self, ranked):
+        """صفحه‌بندی لیست مرتب‌شده {'facility', 'distance_km'}؛ در حالت keyset با کلید (فاصله، شناسه)"""
+        if isinstance(self.paginator, KeysetPagination):
+            return self.paginator.paginate_list(
+                ranked, lambda item: (item['distance_km'], item['facility'].fac_id), self.request
+            )
+        return self.paginate_queryset(ranked)
+
     def get_serializer_class(self):
         if self.action == 'list':
             return FacilityListSerializer
@@ -97,34 +123,21 @@ class FacilityViewSet(viewsets.ModelViewSet):
         """Apply region-based filtering"""
         if not region_name:
             return queryset
-        
-        if region_type == 'village':
-            return queryset.filter(
-                Q(village__name_fa__icontains=region_name) |
-                Q(village__name_en__icontains=region_name)
-            )
-        elif region_type == 'city':
-            return queryset.filter(
-                Q(city__name_fa__icontains=region_name) |
-                Q(city__name_en__icontains=region_name)
-            )
-        elif region_type == 'province':
-            return queryset.filter(
-                Q(city__province__name_fa__icontains=region_name) |
-                Q(city__province__name_en__icontains=region_name)
-            )
-        return queryset
+        return SearchService.filter_by_region(queryset, region_type, region_name)
     
     def _apply_sorting(self, queryset, sort_by, region_name=None):
         """Apply sorting to queryset"""
+        # fac_id در انتهای هر ترتیب: ترتیب یکتا و پایدار، لازم برای صفحه‌بندی keyset
+        if sort_by == 'relevance' and 'relevance' in queryset.query.annotations:
+            return queryset.order_by('-relevance', '-avg_rating', 'fac_id')
         if sort_by == 'rating':
-            return queryset.order_by('-avg_rating', '-review_count')
+            return queryset.order_by('-avg_rating', '-review_count', 'fac_id')
         elif sort_by == 'review_count':
-            return queryset.order_by('-review_count')
+            return queryset.order_by('-review_count', 'fac_id')
         elif sort_by == 'distance' and region_name:
             sorted_facilities = FacilityService.sort_by_city_distance(queryset, region_name)
-            return sorted_facilities if sorted_facilities else queryset.order_by('-avg_rating')
-        return queryset.order_by('-avg_rating')
+            return sorted_facilities if sorted_facilities else queryset.order_by('-avg_rating', 'fac_id')
+        return queryset.order_by('-avg_rating', 'fac_id')
     
     def list(self, request):
         """
@@ -143,7 +156,8 @@ class FacilityViewSet(viewsets.ModelViewSet):
         - min_price, max_price: Price range filters
         - min_rating: Minimum rating filter
         - is_24_hour: 24-hour operation filter
-        - sort: Sorting method (rating, review_count, distance)
+        - sort: Sorting method (relevance, rating, review_count, distance);
+          defaults to relevance when name is given, otherwise rating
         """
         # Validate request data
         serializer = FacilityFilterSerializer(data=request.data)
@@ -158,7 +172,7 @@ class FacilityViewSet(viewsets.ModelViewSet):
         category_name = data.get('category')
         amenity_name = data.get('amenity')
         price_tier = data.get('price_tier')
-        sort_by = request.query_params.get('sort', 'rating')
+        sort_by = request.query_params.get('sort', 'relevance' if name_query else 'rating')
         
         # Validate category
         if category_name and not self._validate_category(category_name):
@@ -177,12 +191,9 @@ class FacilityViewSet(viewsets.ModelViewSet):
         # Start with base queryset
         facilities = self.queryset
         
-        # Apply name search filter
+        # Apply name search filter (normalized search_name, ranked by relevance)
         if name_query:
-            facilities = facilities.filter(
-                Q(name_fa__icontains=name_query) |
-                Q(name_en__icontains=name_query)
-            )
+            facilities = SearchService.search(facilities, name_query)
         
         # Apply region filter
         facilities = self._apply_region_filter(facilities, region_type, region_name)
@@ -196,10 +207,10 @@ class FacilityViewSet(viewsets.ModelViewSet):
         
         # Apply amenity filter
         if amenity_name:
-            facilities = facilities.filter(
-                amenities__name_en__iexact=amenity_name
-            ) | facilities.filter(
-                amenities__name_fa__iexact=amenity_name)
+            facilities = facilities.filter(fac_id__in=FacilityAmenity.objects.filter(
+                Q(amenity__name_en__iexact=amenity_name) |
+                Q(amenity__name_fa__iexact=amenity_name)
+            ).values('facility_id'))
         
         # Apply price tier filter
         if price_tier:
@@ -224,9 +235,9 @@ class FacilityViewSet(viewsets.ModelViewSet):
         
         # Handle distance sorting special case
         if sort_by == 'distance' and isinstance(sorted_result, list):
-            page = self.paginate_queryset([f['facility'] for f in sorted_result])
+            page = self._paginate_ranked(sorted_result)
             if page is not None:
-                serializer = self.get_serializer(page, many=True)
+                serializer = self.get_serializer([f['facility'] for f in page], many=True)
                 return self.get_paginated_response(serializer.data)
             
             serializer = self.get_serializer(
@@ -262,7 +273,8 @@ class FacilityViewSet(viewsets.ModelViewSet):
         - min_price, max_price: Price range filters
         - min_rating: Minimum rating filter
         - is_24_hour: 24-hour operation filter
-        - sort: Sorting method (rating, review_count, distance)
+        - sort: Sorting method (relevance, rating, review_count, distance);
+          defaults to relevance when name is given, otherwise rating
         """
         # Validate request data
         serializer = FacilityFilterSerializer(data=request.data)
@@ -277,7 +289,7 @@ class FacilityViewSet(viewsets.ModelViewSet):
         category_name = data.get('category')
         amenity_name = data.get('amenity')
         price_tier = data.get('price_tier')
-        sort_by = request.query_params.get('sort', 'rating')
+        sort_by = request.query_params.get('sort', 'relevance' if name_query else 'rating')
         
         # Validate category
         if category_name and not self._validate_category(category_name):
@@ -296,12 +308,9 @@ class FacilityViewSet(viewsets.ModelViewSet):
         # Start with base queryset
         facilities = self.queryset
         
-        # Apply name search filter
+        # Apply name search filter (normalized search_name, ranked by relevance)
         if name_query:
-            facilities = facilities.filter(
-                Q(name_fa__icontains=name_query) |
-                Q(name_en__icontains=name_query)
-            )
+            facilities = SearchService.search(facilities, name_query)
         
         # Apply region filter
         facilities = self._apply_region_filter(facilities, region_type, region_name)
@@ -315,11 +324,10 @@ class FacilityViewSet(viewsets.ModelViewSet):
         
         # Apply amenity filter
         if amenity_name:
-            facilities = facilities.filter(
-                amenities__name_en__iexact=amenity_name
-            ) | facilities.filter(
-                amenities__name_fa__iexact=amenity_name
-            )
+            facilities = facilities.filter(fac_id__in=FacilityAmenity.objects.filter(
+                Q(amenity__name_en__iexact=amenity_name) |
+                Q(amenity__name_fa__iexact=amenity_name)
+            ).values('facility_id'))
         
         # Apply price tier filter
         if price_tier:
@@ -344,9 +352,9 @@ class FacilityViewSet(viewsets.ModelViewSet):
         
         # Handle distance sorting special case
         if sort_by == 'distance' and isinstance(sorted_result, list):
-            page = self.paginate_queryset([f['facility'] for f in sorted_result])
+            page = self._paginate_ranked(sorted_result)
             if page is not None:
-                serializer = self.get_serializer(page, many=True)
+                serializer = self.get_serializer([f['facility'] for f in page], many=True)
                 return self.get_paginated_response(serializer.data)
             
             serializer = self.get_serializer(
@@ -408,6 +416,7 @@ class FacilityViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_200_OK
             )
         
+        prefetch_list_relations([center_facility] + [item['facility'] for item in nearby_facilities])
         center_data = FacilityListSerializer(center_facility).data
         serializer = FacilityNearbySerializer(nearby_facilities, many=True)
         
@@ -482,9 +491,6 @@ class FacilityViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Create center point
-        center_point = Point(lng, lat)
-        
         # Start with base queryset
         facilities = self.queryset
         
@@ -503,31 +509,21 @@ class FacilityViewSet(viewsets.ModelViewSet):
             tier_list = [t.strip() for t in price_tiers_param.split(',')]
             facilities = facilities.filter(price_tier__in=tier_list)
         
-        # Calculate distances and filter by radius
-        nearby_places = []
+        # Bounding-box prefilter on the indexed lat/lng columns, exact distance on the rest
         radius_km = radius_meters / 1000.0
-        
-        for facility in facilities:
-            if facility.location:
-                try:
-                    distance_km = facility.calculate_distance_to(center_point)
-                    if distance_km and distance_km <= radius_km:
-                        nearby_places.append({
-                            'facility': facility,
-                            'distance_meters': distance_km * 1000  # Convert to meters
-                        })
-                except:
-                    continue
-        
-        # Sort by distance
-        nearby_places.sort(key=lambda x: x['distance_meters'])
+        nearby_places = [
+            {'facility': facility, 'distance_meters': distance_km * 1000}
+            for facility, distance_km in GeoService.facilities_within(facilities, lat, lng, radius_km)
+        ]
         
         # Paginate
         page = self.paginate_queryset(nearby_places)
         if page is not None:
+            prefetch_list_relations([place['facility'] for place in page])
             serializer = NearbyPlaceSerializer(page, many=True)
             return self.get_paginated_response(serializer.data)
         
+        prefetch_list_relations([place['facility'] for place in nearby_places])
         serializer = NearbyPlaceSerializer(nearby_places, many=True)
         return Response(serializer.data)
     
@@ -549,7 +545,7 @@ class FacilityViewSet(viewsets.ModelViewSet):
         reviews = Review.objects.filter(
             facility=facility,
             is_approved=True
-        ).select_related('user').order_by('-created_at')
+        ).select_related('user').order_by('-created_at', '-review_id')
         
         # Filter by rating
         rating = request.query_params.get('rating')
@@ -615,30 +611,20 @@ class FacilityViewSet(viewsets.ModelViewSet):
                 lng = float(lng)
                 radius = float(radius)
                 
-                from .fields import Point
-                user_location = Point(lng, lat, srid=4326)
-                
-                # Calculate distance and filter
-                facilities_with_distance = []
-                for facility in facilities:
-                    distance = facility.calculate_distance_to(user_location)
-                    if distance and distance <= radius:
-                        facilities_with_distance.append({
-                            'facility': facility,
-                            'distance_km': round(distance, 2)
-                        })
-                
-                # Sort by distance
-                facilities_with_distance.sort(key=lambda x: x['distance_km'])
+                # Bounding-box prefilter on the indexed lat/lng columns, exact distance on the rest
+                facilities_with_distance = [
+                    {'facility': facility, 'distance_km': distance}
+                    for facility, distance in GeoService.facilities_within(facilities, lat, lng, radius, decimals=2)
+                ]
                 
                 # Pagination
-                page = self.paginate_queryset([f['facility'] for f in facilities_with_distance])
+                page = self._paginate_ranked(facilities_with_distance)
                 if page is not None:
                     # Add distance to serializer data
-                    serializer = self.get_serializer(page, many=True)
+                    serializer = self.get_serializer([f['facility'] for f in page], many=True)
                     data = serializer.data
-                    for i, item in enumerate(data):
-                        item['distance_km'] = facilities_with_distance[i]['distance_km']
+                    for item, ranked in zip(data, page):
+                        item['distance_km'] = ranked['distance_km']
                     return self.get_paginated_response(data)
                 
                 serializer = self.get_serializer(
@@ -660,7 +646,7 @@ class FacilityViewSet(viewsets.ModelViewSet):
                 )
         
         # Without location filter
-        facilities = facilities.order_by('-avg_rating')
+        facilities = facilities.order_by('-avg_rating', 'fac_id')
         
         # Pagination
         page = self.paginate_queryset(facilities)
@@ -710,12 +696,22 @@ def search_regions(request):
     Query Parameters:
     - query: Search query string (required)
     - region_type: Filter by type - 'province', 'city', or 'village' (optional)
+    - limit: Maximum number of results (default: 20, max: 100)
     
-    Returns matching regions with their type and geographic information.
+    Returns the best matching regions first.
     """
     query = request.query_params.get('query', '').strip()
     region_type = request.query_params.get('region_type', '').strip().lower()
     
+    try:
+        limit = int(request.query_params.get('limit', RegionService.DEFAULT_LIMIT))
+    except ValueError:
+        return Response(
+            {'error': 'limit باید عدد صحیح باشد'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    limit = max(1, min(limit, RegionService.MAX_LIMIT))
+    
     # Validate query parameter
     if not query:
         return Response(
@@ -732,7 +728,7 @@ def search_regions(request):
         )
     
     # Search via Service
-    results = RegionService.search_regions(query, region_type or None)
+    results = RegionService.search_regions(query, region_type or None, limit)
     
     # Serialize results
     serializer = RegionSearchResultSerializer(results, many=True)
@@ -769,6 +765,10 @@ class FavoriteViewSet(viewsets.ModelViewSet):
             'facility__category',
             'facility__city',
             'facility__city__province'
+        ).prefetch_related(
+            'facility__amenities',
+            'facility__pricing_set',
+            'facility__images'
         )
     
     def create(self, request):
@@ -1008,40 +1008,46 @@ class RoutingView(APIView):
 
         origin_point = serializer.validated_data['origin']
         dest_point = serializer.validated_data['destination']
-        
-        origin_str = f"{origin_point.latitude},{origin_point.longitude}"
-        dest_str = f"{dest_point.latitude},{dest_point.longitude}"
-        
-        service_url = "https://api.neshan.org/v4/direction"
-        api_key = os.getenv('MAP_SERVICE_KEY')
-        
-        params = {
-            'type': serializer.validated_data['type'],
-            'origin': origin_str,
-            'destination': dest_str,
-            'avoidTrafficZone': str(serializer.validated_data.get('avoidTrafficZone', False)).lower(),
-            'avoidOddEvenZone': str(serializer.validated_data.get('avoidOddEvenZone', False)).lower(),
-            'alternative': str(serializer.validated_data.get('alternative', False)).lower(),
-        }
 
         try:
-            response = requests.get(service_url, headers={'Api-Key': api_key}, params=params, timeout=10)
-            result = response.json()
-
-            if response.status_code == 200:
-                result['internal_air_distance_km'] = round(origin_point.distance(dest_point), 3)
-                return Response(result, status=status.HTTP_200_OK)
-            
-            return Response(
-                {
-                    "detail": "خطا در دریافت اطلاعات از سرویس نقشه. لطفا ورودی‌ها را بررسی کنید.",
-                    "service_response": result
-                }, 
-                status=response.status_code
+            status_code, result = routing_service.route(
+                origin_point,
+                dest_point,
+                serializer.validated_data['type'],
+                avoidTrafficZone=serializer.validated_data.get('avoidTrafficZone', False),
+                avoidOddEvenZone=serializer.validated_data.get('avoidOddEvenZone', False),
+                alternative=serializer.validated_data.get('alternative', False),
             )
-            
-        except requests.exceptions.RequestException:
+        except RoutingError:
             return Response(
                 {"detail": "خطا در برقراری ارتباط با سرویس نقشه. لطفاً وضعیت اینترنت را بررسی کنید."}, 
                 status=status.HTTP_503_SERVICE_UNAVAILABLE
-            )
\ No newline at end of file
+            )
+
+        if status_code == 200:
+            # پاسخ کش‌شده بین درخواست‌ها مشترک است؛ فیلد اضافه روی کپی نوشته می‌شود
+            return Response(
+                {**result, 'internal_air_distance_km': round(origin_point.distance(dest_point), 3)},
+                status=status.HTTP_200_OK
+            )
+
+        return Response(
+            {
+                "detail": "خطا در دریافت اطلاعات از سرویس نقشه. لطفا ورودی‌ها را بررسی کنید.",
+                "service_response": result
+            }, 
+            status=status_code
+        )
+
+
+@staff_or_metrics_token_required
+@api_view(['GET'])
+def routing_stats(request):
+    """
+    Routing cache and map service statistics since process start:
+    requests, cache hits and hit_rate, coalesced (identical requests that shared an
+    in-flight call), upstream calls/errors and upstream latency (avg/max ms).
+
+    Staff only, or with the X-Metrics-Token header (like /api/metrics/).
+    """
+    return Response(routing_service.stats())
\ No newline at end of file